@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Size and speed of --baseline files against comparing saved JSON reports.
+
+Usage: python3 benchmarks/baseline_diff.py [--events 1000000] [--churn 0.1]
+       [--top 20]
+
+Builds a table of --events distinct events and a second run where --churn
+of them are gone, as many are new and as many were counted again; the
+line numbers of all of them moved, as after an unrelated edit. "baseline"
+is what --write-baseline and --baseline do: fingerprint the table, write
+the file, then load it and diff. "json report" is the previous way to
+compare two runs: save the --json report and match the full event keys of
+the next run against it.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.baseline import Baseline, diff, summarize, write_baseline  # noqa: E402
+from logforge.model import Event  # noqa: E402
+from logforge.report import generate_json  # noqa: E402
+
+FIELDS = ("level", "type", "message", "file", "line", "function")
+
+
+def _events(ids: List[int], rng: random.Random) -> List[Event]:
+    return [
+        Event(
+            "ERROR" if i % 4 else "WARNING",
+            f"type_{i % 40}",
+            f"request failed: job_{i:x} in queue_{i % 97:x}",
+            f"src/module_{i % 500:x}.c",
+            rng.randint(1, 2000),
+            f"handler_{i % 300:x}",
+            i % 50 + 1,
+        )
+        for i in ids
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--churn", type=float, default=0.1)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    count = args.events
+    changed = int(count * args.churn)
+    rng = random.Random(0)
+    before = _events(list(range(count)), rng)
+    after = _events(list(range(changed, count + changed)), random.Random(0))
+    for event in rng.sample(after[: count - changed], changed):
+        event.occurrences += 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "base.lfb")
+        start = time.perf_counter()
+        write_baseline(path, summarize(before, normalized=True))
+        written = time.perf_counter()
+        entries = summarize(after, normalized=True)
+        summarized = time.perf_counter()
+        result = diff(entries, Baseline(path))
+        diffed = time.perf_counter()
+        diff(entries, Baseline(path), args.top)
+        top_diffed = time.perf_counter()
+        size = os.path.getsize(path)
+
+        report = os.path.join(tmp, "report.json")
+        json_start = time.perf_counter()
+        with open(report, "w", encoding="utf-8") as handle:
+            handle.write(generate_json(before))
+        json_written = time.perf_counter()
+        with open(report, "r", encoding="utf-8") as handle:
+            saved = {
+                tuple(item[field] for field in FIELDS): item["occurrences"]
+                for item in json.load(handle)
+            }
+        current = {event.key(): event.occurrences for event in after}
+        json_new = current.keys() - saved.keys()
+        json_diffed = time.perf_counter()
+        json_size = os.path.getsize(report)
+
+    print(f"{count} events, {changed} new, resolved and counted again")
+    print(
+        f"baseline: {size / 2**20:7.1f} MB, fingerprint + write "
+        f"{written - start:6.2f} s, fingerprint next run "
+        f"{summarized - written:6.2f} s, "
+        f"load + diff {diffed - summarized:6.2f} s "
+        f"({'/'.join(map(str, result.totals))} new/resolved/changed), "
+        f"with --top {args.top} {top_diffed - diffed:6.2f} s"
+    )
+    print(
+        f"json report: {json_size / 2**20:7.1f} MB, write "
+        f"{json_written - json_start:6.2f} s, load + diff "
+        f"{json_diffed - json_written:6.2f} s ({len(json_new)} new: moved lines "
+        "count as new events)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
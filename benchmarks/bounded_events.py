@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Event table memory and time with and without --max-events.
+
+Usage: python3 benchmarks/bounded_events.py [--lines 1000000] [--max-events 10000]
+
+Every generic error line embeds a request id, so each one is a new event;
+one in fifty is a recurring "disk full" error that must survive eviction.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Iterator, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+
+
+def _lines(count: int) -> Iterator[str]:
+    for i in range(count):
+        if i % 50 == 0:
+            yield "ERROR: disk full on /var\n"
+        else:
+            yield f"2024-01-12T10:00:{i % 60:02d} ERROR request {i:08x} timed out\n"
+
+
+def _run(count: int, max_events: Optional[int]) -> None:
+    start = time.perf_counter()
+    Analyzer(max_events=max_events).process_lines(_lines(count))
+    elapsed = time.perf_counter() - start
+    # Memory is measured on a second pass; tracemalloc distorts timings.
+    tracemalloc.start()
+    analyzer = Analyzer(max_events=max_events)
+    analyzer.process_lines(_lines(count))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    top = max(analyzer.get_events(), key=lambda event: event.occurrences)
+    print(
+        f"{str(max_events or 'unbounded'):>10} {len(analyzer.get_events()):>9} "
+        f"{peak / 2**20:>8.1f} {elapsed:>7.2f} {analyzer.get_error_bound() or 0:>6} "
+        f"{top.occurrences:>6}  {top.message}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--max-events", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'table':>10} {'events':>9} {'peak_MB':>8} {'seconds':>7} {'bound':>6} {'top':>6}")
+    _run(args.lines, None)
+    _run(args.lines, args.max_events)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
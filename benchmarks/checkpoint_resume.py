@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Full analysis against a checkpoint resume after a small append.
+
+Usage: python3 benchmarks/checkpoint_resume.py [--size-mb 512] [--append-mb 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.checkpoint import analyze_incremental  # noqa: E402
+
+BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled in 3ms\n"
+    for i in range(1000)
+) + "ERROR: worker 3 failed at pool.py:40 in run\n"
+
+
+def _append(path: str, size_mb: int) -> None:
+    block = BLOCK.encode("utf-8")
+    with open(path, "ab") as handle:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            handle.write(block)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--append-mb", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "app.log")
+        checkpoint = os.path.join(tmp, "app.ckpt")
+        _append(source, args.size_mb)
+
+        start = time.perf_counter()
+        analyze_incremental(source, checkpoint)
+        full = time.perf_counter() - start
+
+        _append(source, args.append_mb)
+        start = time.perf_counter()
+        analyze_incremental(source, checkpoint)
+        resumed = time.perf_counter() - start
+
+        print(f"full run ({args.size_mb} MB): {full:.2f}s")
+        print(f"resume (+{args.append_mb} MB): {resumed:.2f}s")
+        print(f"checkpoint size: {os.path.getsize(checkpoint)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Wall time seen by a chatty child with and without `logforge run` around it.
+
+Usage: python3 benchmarks/child_walltime.py [--size-mb 128]
+
+The child times its own write loop and reports it through a side file, so
+the numbers show how long the child was held up by its parent. "inline"
+rebuilds the previous runner that echoed and analyzed each chunk before
+reading the next one.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.reader import LineSplitter  # noqa: E402
+from logforge.runner import run_commands  # noqa: E402
+
+CHILD = """
+import sys, time
+block = "".join(
+    f"Jan 12 10:00:00 host app[42]: request {i} handled in 3ms\\n" for i in range(1000)
+) + "ERROR: worker failed at pool.py:40 in run\\n"
+start = time.perf_counter()
+for _ in range(int(sys.argv[1])):
+    sys.stdout.write(block)
+sys.stdout.flush()
+with open(sys.argv[2], "w") as handle:
+    handle.write(str(time.perf_counter() - start))
+"""
+
+
+async def _inline_pump(stream, sink, analyzer: Analyzer) -> None:
+    splitter = LineSplitter()
+    while True:
+        chunk = await stream.read(1 << 16)
+        if not chunk:
+            break
+        sink.write(chunk)
+        sink.flush()
+        analyzer.process_lines(splitter.feed(chunk))
+    analyzer.process_lines(splitter.flush())
+
+
+async def _inline_run(command: List[str], sink) -> None:
+    analyzer = Analyzer()
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    await asyncio.gather(
+        _inline_pump(process.stdout, sink, analyzer),
+        _inline_pump(process.stderr, sink, analyzer),
+    )
+    await process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=128)
+    args = parser.parse_args()
+
+    count = args.size_mb * 2**20 // (58 * 1000)
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "wb") as sink:
+        timing = os.path.join(tmp, "child_seconds")
+        command = [sys.executable, "-c", CHILD, str(count), timing]
+
+        def child_seconds() -> float:
+            with open(timing) as handle:
+                return float(handle.read())
+
+        rows = []
+        # Baseline: the same pipe, drained by cat instead of logforge.
+        drain = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=sink)
+        subprocess.run(command, stdout=drain.stdin, check=True)
+        drain.stdin.close()
+        drain.wait()
+        rows.append(("cat", child_seconds()))
+        asyncio.run(_inline_run(command, sink))
+        rows.append(("inline", child_seconds()))
+        run_commands([command], [Analyzer()], stdout=sink, stderr=sink)
+        rows.append(("decoupled", child_seconds()))
+
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'parent':>10} {'child_seconds':>14} {'slowdown':>9}")
+    for name, seconds in rows:
+        print(f"{name:>10} {seconds:>14.2f} {seconds / rows[0][1]:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Analysis throughput on plain vs compressed copies of the same log.
+
+Usage: python3 benchmarks/compressed_input.py [--size-mb 128]
+
+"gzip inline" decompresses on the analysis thread (GzipFile read directly),
+"gzip" is the default path with decompression on a prefetch thread. MB/s is
+measured against the uncompressed size. The overlap needs a second core.
+"""
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.reader import decompressed, iter_lines  # noqa: E402
+
+BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled in 3ms\n"
+    for i in range(1000)
+) + "ERROR: worker 3 failed at pool.py:40 in run\n"
+
+
+def _plain(path: str) -> Iterator[str]:
+    with open(path, "rb") as handle, decompressed(handle) as stream:
+        yield from iter_lines(stream)
+
+
+def _gzip_inline(path: str) -> Iterator[str]:
+    with gzip.open(path, "rb") as stream:
+        yield from iter_lines(stream)  # type: ignore[arg-type]
+
+
+def _time(read: Callable[[str], Iterator[str]], path: str) -> float:
+    start = time.perf_counter()
+    Analyzer().process_lines(read(path))
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=128)
+    args = parser.parse_args()
+
+    data = BLOCK.encode("utf-8") * (args.size_mb * 2**20 // len(BLOCK) + 1)
+    size_mb = len(data) / 2**20
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {}
+        for name, suffix, compress in (
+            ("plain", "", bytes),
+            ("gzip", ".gz", gzip.compress),
+            ("bz2", ".bz2", bz2.compress),
+            ("xz", ".xz", lzma.compress),
+        ):
+            files[name] = os.path.join(tmp, f"app.log{suffix}")
+            with open(files[name], "wb") as handle:
+                handle.write(compress(data))
+
+        print(f"cpus: {os.cpu_count()}, {size_mb:.0f} MB uncompressed")
+        print(f"{'input':>12} {'file_MB':>8} {'seconds':>8} {'MB/s':>7}")
+        for name, read, path in (
+            ("plain", _plain, files["plain"]),
+            ("gzip inline", _gzip_inline, files["gzip"]),
+            ("gzip", _plain, files["gzip"]),
+            ("bz2", _plain, files["bz2"]),
+            ("xz", _plain, files["xz"]),
+        ):
+            seconds = _time(read, path)
+            file_mb = os.path.getsize(path) / 2**20
+            print(f"{name:>12} {file_mb:>8.1f} {seconds:>8.2f} {size_mb / seconds:>7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
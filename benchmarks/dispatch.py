@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Lines/second of Analyzer.process_line against the pre-prefilter engine.
+
+Usage: python3 benchmarks/dispatch.py [--lines 200000] [--repeat 3]
+
+LegacyAnalyzer below is a frozen copy of the sequential regex chain that
+process_line used before the literal prefilter. The benchmark also checks
+that both engines produce identical events on the same corpus.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.model import ErrorEvent, WarningEvent  # noqa: E402
+
+_LEGACY_TRACEBACK_START_RE = re.compile(r"^Traceback \(most recent call last\):")
+
+
+class LegacyAnalyzer(Analyzer):
+    def process_line(self, line: str) -> None:
+        raw_line = line.rstrip("\n")
+        self._buffer.append(raw_line)
+
+        if _LEGACY_TRACEBACK_START_RE.match(raw_line):
+            self._traceback_active = True
+            self._traceback_last_location = None
+            return
+
+        if self._traceback_active:
+            file_match = self._traceback_file_re.match(raw_line)
+            if file_match:
+                file = file_match.group(1)
+                line_no = int(file_match.group(2))
+                function = file_match.group(3)
+                self._traceback_last_location = (file, line_no, function)
+                return
+
+            exc_match = self._traceback_exc_re.match(raw_line.strip())
+            if exc_match:
+                exc_type = exc_match.group(1)
+                message = raw_line.strip()
+                file = None
+                line_no = None
+                function = None
+                if self._traceback_last_location:
+                    file, line_no, function = self._traceback_last_location
+                self._add_event(
+                    ErrorEvent(
+                        type=exc_type,
+                        message=message,
+                        file=file,
+                        line=line_no,
+                        function=function,
+                    )
+                )
+                self._traceback_active = False
+                self._traceback_last_location = None
+                return
+
+        compiler_match = self._compiler_re.match(raw_line)
+        if compiler_match:
+            file = compiler_match.group("file")
+            line_no = int(compiler_match.group("line"))
+            level = compiler_match.group("level").lower()
+            msg = compiler_match.group("msg")
+            if level == "warning":
+                self._add_event(
+                    WarningEvent(
+                        type="compiler_warning",
+                        message=msg,
+                        file=file,
+                        line=line_no,
+                    )
+                )
+            else:
+                self._add_event(
+                    ErrorEvent(
+                        type="compiler_error",
+                        message=msg,
+                        file=file,
+                        line=line_no,
+                    )
+                )
+            return
+
+        if self._pending_signal:
+            location_match = self._gdb_location_re.search(raw_line)
+            if location_match:
+                file = location_match.group(1)
+                line_no = int(location_match.group(2))
+                function_match = self._gdb_frame_re.match(raw_line.strip())
+                function = function_match.group(1) if function_match else None
+                signal, message = self._pending_signal
+                self._add_event(
+                    ErrorEvent(
+                        type=signal,
+                        message=message,
+                        file=file,
+                        line=line_no,
+                        function=function,
+                    )
+                )
+                self._pending_signal = None
+            else:
+                signal, message = self._pending_signal
+                self._add_event(ErrorEvent(type=signal, message=message))
+                self._pending_signal = None
+
+        gdb_match = self._gdb_signal_re.search(raw_line)
+        if not gdb_match:
+            gdb_match = self._gdb_signal_short_re.match(raw_line.strip())
+        if gdb_match:
+            signal = gdb_match.group(1)
+            self._pending_signal = (signal, raw_line.strip())
+            return
+
+        generic_match = self._generic_level_re.search(raw_line)
+        if generic_match:
+            keyword = generic_match.group(1).upper()
+            level = "ERROR"
+            event_type = "unknown_error"
+            if keyword == "WARNING":
+                level = "WARNING"
+                event_type = "unknown_warning"
+            elif keyword == "FATAL":
+                event_type = "fatal"
+            elif keyword == "FAILED":
+                event_type = "failed"
+
+            file, line_no = self._extract_location(raw_line)
+            function = self._extract_function(raw_line)
+            message = raw_line.strip()
+            if level == "WARNING":
+                self._add_event(
+                    WarningEvent(
+                        type=event_type,
+                        message=message,
+                        file=file,
+                        line=line_no,
+                        function=function,
+                    )
+                )
+            else:
+                self._add_event(
+                    ErrorEvent(
+                        type=event_type,
+                        message=message,
+                        file=file,
+                        line=line_no,
+                        function=function,
+                    )
+                )
+
+
+def build_corpus(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    lines: List[str] = []
+    while len(lines) < count:
+        roll = rng.random()
+        if roll < 0.9:
+            lines.append(
+                f"Jan 12 10:{rng.randint(0, 59):02d}:00 host app[{rng.randint(1, 999)}]: "
+                f"request {rng.randint(0, 10**6)} handled in {rng.randint(1, 90)}ms\n"
+            )
+        elif roll < 0.93:
+            level = rng.choice(["warning", "error"])
+            lines.append(f"src/m{rng.randint(0, 20)}.c:{rng.randint(1, 500)}:3: {level}: bad thing\n")
+        elif roll < 0.95:
+            lines.extend(
+                [
+                    "Traceback (most recent call last):\n",
+                    f'  File "/srv/app.py", line {rng.randint(1, 99)}, in handler\n',
+                    "    do_work()\n",
+                    "KeyError: 'user'\n",
+                ]
+            )
+        elif roll < 0.96:
+            lines.append("Program received signal SIGSEGV, Segmentation fault.\n")
+            lines.append(f"0x0000555 in compute () at calc.c:{rng.randint(1, 300)}\n")
+        elif roll < 0.99:
+            keyword = rng.choice(["ERROR", "WARNING", "FATAL", "failed", "Error"])
+            lines.append(f"{keyword}: worker {rng.randint(0, 8)} at pool.py:{rng.randint(1, 80)} in run\n")
+        else:
+            lines.append(f"caf\u00e9 warn\u0131ng r\u00e9sum\u00e9 {rng.randint(0, 9)}\n")
+    return lines
+
+
+def _snapshot(analyzer: Analyzer) -> list:
+    return [
+        (e.level, e.type, e.message, e.file, e.line, e.function, e.occurrences)
+        for e in analyzer.get_events()
+    ]
+
+
+def _run(factory: Callable[[], Analyzer], lines: List[str], repeat: int) -> tuple:
+    best = float("inf")
+    analyzer = factory()
+    for _ in range(repeat):
+        analyzer = factory()
+        start = time.perf_counter()
+        analyzer.process_lines(lines)
+        analyzer.finalize()
+        best = min(best, time.perf_counter() - start)
+    return best, analyzer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = build_corpus(args.lines)
+    legacy_time, legacy = _run(LegacyAnalyzer, lines, args.repeat)
+    new_time, new = _run(Analyzer, lines, args.repeat)
+    if _snapshot(legacy) != _snapshot(new):
+        print("MISMATCH: engines produced different events", file=sys.stderr)
+        return 1
+
+    print(f"{'engine':>8} {'lines_per_s':>12}")
+    print(f"{'legacy':>8} {len(lines) / legacy_time:>12,.0f}")
+    print(f"{'current':>8} {len(lines) / new_time:>12,.0f}")
+    print(f"speedup: {legacy_time / new_time:.2f}x, events identical ({len(new.get_events())} unique)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
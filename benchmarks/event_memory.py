@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Bytes per unique event and cost per duplicate hit of the event table.
+
+Usage: python3 benchmarks/event_memory.py [--unique 100000] [--hits 1000000]
+
+The "dataclass" rows rebuild the previous model (a @dataclass Event plus a
+frozen EventKey allocated on every hit) for comparison; their ns/op only
+covers building and looking up the key, not rule matching.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+
+
+@dataclass(frozen=True)
+class DataclassKey:
+    level: str
+    type: str
+    message: str
+    file: Optional[str]
+    line: Optional[int]
+    function: Optional[str]
+
+
+@dataclass
+class DataclassEvent:
+    level: str
+    type: str
+    message: str
+    file: Optional[str] = None
+    line: Optional[int] = None
+    function: Optional[str] = None
+    occurrences: int = 1
+
+    def key(self) -> DataclassKey:
+        return DataclassKey(
+            self.level, self.type, self.message, self.file, self.line, self.function
+        )
+
+
+def _dataclass_add(table: Dict[DataclassKey, DataclassEvent], line: str) -> None:
+    file, line_no, rest = line.split(":", 2)
+    event = DataclassEvent(
+        "WARNING", "compiler_warning", rest.split(": ", 1)[1], file, int(line_no)
+    )
+    key = event.key()
+    if key in table:
+        table[key].occurrences += 1
+    else:
+        table[key] = event
+
+
+def _unique_lines(count: int) -> List[str]:
+    return [
+        f"src/module{i % 50}.c:{i}:3: warning: unused variable 'v{i}'\n"
+        for i in range(count)
+    ]
+
+
+def _rows(unique: List[str], same_key: List[str], same_line: List[str]) -> list:
+    table: Dict[DataclassKey, DataclassEvent] = {}
+    analyzer = Analyzer()
+    return [
+        ("dataclass", "unique event", lambda line: _dataclass_add(table, line), unique),
+        ("dataclass", "duplicate hit", lambda line: _dataclass_add(table, line), same_key),
+        ("slotted", "unique event", analyzer.process_line, unique),
+        ("slotted", "duplicate hit", analyzer.process_line, same_key),
+        ("slotted", "duplicate line (cache)", analyzer.process_line, same_line),
+    ]
+
+
+def _feed(feed: Callable[[str], None], lines: List[str]) -> None:
+    for line in lines:
+        feed(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--unique", type=int, default=100_000)
+    parser.add_argument("--hits", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    unique = _unique_lines(args.unique)
+    # Same key as the first unique line, but with a different column so the
+    # line cache cannot short-circuit the rules and the event table lookup.
+    same_key = [
+        f"src/module0.c:0:{4 + i}: warning: unused variable 'v0'\n"
+        for i in range(args.hits)
+    ]
+    same_line = [unique[0]] * args.hits
+
+    print(f"{'model':>10} {'case':>22} {'bytes/op':>9} {'ns/op':>7}")
+    gc.collect()
+    tracemalloc.start()
+    sizes = []
+    for _, _, feed, lines in _rows(unique, same_key, same_line):
+        before = tracemalloc.get_traced_memory()[0]
+        _feed(feed, lines)
+        sizes.append((tracemalloc.get_traced_memory()[0] - before) / len(lines))
+    tracemalloc.stop()
+
+    for size, (model, case, feed, lines) in zip(
+        sizes, _rows(unique, same_key, same_line)
+    ):
+        start = time.perf_counter()
+        _feed(feed, lines)
+        elapsed = time.perf_counter() - start
+        print(f"{model:>10} {case:>22} {size:>9.1f} {elapsed / len(lines) * 1e9:>7.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
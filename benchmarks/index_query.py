@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Index once, query many times: build cost, index size and query latency.
+
+Usage: python3 benchmarks/index_query.py [--size-mb 64] [--queries 20]
+
+Writes a generated syslog corpus to a temporary file, then times a plain
+`analyze` pass against `index` on it (both with --normalize, so repeated
+events share a row). Each query is the best of --queries runs on an open
+index; the last row is what answering it costs without an index, one
+more full pass over the file.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.bench import generate  # noqa: E402
+from logforge.index import LogIndex, build_index, occurrence_records  # noqa: E402
+from logforge.reader import iter_lines  # noqa: E402
+
+
+def _best_ms(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _analyze(path: str) -> None:
+    analyzer = Analyzer(normalize=True)
+    with open(path, "rb") as handle:
+        analyzer.process_lines(iter_lines(handle))
+    analyzer.finalize()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=64.0)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(workdir, "syslog")
+        index_path = os.path.join(workdir, "syslog.lfidx")
+        with open(source, "w", encoding="utf-8") as handle:
+            handle.writelines(generate("syslog", int(args.size_mb * 2**20)))
+
+        analyze_ms = _best_ms(lambda: _analyze(source), 1)
+        build_ms = _best_ms(lambda: build_index(source, index_path, True), 1)
+        size = os.path.getsize(index_path)
+        print(f"{'analyze pass':>24}: {analyze_ms:9.1f} ms")
+        print(f"{'index build':>24}: {build_ms:9.1f} ms")
+        print(
+            f"{'index size':>24}: {size / 2**20:9.1f} MB "
+            f"({size / os.path.getsize(source):.1%} of the log)"
+        )
+
+        index = LogIndex(index_path)
+        top = index.events(top=1)[0]
+        first_minute = index.per_minute(top.id)[0][0]
+        queries = {
+            "top 20 events": lambda: index.events(top=20),
+            "grep message": lambda: index.events(text="queue depth"),
+            "one hour window": lambda: index.events(
+                since=first_minute, until=first_minute + 59
+            ),
+            "event, 10 x 5 context": lambda: occurrence_records(
+                index, top.id, limit=10, context=5
+            ),
+        }
+        for name, query in queries.items():
+            print(f"{name:>24}: {_best_ms(query, args.queries):9.2f} ms")
+        index.close()
+        print(f"{'without index (rescan)':>24}: {analyze_ms:9.1f} ms")
+    finally:
+        shutil.rmtree(workdir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Throughput of --journal input against the plain-text path.
+
+Usage: python3 benchmarks/journal_input.py [--records 200000]
+
+Turns the generated syslog corpus into journal records with the fields
+journalctl usually writes (cursor, timestamps, boot id, PID, command line,
+unit), with PRIORITY 2/3/4 for fatal/error/warning lines and 6 otherwise.
+The same records are timed as `journalctl -o short` text (the line path),
+as `-o json` and `-o export` through --journal, and as `-o json` decoded
+record by record without the byte prefilter, to show what it saves.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.bench import generate  # noqa: E402
+from logforge.journal import PRIORITY_LEVELS, _process  # noqa: E402
+from logforge.journal import process_journal  # noqa: E402
+from logforge.reader import decode_lines  # noqa: E402
+
+
+def _records(count: int) -> List[Dict[str, str]]:
+    records = []
+    for index, line in enumerate(generate("syslog", count * 100)[:count]):
+        head, _, message = line.rstrip("\n").partition("]: ")
+        unit = head.split()[-1].partition("[")[0]
+        priority = "6"
+        for word, value in (("FATAL", "2"), ("ERROR", "3"), ("WARNING", "4")):
+            if word in message:
+                priority = value
+                break
+        records.append(
+            {
+                "__CURSOR": f"s=6f1c;i={index:x};b=8e7d;m={index * 977:x}",
+                "__REALTIME_TIMESTAMP": str(1_700_000_000_000_000 + index * 1000),
+                "__MONOTONIC_TIMESTAMP": str(52_000_000 + index * 1000),
+                "_BOOT_ID": "8e7d2c64a1b54b7c9f0d3e2a1b4c5d6e",
+                "_TRANSPORT": "stdout",
+                "_HOSTNAME": "host1",
+                "_UID": "998",
+                "_GID": "998",
+                "_PID": str(1000 + index % 50),
+                "_COMM": unit,
+                "_CMDLINE": f"/usr/bin/{unit} --config /etc/{unit}.conf",
+                "_SYSTEMD_UNIT": f"{unit}.service",
+                "SYSLOG_IDENTIFIER": unit,
+                "PRIORITY": priority,
+                "MESSAGE": message,
+            }
+        )
+    return records
+
+
+def _short(record: Dict[str, str]) -> str:
+    return (
+        f"Nov 14 22:13:20 {record['_HOSTNAME']} {record['SYSLOG_IDENTIFIER']}"
+        f"[{record['_PID']}]: {record['MESSAGE']}\n"
+    )
+
+
+def _export(record: Dict[str, str]) -> bytes:
+    return b"".join(
+        f"{field}={value}\n".encode("utf-8") for field, value in record.items()
+    ) + b"\n"
+
+
+def _decode_all(data: bytes) -> None:
+    analyzer = Analyzer(normalize=True)
+    for raw in data.splitlines():
+        record = json.loads(raw)
+        _process(
+            analyzer,
+            record["MESSAGE"],
+            record["PRIORITY"],
+            record["_SYSTEMD_UNIT"],
+            None,
+            None,
+            None,
+        )
+
+
+def _best(function: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = _records(args.records)
+    count = len(records)
+    direct = sum(record["PRIORITY"] in PRIORITY_LEVELS for record in records)
+    text = "".join(_short(record) for record in records).encode("utf-8")
+    as_json = "".join(
+        json.dumps(record, separators=(",", ":")) + "\n" for record in records
+    ).encode("utf-8")
+    as_export = b"".join(_export(record) for record in records)
+
+    def journal(data: bytes) -> Callable[[], None]:
+        return lambda: process_journal(Analyzer(normalize=True), io.BytesIO(data))
+
+    cases = {
+        "text (-o short)": (
+            text,
+            lambda: Analyzer(normalize=True).process_lines(decode_lines(text)),
+        ),
+        "--journal -o json": (as_json, journal(as_json)),
+        "--journal -o export": (as_export, journal(as_export)),
+        "json, no prefilter": (as_json, lambda: _decode_all(as_json)),
+    }
+    print(f"{count} records, {direct} with an error or warning priority")
+    print(f"{'input':>20} {'MB':>7} {'MB/s':>7} {'records/s':>10}")
+    for name, (data, function) in cases.items():
+        seconds = _best(function, args.repeat)
+        print(
+            f"{name:>20} {len(data) / 2**20:>7.1f} "
+            f"{len(data) / 2**20 / seconds:>7.1f} {count / seconds:>10.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
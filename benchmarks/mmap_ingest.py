@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Text-mode ingestion against `analyze --mmap` on ASCII and mixed logs.
+
+Usage: python3 benchmarks/mmap_ingest.py [--size-mb 128]
+
+The mixed corpus has UTF-8 accents on some lines and stray Latin-1 bytes
+on others, so more lines have to be decoded on the mmap path. Both paths
+are checked to produce identical events.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.reader import iter_lines, map_file  # noqa: E402
+
+ASCII_BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled in 3ms\n"
+    for i in range(1000)
+) + "src/main.c:10:5: warning: unused variable 'x'\nERROR: disk full\n"
+
+MIXED_BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: requête {i} traitée\n"
+    if i % 10 == 0
+    else f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled\n"
+    for i in range(1000)
+) + "src/main.c:10:5: warning: unused variable 'x'\n"
+
+
+def _write(path: str, block: bytes, size_mb: int) -> None:
+    with open(path, "wb") as handle:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            handle.write(block)
+
+
+def _text(path: str) -> Analyzer:
+    analyzer = Analyzer()
+    with open(path, "rb") as handle:
+        analyzer.process_lines(iter_lines(handle))
+    return analyzer
+
+
+def _mapped(path: str) -> Analyzer:
+    analyzer = Analyzer()
+    with map_file(path) as data:
+        analyzer.process_buffer(data)
+    return analyzer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=128)
+    args = parser.parse_args()
+
+    corpora = [
+        ("ascii", ASCII_BLOCK.encode("utf-8")),
+        ("mixed", MIXED_BLOCK.encode("utf-8") + b"latin-1 caf\xe9 noise\n"),
+    ]
+    print(f"{'corpus':>7} {'path':>5} {'seconds':>8} {'mb_per_s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.log")
+        for name, block in corpora:
+            _write(path, block, args.size_mb)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            results = []
+            for label, run in (("text", _text), ("mmap", _mapped)):
+                start = time.perf_counter()
+                analyzer = run(path)
+                elapsed = time.perf_counter() - start
+                results.append(analyzer.get_events())
+                print(f"{name:>7} {label:>5} {elapsed:>8.2f} {size_mb / elapsed:>9.1f}")
+            if results[0] != results[1]:
+                print(f"MISMATCH on {name} corpus", file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
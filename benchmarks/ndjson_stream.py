@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Report at the end (--json) versus streamed events (--ndjson).
+
+Usage: python3 benchmarks/ndjson_stream.py [--size-mb 16]
+
+Runs the generated syslog scenario (almost every error line is unique)
+both ways, writing to an in-memory sink. Reports total time, when the
+first byte of output appeared, and the peak memory allocated by Python
+objects (tracemalloc) during the run.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.bench import generate  # noqa: E402
+from logforge.ndjson import NdjsonStream, StreamingAnalyzer  # noqa: E402
+from logforge.report import generate_json  # noqa: E402
+
+
+class _Sink(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.first: Optional[float] = None
+
+    def write(self, text: str) -> int:
+        if self.first is None:
+            self.first = time.perf_counter()
+        return len(text)
+
+
+def _report(lines: List[str], sink: _Sink) -> None:
+    analyzer = Analyzer()
+    analyzer.process_lines(lines)
+    analyzer.finalize()
+    sink.write(generate_json(analyzer.get_events()))
+
+
+def _stream(lines: List[str], sink: _Sink) -> None:
+    stream = NdjsonStream(sink)
+    analyzer = StreamingAnalyzer(stream)
+    analyzer.process_lines(lines)
+    analyzer.finalize()
+    stream.close()
+
+
+def _measure(
+    run: Callable[[List[str], _Sink], None], lines: List[str]
+) -> Tuple[float, float, float]:
+    sink = _Sink()
+    tracemalloc.start()
+    start = time.perf_counter()
+    run(lines, sink)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert sink.first is not None
+    return elapsed, sink.first - start, peak / 2**20
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    lines = generate("syslog", int(args.size_mb * 2**20))
+    print(f"corpus: {len(lines)} lines")
+    print(f"{'mode':>8} {'total s':>8} {'first out s':>12} {'peak MB':>8}")
+    for name, run in (("json", _report), ("ndjson", _stream)):
+        elapsed, first, peak = _measure(run, lines)
+        print(f"{name:>8} {elapsed:>8.2f} {first:>12.4f} {peak:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Throughput and unique events with and without --normalize.
+
+Usage: python3 benchmarks/normalize.py [--lines 500000]
+
+The corpus is synthetic syslog: one line in five is an error or warning
+built from a dozen templates filled with PIDs, request ids, addresses,
+UUIDs and durations; the rest is keyword-free noise.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+
+TEMPLATES = [
+    "nginx[{pid}]: ERROR upstream {ip}:{port} timed out after {ms}ms",
+    "app[{pid}]: ERROR request {hex} failed for user {uuid}",
+    "app[{pid}]: WARNING slow query took {ms}.{ms}s on shard {n}",
+    "kernel: ERROR segfault at {addr} ip {addr} sp {addr} error 4",
+    "sshd[{pid}]: error: PAM: Authentication failure for root from {ip}",
+    "cron[{pid}]: WARNING job {n} exited with status {n}",
+    "postgres[{pid}]: FATAL: connection {n} to database failed",
+    "app[{pid}]: ERROR cache miss storm: {n} misses in {ms}ms",
+    "systemd[1]: WARNING unit backup-{n}.service failed",
+    "app[{pid}]: ERROR payment {uuid} declined, retry {n}",
+    "haproxy[{pid}]: WARNING backend {ip} is DOWN, {n} active",
+    "app[{pid}]: ERROR worker {n} crashed at {addr}",
+]
+
+
+def _corpus(count: int) -> List[str]:
+    rng = random.Random(7)
+    lines = []
+    for i in range(count):
+        stamp = f"Jan {1 + i // 86400 % 28:2d} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+        if i % 5:
+            lines.append(f"{stamp} host app[{rng.randint(100, 9999)}]: GET /api/{i} 200\n")
+            continue
+        message = rng.choice(TEMPLATES).format(
+            pid=rng.randint(100, 9999),
+            ip=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            port=rng.randint(1024, 65535),
+            ms=rng.randint(1, 5000),
+            hex=f"{rng.getrandbits(40):010x}",
+            uuid=uuid.UUID(int=rng.getrandbits(128)),
+            addr=f"0x{rng.getrandbits(48):012x}",
+            n=rng.randint(0, 500),
+        )
+        lines.append(f"{stamp} host {message}\n")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=500_000)
+    args = parser.parse_args()
+
+    lines = _corpus(args.lines)
+    size_mb = sum(len(line) for line in lines) / 2**20
+    print(f"corpus: {args.lines} lines, {size_mb:.1f} MB")
+    print(f"{'mode':>10} {'MB/s':>7} {'unique events':>14}")
+    for name, normalize in (("raw", False), ("normalize", True)):
+        analyzer = Analyzer(normalize=normalize)
+        start = time.perf_counter()
+        analyzer.process_lines(lines)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10} {size_mb / elapsed:>7.1f} {len(analyzer.get_events()):>14}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
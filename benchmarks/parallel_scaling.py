@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Wall time of `analyze --jobs N` for N in 1/2/4/8 on one generated file.
+
+Usage: python3 benchmarks/parallel_scaling.py [--size-mb 256] [--jobs 1 2 4 8]
+
+Every run is checked against the sequential result.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.parallel import analyze_file  # noqa: E402
+
+BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled in 3ms\n"
+    for i in range(500)
+) + (
+    "Traceback (most recent call last):\n"
+    '  File "/srv/app.py", line 10, in handler\n'
+    "KeyError: 'user'\n"
+    "src/main.c:10:5: warning: unused variable 'x'\n"
+    "Program received signal SIGSEGV, Segmentation fault.\n"
+    "0x0000555 in compute () at calc.c:128\n"
+    "ERROR: worker 3 failed at pool.py:40 in run\n"
+)
+
+
+def _snapshot(analyzer: Analyzer) -> list:
+    return [
+        (e.level, e.type, e.message, e.file, e.line, e.function, e.occurrences)
+        for e in analyzer.get_events()
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.log")
+        block = BLOCK.encode("utf-8")
+        with open(path, "wb") as handle:
+            for _ in range(args.size_mb * 1024 * 1024 // len(block) + 1):
+                handle.write(block)
+
+        baseline = None
+        print(f"cpus: {os.cpu_count()}")
+        print(f"{'jobs':>5} {'seconds':>8} {'speedup':>8}")
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            analyzer = analyze_file(path, jobs)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline = (elapsed, _snapshot(analyzer))
+            elif _snapshot(analyzer) != baseline[1]:
+                print(f"MISMATCH with --jobs {jobs}", file=sys.stderr)
+                return 1
+            print(f"{jobs:>5} {elapsed:>8.2f} {baseline[0] / elapsed:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Cost of a periodic report on a large event table.
+
+Usage: python3 benchmarks/ranking.py [--events 500000] [--touched 1000] [--top 20]
+
+Fills an analyzer with --events distinct errors and warnings, then times
+report refreshes as `--follow` and `serve` do them: between two reports,
+--touched random events are counted again. "full" renders the whole
+sorted report (the previous behaviour, every report re-sorts the table);
+"ranked" keeps the rankings between reports and "ranked --top" only
+renders the N most frequent events of each level.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.cli import _print_report  # noqa: E402
+from logforge.report import generate_text  # noqa: E402
+
+
+def _refresh_ms(
+    analyzer: Analyzer, lines: List[str], report: Callable[[], object], runs: int
+) -> float:
+    rng = random.Random(1)
+    best = float("inf")
+    for _ in range(runs):
+        analyzer.process_lines(rng.sample(lines, len(lines) // runs))
+        start = time.perf_counter()
+        report()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--touched", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = [
+        f"{'ERROR' if i % 3 else 'WARNING'}: job {i} failed\n"
+        for i in range(args.events)
+    ]
+    rng = random.Random(0)
+    touched = [rng.choice(corpus) for _ in range(args.touched * args.runs)]
+
+    def build(ranked: bool) -> Analyzer:
+        analyzer = Analyzer(ranked=ranked)
+        analyzer.process_lines(corpus)
+        return analyzer
+
+    plain = build(False)
+    ranked = build(True)
+    ranked.get_ranking()
+    ranked_top = build(True)
+    ranked_top.get_ranking(args.top)
+    cases = {
+        "full": (plain, lambda: generate_text(plain.get_events())),
+        "ranked": (ranked, lambda: _print_report(ranked, False, io.StringIO())),
+        f"ranked --top {args.top}": (
+            ranked_top,
+            lambda: _print_report(ranked_top, False, io.StringIO(), top=args.top),
+        ),
+    }
+    print(f"{args.events} events, {args.touched} counted between reports")
+    for name, (analyzer, report) in cases.items():
+        ms = _refresh_ms(analyzer, touched, report, args.runs)
+        print(f"{name:>16}: {ms:9.2f} ms per report")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
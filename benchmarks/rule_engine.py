@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Cost of loaded rule files: throughput and startup with many rules.
+
+Usage: python3 benchmarks/rule_engine.py [--size-mb 8] [--rules 500]
+
+Throughput compares the built-in rules alone against the same run with
+examples/rules.toml and with N generated single-line rules loaded, on the
+generated syslog corpus (none of the extra rules match it, which is the
+common case). Startup is load_rules on the N-rule file with a cold and a
+warm cache.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.bench import generate  # noqa: E402
+from logforge.rules import RuleSet, load_rules  # noqa: E402
+
+EXAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "examples",
+    "rules.toml",
+)
+
+
+def _write_rules(path: str, count: int) -> None:
+    rules = [
+        {
+            "name": f"service{i}",
+            "priority": i % 7,
+            "type": f"service{i}_failure",
+            "start": rf"^svc{i}\[(?P<pid>\d+)\]: giving up after (?P<n>\d+) tries",
+            "continue": r"^\s+retry \d+",
+        }
+        for i in range(count)
+    ]
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"rules": rules}, handle)
+
+
+def _throughput(lines: List[str], rules: Optional[RuleSet]) -> float:
+    best = float("inf")
+    for _ in range(3):
+        analyzer = Analyzer(rules=rules)
+        start = time.perf_counter()
+        analyzer.process_lines(lines)
+        analyzer.finalize()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--rules", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        rule_file = os.path.join(workdir, "rules.json")
+        cache_dir = os.path.join(workdir, "cache")
+        _write_rules(rule_file, args.rules)
+
+        start = time.perf_counter()
+        many = load_rules([rule_file], cache_dir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        load_rules([rule_file], cache_dir)
+        warm = time.perf_counter() - start
+        print(
+            f"load {args.rules} rules: cold {cold * 1e3:.1f} ms, "
+            f"cached {warm * 1e3:.1f} ms"
+        )
+
+        lines = generate("syslog", int(args.size_mb * 2**20))
+        size_mb = args.size_mb
+        print(f"{'rules':>18} {'MB/s':>7}")
+        runs = [("built-in only", None)]
+        if sys.version_info >= (3, 11):
+            runs.append(("examples/rules", load_rules([EXAMPLES], cache_dir)))
+        runs.append((f"+{args.rules} rules", many))
+        for name, rules in runs:
+            print(f"{name:>18} {size_mb / _throughput(lines, rules):>7.1f}")
+    finally:
+        shutil.rmtree(workdir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Throughput of `run` on a chatty child: selectors runner vs asyncio runner.
+
+Usage: python3 benchmarks/runner_throughput.py [--size-mb 256]
+
+LegacyRunner is a frozen copy of the previous selectors/readline loop. The
+child writes --size-mb of log lines to stdout plus a trickle to stderr;
+passthrough goes to /dev/null.
+"""
+import argparse
+import os
+import selectors
+import subprocess
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.runner import run_commands  # noqa: E402
+
+CHILD = """
+import sys
+block = "".join(
+    f"Jan 12 10:00:00 host app[42]: request {i} handled in 3ms\\n" for i in range(1000)
+) + "ERROR: worker failed at pool.py:40 in run\\n"
+for _ in range(COUNT):
+    sys.stdout.write(block)
+    sys.stderr.write("WARNING: slow request\\n")
+"""
+
+
+def legacy_run_command(command: List[str], analyzer: Analyzer, sink) -> int:
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ, (process.stdout, sink))
+    selector.register(process.stderr, selectors.EVENT_READ, (process.stderr, sink))
+    while selector.get_map():
+        for key, _ in selector.select():
+            stream, output = key.data
+            line = stream.readline()
+            if line == "":
+                selector.unregister(stream)
+                continue
+            output.write(line)
+            output.flush()
+            analyzer.process_line(line)
+    return process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    block_size = 58 * 1000
+    count = args.size_mb * 2**20 // block_size
+    command = [sys.executable, "-c", CHILD.replace("COUNT", str(count))]
+    with open(os.devnull, "w") as sink:
+        start = time.perf_counter()
+        legacy = Analyzer()
+        legacy_run_command(command, legacy, sink)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = Analyzer()
+        run_commands([command], [current], stdout=sink.buffer, stderr=sink.buffer)
+        current_time = time.perf_counter() - start
+
+    counts = sorted((e.message, e.occurrences) for e in current.get_events())
+    if counts != sorted((e.message, e.occurrences) for e in legacy.get_events()):
+        print("MISMATCH between runners", file=sys.stderr)
+        return 1
+    print(f"{'runner':>9} {'seconds':>8} {'mb_per_s':>9}")
+    print(f"{'selectors':>9} {legacy_time:>8.2f} {args.size_mb / legacy_time:>9.1f}")
+    print(f"{'asyncio':>9} {current_time:>8.2f} {args.size_mb / current_time:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Sustained ingest rate of `logforge serve` (messages/sec).
+
+Usage: python3 benchmarks/serve_ingest.py [--messages 200000] [--udp-rate 0]
+
+Starts `logforge serve --normalize` in a child process with TCP, UDP and
+HTTP listeners on free local ports, then plays a generated syslog corpus
+(RFC 3164, "<PRI>" prefixed) into it from this process. TCP: the whole
+corpus over one newline-framed connection; the rate is messages over the
+time until GET /stats has counted all of them, so it includes analysis.
+UDP: one datagram per message, as fast as possible or paced to
+--udp-rate messages/sec; datagrams the kernel dropped because the server
+fell behind show up as received < sent. The sender runs in this process,
+so on a single core it competes with the server for CPU.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from logforge.bench import generate  # noqa: E402
+
+
+def _free_port(kind: int) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _stats(port: int) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as reply:
+        return json.loads(reply.read())
+
+
+def _wait_for(
+    port: int, messages: int, timeout: float
+) -> Tuple[Dict[str, Any], float]:
+    # Returns once the count is reached or has stopped growing for a second,
+    # with the time it last grew.
+    deadline = time.perf_counter() + timeout
+    last, grew = -1, time.perf_counter()
+    while True:
+        stats = _stats(port)
+        now = time.perf_counter()
+        if stats["messages"] != last:
+            last, grew = stats["messages"], now
+        if last >= messages or now > deadline or now - grew > 1:
+            return stats, grew
+        time.sleep(0.01)
+
+
+def _corpus(messages: int) -> List[bytes]:
+    lines = generate("syslog", messages * 120)[:messages]
+    return [b"<11>" + line.encode("utf-8") for line in lines]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument(
+        "--udp-rate", type=float, default=0, help="Pace UDP to this many msg/s"
+    )
+    args = parser.parse_args()
+    lines = _corpus(args.messages)
+    count = len(lines)
+
+    tcp_port = _free_port(socket.SOCK_STREAM)
+    udp_port = _free_port(socket.SOCK_DGRAM)
+    http_port = _free_port(socket.SOCK_STREAM)
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "logforge",
+            "serve",
+            "--normalize",
+            "--tcp",
+            f"127.0.0.1:{tcp_port}",
+            "--udp",
+            f"127.0.0.1:{udp_port}",
+            "--http",
+            f"127.0.0.1:{http_port}",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                _stats(http_port)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+        payload = b"".join(lines)
+        start = time.perf_counter()
+        with socket.create_connection(("127.0.0.1", tcp_port)) as tcp:
+            tcp.sendall(payload)
+        stats, end = _wait_for(http_port, count, 120)
+        elapsed = end - start
+        print(
+            f"{'tcp':>4}: {stats['messages']:>9} of {count} received, "
+            f"{stats['messages'] / elapsed:>9.0f} msg/s "
+            f"({len(payload) / elapsed / 2**20:.1f} MB/s, {stats['batches']} batches)"
+        )
+
+        before = stats["messages"]
+        interval = 1 / args.udp_rate if args.udp_rate else 0
+        start = time.perf_counter()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            for i, line in enumerate(lines):
+                udp.sendto(line[:-1], ("127.0.0.1", udp_port))
+                if interval:
+                    while time.perf_counter() - start < i * interval:
+                        pass
+        stats, end = _wait_for(http_port, before + count, 120)
+        elapsed = end - start
+        received = stats["messages"] - before
+        print(
+            f"{'udp':>4}: {received:>9} of {count} received, "
+            f"{received / elapsed:>9.0f} msg/s ({count - received} dropped)"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Cost of --context: memory per unique event and throughput.
+
+Usage: python3 benchmarks/snippets.py [--unique 100000] [--context 0,3,10]
+
+Two inputs with --unique distinct error lines each: "dense", where every
+line is an event (neighbouring snippets overlap and share their lines),
+and "sparse", where each event sits among nine lines of its own that only
+its snippet keeps alive. Memory is the Python allocations (tracemalloc)
+still held after the run, divided by the number of unique events.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+
+
+def _corpus(unique: int, filler: int) -> List[str]:
+    lines = []
+    for i in range(unique):
+        lines.extend(
+            f"worker {i} step {j}: fetched {i * 7 + j} rows\n" for j in range(filler)
+        )
+        lines.append(f"ERROR: job {i} failed on shard {i % 97}\n")
+    return lines
+
+
+def _run(lines: List[str], snippet_lines: int) -> Analyzer:
+    analyzer = Analyzer(snippet_lines=snippet_lines)
+    analyzer.process_lines(lines)
+    analyzer.finalize()
+    return analyzer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--unique", type=int, default=100_000)
+    parser.add_argument("--context", default="0,3,10")
+    args = parser.parse_args()
+    widths = [int(value) for value in args.context.split(",")]
+
+    print(f"{'input':>8} {'context':>8} {'MB/s':>7} {'bytes/event':>12}")
+    for name, filler in (("dense", 0), ("sparse", 9)):
+        lines = _corpus(args.unique, filler)
+        size_mb = sum(len(line) for line in lines) / 2**20
+        for width in widths:
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                _run(lines, width)
+                best = min(best, time.perf_counter() - start)
+            # The input list itself is allocated before tracing starts, so
+            # only what the analyzer keeps (and the lines it keeps) counts.
+            tracemalloc.start()
+            analyzer = _run(lines, width)
+            held = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del analyzer
+            print(
+                f"{name:>8} {width:>8} {size_mb / best:>7.1f} "
+                f"{held / args.unique:>12.0f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
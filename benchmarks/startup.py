@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Startup budget: import time of logforge.cli and wall time of short runs.
+
+Usage: python3 benchmarks/startup.py [--runs 20]
+
+Import time is the cumulative figure `python -X importtime` reports for
+logforge.cli (and for a bare interpreter, as the floor). Wall times are the
+best of N runs of `--help`, `analyze` on an empty file and `bin/syslog` on a
+one-line log, each a fresh interpreter as in a CI step.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_ms(module: str) -> float:
+    statement = f"import {module}" if module else "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The last line is the outermost import; its cumulative column is the total.
+    last = result.stderr.strip().splitlines()[-1]
+    return int(last.split("|")[1]) / 1000
+
+
+def _wall_ms(command: List[str], runs: int) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    cli_ms = min(_import_ms("logforge.cli") for _ in range(5))
+    print(f"import logforge.cli: {cli_ms:.1f} ms")
+    print(f"import site (floor): {min(_import_ms('') for _ in range(5)):.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = os.path.join(tmp, "empty.log")
+        small = os.path.join(tmp, "small.log")
+        open(empty, "w").close()
+        with open(small, "w", encoding="utf-8") as handle:
+            handle.write("main.c:3:1: error: expected ';'\n")
+        commands = {
+            "python (no-op)": [sys.executable, "-c", "pass"],
+            "--help": [sys.executable, "-m", "logforge", "--help"],
+            "analyze empty": [sys.executable, "-m", "logforge", "analyze", empty],
+            "bin/syslog small": [os.path.join(ROOT, "bin", "syslog"), small],
+        }
+        for name, command in commands.items():
+            print(f"{name:>18}: {_wall_ms(command, args.runs):6.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
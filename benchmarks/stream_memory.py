@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Peak RSS of `logforge analyze` for growing input sizes.
+
+Usage: python3 benchmarks/stream_memory.py [--sizes-mb 64 256 1024 4096]
+
+A flat `peak_rss_mb` column across sizes shows that memory does not depend
+on the input size.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BLOCK = "".join(
+    f"Jan 12 10:{i % 60:02d}:00 host app[42]: request {i} handled in 3ms\n"
+    for i in range(2000)
+) + "src/main.c:10:5: warning: unused variable 'x'\n"
+
+
+def _write_input(path: str, size_mb: int) -> None:
+    block = BLOCK.encode("utf-8")
+    target = size_mb * 1024 * 1024
+    with open(path, "wb") as handle:
+        written = 0
+        while written < target:
+            handle.write(block)
+            written += len(block)
+
+
+def _measure(path: str) -> tuple:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "logforge", "analyze", path],
+        cwd=ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    elapsed = time.perf_counter() - start
+    # ru_maxrss of the largest child so far; sizes run in increasing order.
+    peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return elapsed, peak_kb / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[64, 256, 1024, 4096])
+    args = parser.parse_args()
+
+    print(f"{'size_mb':>8} {'seconds':>8} {'mb_per_s':>9} {'peak_rss_mb':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.log")
+        for size_mb in sorted(args.sizes_mb):
+            _write_input(path, size_mb)
+            elapsed, peak_mb = _measure(path)
+            print(f"{size_mb:>8} {elapsed:>8.2f} {size_mb / elapsed:>9.1f} {peak_mb:>12.1f}")
+            os.unlink(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Cost of --timeline: throughput and memory per unique event.
+
+Usage: python3 benchmarks/timeline.py [--size-mb 16] [--unique 100000]
+
+Throughput runs the generated syslog scenario (every line timestamped,
+about one in fifteen an event) with and without timelines. Memory feeds
+--unique distinct error lines, spread over two hours, and reports the
+Python allocations (tracemalloc) per unique event either way.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logforge.analyzer import Analyzer  # noqa: E402
+from logforge.bench import generate  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=16.0)
+    parser.add_argument("--unique", type=int, default=100_000)
+    args = parser.parse_args()
+
+    lines = generate("syslog", int(args.size_mb * 2**20))
+    print(f"{'mode':>10} {'MB/s':>7} {'bytes/event':>12}")
+    unique = [
+        f"Jan 12 {i // 3600 % 2 + 10:02d}:{i // 60 % 60:02d}:{i % 60:02d} "
+        f"host app: ERROR job {i} failed\n"
+        for i in range(args.unique)
+    ]
+    for name, timeline in (("plain", False), ("timeline", True)):
+        best = float("inf")
+        for _ in range(3):
+            analyzer = Analyzer(timeline=timeline)
+            start = time.perf_counter()
+            analyzer.process_lines(lines)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        analyzer = Analyzer(timeline=timeline)
+        analyzer.process_lines(unique)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>10} {args.size_mb / best:>7.1f} {used / args.unique:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
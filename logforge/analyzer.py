@@ -1,53 +1,335 @@
 import re
 from collections import deque
-from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from itertools import islice
+from operator import attrgetter
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Tuple, TypeVar
 
-from .model import ErrorEvent, Event, EventKey, WarningEvent
+from .model import EVENT_TYPES, Event, EventKey, Snippet
+from .normalize import SAMPLE_LIMIT, normalize_message
+from .ranking import LevelRanking, Touched, rank
+from .reader import CHUNK_SIZE, ByteBuffer, LineSplitter, decode_lines
+from .rules import RuleRunner, RuleSet
+from .timeline import Timeline, TimestampParser
+
+AnalyzerState = Tuple[
+    bool, Optional[Tuple[str, int, Optional[str]]], Optional[Tuple[str, str]]
+]
+
+_TRACEBACK_START = "Traceback (most recent call last):"
+
+LINE_CACHE_SIZE = 4096
+# Snippet lines longer than this are cut, which bounds a snippet's size.
+SNIPPET_LINE_LIMIT = 512
+
+# Non-ASCII characters that IGNORECASE matches against a keyword letter.
+_FOLDED_I = ("\u0130", "\u0131")
+
+# Byte-level twin of the literal prefilter in Analyzer.process_line.
+_BYTE_KEYWORDS = (b"error", b"warning", b"fatal", b"failed")
+_BYTE_LITERALS = (b"SIG", _TRACEBACK_START.encode("ascii")) + tuple(
+    char.encode("utf-8") for char in _FOLDED_I
+)
+_SCAN_WINDOW = 1 << 22
+_SCAN_OVERLAP = max(len(literal) for literal in _BYTE_KEYWORDS + _BYTE_LITERALS)
+_NOT_FOUND = float("inf")
+
+
+class _ByteScanner:
+    # Finds the next offset that may start a rule match: a level keyword in
+    # any case, "SIG", a traceback header or a case-folded "i". Scanning runs
+    # over fixed windows that are lower-cased once, and remembers the next hit
+    # per literal so every byte is searched at most once per literal.
+    def __init__(self, data: ByteBuffer) -> None:
+        self._data = data
+        self._size = len(data)
+        self._base = 0
+        self._limit = 0
+        self._window = b""
+        self._lowered = b""
+        self._next: List[float] = []
+
+    def _load(self, pos: int) -> None:
+        self._base = pos
+        self._limit = min(self._size, pos + _SCAN_WINDOW)
+        self._window = self._data[pos : self._limit + _SCAN_OVERLAP]
+        self._lowered = self._window.lower()
+        self._next = [-1.0] * (len(_BYTE_KEYWORDS) + len(_BYTE_LITERALS))
+
+    def _find(self, index: int, offset: int) -> float:
+        if index < len(_BYTE_KEYWORDS):
+            found = self._lowered.find(_BYTE_KEYWORDS[index], offset)
+        else:
+            literal = _BYTE_LITERALS[index - len(_BYTE_KEYWORDS)]
+            found = self._window.find(literal, offset)
+        if found < 0 or self._base + found >= self._limit:
+            return _NOT_FOUND
+        return self._base + found
+
+    def find(self, pos: int) -> int:
+        while pos < self._size:
+            if pos >= self._limit:
+                self._load(pos)
+            best = _NOT_FOUND
+            for index, known in enumerate(self._next):
+                if known < pos:
+                    known = self._find(index, pos - self._base)
+                    self._next[index] = known
+                if known < best:
+                    best = known
+            if best != _NOT_FOUND:
+                return int(best)
+            pos = self._limit
+        return -1
+
+
+_BY_OCCURRENCES = attrgetter("occurrences")
+
+_SnippetTuple = Tuple[Tuple[str, ...], int]
+_T = TypeVar("_T")
+
+
+def _select(
+    table: Mapping[EventKey, _T], keys: Optional[Iterable[EventKey]]
+) -> Dict[EventKey, _T]:
+    if keys is None:
+        return dict(table)
+    return {key: table[key] for key in keys if key in table}
+
+
+def _clip(line: str) -> str:
+    return line if len(line) <= SNIPPET_LINE_LIMIT else line[:SNIPPET_LINE_LIMIT]
 
 
 class Analyzer:
-    def __init__(self, context_lines: int = 20) -> None:
-        self._buffer: Deque[str] = deque(maxlen=context_lines)
-        self._events: Dict[EventKey, Event] = {}
-        self._traceback_active = False
-        self._traceback_last_location: Optional[Tuple[str, int, Optional[str]]] = None
-        self._pending_signal: Optional[Tuple[str, str]] = None
+    # Compiled once at import and shared by every instance; an instance may
+    # still shadow one (ProfilingAnalyzer wraps them to time each rule).
+    _compiler_re = re.compile(
+        r"^(?P<file>[^:\s]+):(?P<line>\d+):"
+        r"(?:(?P<col>\d+):)?\s*(?P<level>warning|error):\s*(?P<msg>.*)$",
+        re.IGNORECASE,
+    )
+    _traceback_file_re = re.compile(
+        r'^\s*File "([^"]+)", line (\d+)(?:, in ([\w<>]+))?'
+    )
+    _traceback_exc_re = re.compile(r"^\s*([A-Za-z_][\w\.]*)(?::\s*(.*))?$")
+    _gdb_signal_re = re.compile(r"Program received signal\s+(SIG[A-Z0-9]+)")
+    _gdb_signal_short_re = re.compile(r"^(SIG[A-Z0-9]+)\b")
+    _gdb_location_re = re.compile(r"\bat\s+([^:\s]+):(\d+)")
+    _gdb_frame_re = re.compile(r"^#\d+\s+([^\s(]+)")
+    _generic_level_re = re.compile(r"\b(ERROR|WARNING|FATAL|FAILED)\b", re.IGNORECASE)
+    _file_line_re = re.compile(r"([A-Za-z0-9_./-]+):(\d+)")
+    # Normalized messages drop their timestamps and addresses, so the
+    # location must not come from them either ("10:00:03", "10.0.0.1:80"):
+    # only whole words that do not start with a digit count as a file.
+    _named_file_line_re = re.compile(
+        r"(?<![A-Za-z0-9_./-])([A-Za-z_./-][A-Za-z0-9_./-]*):(\d+)"
+    )
+    _function_re = re.compile(r"\bin\s+([A-Za-z_]\w*)\b")
 
-        self._compiler_re = re.compile(
-            r"^(?P<file>[^:\s]+):(?P<line>\d+):"
-            r"(?:(?P<col>\d+):)?\s*(?P<level>warning|error):\s*(?P<msg>.*)$",
-            re.IGNORECASE,
+    def __init__(
+        self,
+        context_lines: int = 20,
+        max_events: Optional[int] = None,
+        normalize: bool = False,
+        rules: Optional[RuleSet] = None,
+        timeline: bool = False,
+        snippet_lines: int = 0,
+        ranked: bool = False,
+    ) -> None:
+        self._buffer: Deque[str] = deque(
+            maxlen=max(context_lines, 2 * snippet_lines + 1)
         )
-        self._traceback_start_re = re.compile(r"^Traceback \(most recent call last\):")
-        self._traceback_file_re = re.compile(
-            r'^\s*File "([^"]+)", line (\d+)(?:, in ([\w<>]+))?'
+        self._events: Dict[EventKey, Event] = {}
+        self._line_events: Dict[str, Event] = {}
+        # Bounded mode (Space-Saving): past max_events the least frequent
+        # events are dropped, error_bound is the largest count dropped so far
+        # and overcount how much each stored count may exceed the true one.
+        self._max_events = max_events
+        self._error_bound = 0
+        self._overcount: Dict[EventKey, int] = {}
+        # With normalize, messages are keyed on their template (variable
+        # tokens masked) and a few original messages are kept per template.
+        self._normalize = normalize
+        self._samples: Dict[EventKey, List[str]] = {}
+        # With timeline, each event also gets first/last seen and per-minute
+        # counts from the timestamp of the line that produced it.
+        self._timelines: Optional[Dict[EventKey, Timeline]] = (
+            {} if timeline else None
         )
-        self._traceback_exc_re = re.compile(
-            r"^\s*([A-Za-z_][\w\.]*)(?::\s*(.*))?$"
+        self._clock = TimestampParser() if timeline else None
+        # With ranked, the per-level rankings of the last get_ranking are
+        # kept along with the events counted since (None: rank them all
+        # again), so reporting every few seconds does not re-sort the table.
+        self._ranked = ranked
+        self._rankings: Dict[str, LevelRanking] = {}
+        self._ranked_top: Optional[int] = None
+        self._touched: Optional[Dict[int, Tuple[Event, int]]] = (
+            {} if ranked else None
         )
-        self._gdb_signal_re = re.compile(r"Program received signal\s+(SIG[A-Z0-9]+)")
-        self._gdb_signal_short_re = re.compile(r"^(SIG[A-Z0-9]+)\b")
-        self._gdb_location_re = re.compile(r"\bat\s+([^:\s]+):(\d+)")
-        self._gdb_frame_re = re.compile(r"^#\d+\s+([^\s(]+)")
-        self._generic_level_re = re.compile(
-            r"\b(ERROR|WARNING|FATAL|FAILED)\b", re.IGNORECASE
+        self._watch = timeline or ranked
+        # With snippet_lines, every new event keeps that many lines before
+        # and after its first occurrence. They are the string objects the
+        # context buffer already holds, so overlapping snippets share them.
+        self._snippet_lines = snippet_lines
+        # Stored as plain (lines, index) tuples rather than Snippets: the
+        # garbage collector stops tracking an exact tuple of strings, not a
+        # NamedTuple, and 100k tracked snippets make every full pass slower.
+        self._snippets: Optional[Dict[EventKey, _SnippetTuple]] = (
+            {} if snippet_lines else None
+        )
+        # Events whose lines after are still being read: (due, key, number of
+        # lines before), where due is a count of lines read while any is open.
+        self._open_snippets: Deque[Tuple[int, EventKey, int]] = deque()
+        self._snippet_clock = 0
+        self._traceback_active = False
+        self._traceback_last_location: Optional[Tuple[str, int, Optional[str]]] = None
+        self._pending_signal: Optional[Tuple[str, str]] = None
+        # Rules loaded from rule files are tried before the built-in ones. The
+        # built-ins stay in code: they pick their level and type from what
+        # they match, a GDB signal waits for an optional location on the next
+        # line, and their fixed keywords drive the line cache and the byte
+        # prefilter of process_buffer, none of which a rule can express.
+        self._rule_runner = (
+            RuleRunner(rules, self._record) if rules is not None else None
         )
-        self._file_line_re = re.compile(r"([A-Za-z0-9_./-]+):(\d+)")
-        self._function_re = re.compile(r"\bin\s+([A-Za-z_]\w*)\b")
 
     def process_lines(self, lines: Iterable[str]) -> None:
         for line in lines:
             self.process_line(line)
 
+    def process_buffer(self, data: ByteBuffer) -> None:
+        # Equivalent to process_lines over the decoded buffer, but lines that
+        # cannot match any rule while the analyzer is idle are never decoded;
+        # only the ones that end up in the context buffer are.
+        if self._rule_runner is not None or self._snippets is not None:
+            # Loaded rules match lines the byte prefilter knows nothing about,
+            # and snippets need the lines after an event. Sliced so a large
+            # mapping is never copied whole.
+            splitter = LineSplitter()
+            for start in range(0, len(data), CHUNK_SIZE):
+                self.process_lines(splitter.feed(data[start : start + CHUNK_SIZE]))
+            self.process_lines(splitter.flush())
+            return
+        scanner = _ByteScanner(data)
+        size = len(data)
+        pos = 0
+        while pos < size:
+            if self._traceback_active or self._pending_signal is not None:
+                start = pos
+            else:
+                hit = scanner.find(pos)
+                if hit < 0:
+                    self._skip_lines(data, pos, size)
+                    return
+                start = data.rfind(b"\n", pos, hit) + 1
+                if start == 0:
+                    start = pos
+                self._skip_lines(data, pos, start)
+            end = data.find(b"\n", start)
+            end = size if end < 0 else end + 1
+            for line in decode_lines(data[start:end]):
+                self.process_line(line)
+            pos = end
+
+    def _skip_lines(self, data: ByteBuffer, start: int, end: int) -> None:
+        first = end
+        for _ in range(self._buffer.maxlen or 0):
+            if first <= start:
+                break
+            newline = data.rfind(b"\n", start, first - 1)
+            first = newline + 1 if newline >= 0 else start
+        if first < end:
+            self._buffer.extend(
+                line.rstrip("\n") for line in decode_lines(data[first:end])
+            )
+
+    def may_match(self, data: bytes) -> bool:
+        # The byte prefilter of process_buffer for one record: False only if
+        # its lines would all be ignored, so the caller need not decode it.
+        if (
+            self._rule_runner is not None
+            or self._snippets is not None
+            or self._traceback_active
+            or self._pending_signal is not None
+        ):
+            return True
+        lowered = data.lower()
+        for keyword in _BYTE_KEYWORDS:
+            if keyword in lowered:
+                return True
+        for literal in _BYTE_LITERALS:
+            if literal in data:
+                return True
+        return False
+
+    def process_record(
+        self,
+        message: str,
+        level: str,
+        type: str,
+        file: Optional[str] = None,
+        line: Optional[int] = None,
+        function: Optional[str] = None,
+    ) -> None:
+        # A message from structured input that already states its level and
+        # location: recorded as is, without the line rules. Its first line is
+        # the event message, the others only go to the context buffer.
+        lines = message.split("\n")
+        for index, text in enumerate(lines):
+            self._buffer.append(text)
+            if self._open_snippets:
+                self._advance_snippets()
+            if not index:
+                self._record(level, type, text.strip(), file, line, function)
+
     def process_line(self, line: str) -> None:
         raw_line = line.rstrip("\n")
         self._buffer.append(raw_line)
+        if self._open_snippets:
+            self._advance_snippets()
+
+        if self._rule_runner is not None and self._rule_runner.process(raw_line):
+            return
 
-        if self._traceback_start_re.match(raw_line):
+        if raw_line.startswith(_TRACEBACK_START):
             self._traceback_active = True
             self._traceback_last_location = None
             return
 
+        # Literal prefilter: every rule below needs either a level keyword or
+        # "SIG" somewhere in the line, so most lines are rejected here without
+        # running a single regex. IGNORECASE also folds U+0130 and U+0131 onto
+        # "i", so non-ASCII lines holding those go through the full rules.
+        lowered = raw_line.lower()
+        has_keyword = (
+            "error" in lowered
+            or "warning" in lowered
+            or "fatal" in lowered
+            or "failed" in lowered
+        )
+        if not has_keyword and not raw_line.isascii():
+            has_keyword = _FOLDED_I[0] in raw_line or _FOLDED_I[1] in raw_line
+        has_signal = "SIG" in raw_line
+        if not (
+            has_keyword
+            or has_signal
+            or self._traceback_active
+            or self._pending_signal
+        ):
+            return
+
+        # Compiler and keyword lines seen from the idle state always produce
+        # the same event, so identical repeats are counted straight from the
+        # line cache without running any rule.
+        quiescent = not self._traceback_active and self._pending_signal is None
+        if quiescent and has_keyword:
+            event = self._line_events.get(raw_line)
+            if event is not None:
+                event.occurrences += 1
+                if self._watch:
+                    self._seen(event)
+                return
+
         if self._traceback_active:
             file_match = self._traceback_file_re.match(raw_line)
             if file_match:
@@ -66,43 +348,23 @@ class Analyzer:
                 function = None
                 if self._traceback_last_location:
                     file, line_no, function = self._traceback_last_location
-                self._add_event(
-                    ErrorEvent(
-                        type=exc_type,
-                        message=message,
-                        file=file,
-                        line=line_no,
-                        function=function,
-                    )
-                )
+                self._record("ERROR", exc_type, message, file, line_no, function)
                 self._traceback_active = False
                 self._traceback_last_location = None
                 return
 
-        compiler_match = self._compiler_re.match(raw_line)
+        compiler_match = self._compiler_re.match(raw_line) if has_keyword else None
         if compiler_match:
             file = compiler_match.group("file")
             line_no = int(compiler_match.group("line"))
             level = compiler_match.group("level").lower()
             msg = compiler_match.group("msg")
             if level == "warning":
-                self._add_event(
-                    WarningEvent(
-                        type="compiler_warning",
-                        message=msg,
-                        file=file,
-                        line=line_no,
-                    )
-                )
+                event = self._record("WARNING", "compiler_warning", msg, file, line_no)
             else:
-                self._add_event(
-                    ErrorEvent(
-                        type="compiler_error",
-                        message=msg,
-                        file=file,
-                        line=line_no,
-                    )
-                )
+                event = self._record("ERROR", "compiler_error", msg, file, line_no)
+            if quiescent:
+                self._cache_line(raw_line, event)
             return
 
         if self._pending_signal:
@@ -113,29 +375,23 @@ class Analyzer:
                 function_match = self._gdb_frame_re.match(raw_line.strip())
                 function = function_match.group(1) if function_match else None
                 signal, message = self._pending_signal
-                self._add_event(
-                    ErrorEvent(
-                        type=signal,
-                        message=message,
-                        file=file,
-                        line=line_no,
-                        function=function,
-                    )
-                )
+                self._record("ERROR", signal, message, file, line_no, function)
                 self._pending_signal = None
             else:
                 signal, message = self._pending_signal
-                self._add_event(ErrorEvent(type=signal, message=message))
+                self._record("ERROR", signal, message)
                 self._pending_signal = None
 
-        gdb_match = self._gdb_signal_re.search(raw_line)
-        if not gdb_match:
-            gdb_match = self._gdb_signal_short_re.match(raw_line.strip())
-        if gdb_match:
-            signal = gdb_match.group(1)
-            self._pending_signal = (signal, raw_line.strip())
-            return
+        if has_signal:
+            gdb_match = self._gdb_signal_re.search(raw_line)
+            if not gdb_match:
+                gdb_match = self._gdb_signal_short_re.match(raw_line.strip())
+            if gdb_match:
+                self._pending_signal = (gdb_match.group(1), raw_line.strip())
+                return
 
+        if not has_keyword:
+            return
         generic_match = self._generic_level_re.search(raw_line)
         if generic_match:
             keyword = generic_match.group(1).upper()
@@ -152,29 +408,15 @@ class Analyzer:
             file, line_no = self._extract_location(raw_line)
             function = self._extract_function(raw_line)
             message = raw_line.strip()
-            if level == "WARNING":
-                self._add_event(
-                    WarningEvent(
-                        type=event_type,
-                        message=message,
-                        file=file,
-                        line=line_no,
-                        function=function,
-                    )
-                )
-            else:
-                self._add_event(
-                    ErrorEvent(
-                        type=event_type,
-                        message=message,
-                        file=file,
-                        line=line_no,
-                        function=function,
-                    )
-                )
+            event = self._record(level, event_type, message, file, line_no, function)
+            if quiescent:
+                self._cache_line(raw_line, event)
 
     def _extract_location(self, line: str) -> Tuple[Optional[str], Optional[int]]:
-        match = self._file_line_re.search(line)
+        if self._normalize:
+            match = self._named_file_line_re.search(line)
+        else:
+            match = self._file_line_re.search(line)
         if not match:
             return None, None
         return match.group(1), int(match.group(2))
@@ -185,21 +427,283 @@ class Analyzer:
             return match.group(1)
         return None
 
+    def _record(
+        self,
+        level: str,
+        type: str,
+        message: str,
+        file: Optional[str] = None,
+        line: Optional[int] = None,
+        function: Optional[str] = None,
+    ) -> Event:
+        sample = None
+        if self._normalize:
+            sample = message
+            message = normalize_message(message)
+        # A plain tuple hashes and compares like the stored EventKey, so a
+        # duplicate hit allocates nothing beyond this lookup tuple.
+        event = self._events.get((level, type, message, file, line, function))
+        if event is not None:
+            event.occurrences += 1
+        else:
+            event = EVENT_TYPES[level](type, message, file, line, function)
+            self._insert(event)
+            if self._snippets is not None:
+                self._capture(event)
+        if sample is not None and sample != message:
+            self._add_samples(event.key(), (sample,))
+        if self._watch:
+            self._seen(event)
+        return event
+
+    def _seen(self, event: Event) -> None:
+        # Called once per occurrence while _watch is set, with the line that
+        # produced it (or closed its block) as the newest one in the buffer.
+        touched = self._touched
+        if touched is not None and id(event) not in touched:
+            touched[id(event)] = (event, event.occurrences - 1)
+        if self._timelines is None or not self._buffer:
+            return
+        assert self._clock is not None
+        second = self._clock.parse(self._buffer[-1])
+        if second is None:
+            return
+        key = event.key()
+        timeline = self._timelines.get(key)
+        if timeline is None:
+            timeline = self._timelines[key] = Timeline(second)
+        timeline.add(second)
+
+    def _capture(self, event: Event) -> None:
+        # Only noted here: the snippet is cut from the buffer once the lines
+        # after the event have been read, in a single tuple.
+        if not self._buffer:
+            return
+        before = min(self._snippet_lines, len(self._buffer) - 1)
+        due = self._snippet_clock + self._snippet_lines
+        self._open_snippets.append((due, event.key(), before))
+
+    def _advance_snippets(self) -> None:
+        self._snippet_clock += 1
+        pending = self._open_snippets
+        while pending and pending[0][0] <= self._snippet_clock:
+            _, key, before = pending.popleft()
+            self._close_snippet(key, before, self._snippet_lines)
+
+    def _close_snippet(self, key: EventKey, before: int, after: int) -> None:
+        assert self._snippets is not None
+        # The event may have been evicted since it was seen.
+        if key in self._events and key not in self._snippets:
+            self._snippets[key] = self._cut_snippet(before, after)
+
+    def _has_snippet(self, key: EventKey) -> bool:
+        assert self._snippets is not None
+        return key in self._snippets or any(
+            pending == key for _, pending, _ in self._open_snippets
+        )
+
+    def _cut_snippet(self, before: int, after: int) -> _SnippetTuple:
+        buffer = self._buffer
+        lines = tuple(islice(buffer, len(buffer) - before - 1 - after, len(buffer)))
+        if max(map(len, lines)) > SNIPPET_LINE_LIMIT:
+            lines = tuple(map(_clip, lines))
+        return (lines, before)
+
+    def _add_samples(self, key: EventKey, samples: Iterable[str]) -> None:
+        kept = self._samples.get(key)
+        if kept is None:
+            kept = self._samples[key] = []
+        elif len(kept) >= SAMPLE_LIMIT:
+            return
+        for sample in samples:
+            if len(kept) >= SAMPLE_LIMIT:
+                return
+            if sample not in kept:
+                kept.append(sample)
+
+    def _insert(self, event: Event, overcount: int = 0) -> None:
+        if self._max_events is not None and len(self._events) >= self._max_events:
+            self._evict()
+        # The new key may be one dropped earlier, with up to error_bound hits.
+        if self._error_bound:
+            event.occurrences += self._error_bound
+            overcount += self._error_bound
+        key = event.key()
+        if overcount:
+            self._overcount[key] = overcount
+        self._events[key] = event
+        if self._touched is not None:
+            self._touched[id(event)] = (event, 0)
+
+    def _evict(self) -> None:
+        # Drops a quarter of the table at once so the sort is amortized over
+        # the next max_events // 4 new keys instead of paid on every one.
+        assert self._max_events is not None
+        keep = self._max_events - max(1, self._max_events // 4)
+        ranked = sorted(self._events.values(), key=_BY_OCCURRENCES, reverse=True)
+        for event in ranked[keep:]:
+            key = event.key()
+            del self._events[key]
+            self._overcount.pop(key, None)
+            self._samples.pop(key, None)
+            if self._timelines is not None:
+                self._timelines.pop(key, None)
+            if self._snippets is not None:
+                self._snippets.pop(key, None)
+        if keep < len(ranked):
+            self._error_bound = max(self._error_bound, ranked[keep].occurrences)
+        self._line_events.clear()
+        self._touched = None
+
+    def _cache_line(self, raw_line: str, event: Event) -> None:
+        if len(self._line_events) >= LINE_CACHE_SIZE:
+            self._line_events.clear()
+        self._line_events[raw_line] = event
+
     def _add_event(self, event: Event) -> None:
         key = event.key()
-        if key in self._events:
-            self._events[key].occurrences += 1
+        existing = self._events.get(key)
+        if existing is None:
+            self._insert(event)
         else:
-            self._events[key] = event
+            if self._touched is not None and id(existing) not in self._touched:
+                self._touched[id(existing)] = (existing, existing.occurrences)
+            existing.occurrences += 1
+
+    def merge(
+        self,
+        events: Iterable[Event],
+        overcount: Optional[Mapping[EventKey, int]] = None,
+        error_bound: int = 0,
+        samples: Optional[Mapping[EventKey, List[str]]] = None,
+        timelines: Optional[Mapping[EventKey, Timeline]] = None,
+        snippets: Optional[Mapping[EventKey, Snippet]] = None,
+    ) -> None:
+        # overcount and error_bound describe `events` when they come from a
+        # bounded analyzer; keys it does not list may have had up to
+        # error_bound hits there, so those counts are raised accordingly.
+        self._touched = None
+        merged = set()
+        for event in events:
+            key = event.key()
+            extra = overcount.get(key, 0) if overcount else 0
+            existing = self._events.get(key)
+            if existing is None:
+                self._insert(event, extra)
+            else:
+                existing.occurrences += event.occurrences
+                if extra:
+                    self._overcount[key] = self._overcount.get(key, 0) + extra
+            if samples and key in samples and key in self._events:
+                self._add_samples(key, samples[key])
+            if timelines and key in timelines and self._timelines is not None:
+                if key in self._events:
+                    self._merge_timeline(key, timelines[key])
+            if snippets and key in snippets and self._snippets is not None:
+                # The earliest source merged keeps its snippet.
+                if key in self._events and not self._has_snippet(key):
+                    snippet = snippets[key]
+                    self._snippets[key] = (snippet.lines, snippet.index)
+            if error_bound:
+                merged.add(key)
+        if error_bound:
+            for key, event in self._events.items():
+                if key not in merged:
+                    event.occurrences += error_bound
+                    self._overcount[key] = self._overcount.get(key, 0) + error_bound
+            self._error_bound += error_bound
+
+    def _merge_timeline(self, key: EventKey, other: Timeline) -> None:
+        assert self._timelines is not None
+        timeline = self._timelines.get(key)
+        if timeline is None:
+            timeline = self._timelines[key] = Timeline(other.first)
+        timeline.merge(other)
+
+    def get_state(self) -> AnalyzerState:
+        return (
+            self._traceback_active,
+            self._traceback_last_location,
+            self._pending_signal,
+        )
+
+    def set_state(self, state: AnalyzerState) -> None:
+        (
+            self._traceback_active,
+            self._traceback_last_location,
+            self._pending_signal,
+        ) = state
 
     def get_events(self) -> List[Event]:
         return list(self._events.values())
 
+    def get_ranking(self, top: Optional[int] = None) -> Dict[str, LevelRanking]:
+        # Events per level, most frequent first, cut to the top ones. Kept
+        # state is reused unless it was invalidated or ranked fewer events.
+        touched: Optional[Touched] = self._touched
+        previous = self._rankings
+        depth = self._ranked_top
+        if touched is None or (depth is not None and (top is None or top > depth)):
+            touched = {id(event): (event, 0) for event in self._events.values()}
+            previous = {}
+        rankings = rank(previous, touched, top)
+        if self._ranked:
+            self._rankings, self._ranked_top, self._touched = rankings, top, {}
+        return rankings
+
+    def get_error_bound(self) -> Optional[int]:
+        if self._max_events is None:
+            return None
+        return self._error_bound
+
+    # The getters below copy everything, or with keys (such as those of a
+    # ranked top) only the entries for those events.
+    def get_overcounts(
+        self, keys: Optional[Iterable[EventKey]] = None
+    ) -> Dict[EventKey, int]:
+        return _select(self._overcount, keys)
+
+    def get_samples(
+        self, keys: Optional[Iterable[EventKey]] = None
+    ) -> Optional[Dict[EventKey, List[str]]]:
+        if not self._normalize:
+            return None
+        return {
+            key: list(samples)
+            for key, samples in _select(self._samples, keys).items()
+        }
+
+    def get_timelines(
+        self, keys: Optional[Iterable[EventKey]] = None
+    ) -> Optional[Dict[EventKey, Timeline]]:
+        return None if self._timelines is None else _select(self._timelines, keys)
+
+    def get_snippets(
+        self, keys: Optional[Iterable[EventKey]] = None
+    ) -> Optional[Dict[EventKey, Snippet]]:
+        if self._snippets is None:
+            return None
+        wanted = None if keys is None else set(keys)
+        snippets = {
+            key: Snippet(*value)
+            for key, value in _select(self._snippets, wanted).items()
+        }
+        # Events still waiting for lines after get what has been read so far.
+        for due, key, before in self._open_snippets:
+            if wanted is not None and key not in wanted:
+                continue
+            if key in self._events and key not in snippets:
+                after = self._snippet_lines - (due - self._snippet_clock)
+                snippets[key] = Snippet(*self._cut_snippet(before, after))
+        return snippets
+
     def get_recent_context(self) -> List[str]:
         return list(self._buffer)
 
     def finalize(self) -> None:
+        if self._rule_runner is not None:
+            self._rule_runner.finalize()
         if self._pending_signal:
             signal, message = self._pending_signal
-            self._add_event(ErrorEvent(type=signal, message=message))
+            self._record("ERROR", signal, message)
             self._pending_signal = None
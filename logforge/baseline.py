@@ -0,0 +1,296 @@
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from hashlib import blake2b
+from heapq import nlargest, nsmallest
+from itertools import accumulate
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .model import Event, EventKey
+from .normalize import normalize_message
+from .report import event_record, format_location
+
+MAGIC = b"LFBL"
+VERSION = 1
+# magic, version, number of entries, size of the compressed descriptions
+_HEADER = struct.Struct("<4sIQQ")
+_COUNT_MAX = 2**32 - 1
+# Entries per compressed block of descriptions.
+BLOCK = 4096
+
+_T = TypeVar("_T")
+
+
+class BaselineError(ValueError):
+    pass
+
+
+def _digest(level: str, type: str, message: str, file: str, function: str) -> int:
+    text = "\0".join((level, type, message, file, function))
+    return int.from_bytes(
+        blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).digest(),
+        "little",
+    )
+
+
+def fingerprint(key: EventKey) -> int:
+    # 64 bits of blake2b over the fields that name an event across runs:
+    # numbers, IDs and addresses in the message and file are normalized,
+    # and the line number is left out, so unrelated edits that move code
+    # (or a new build directory) keep the fingerprint. A raw message and
+    # its --normalize template share one fingerprint.
+    level, type, message, file, _, function = key
+    return _digest(
+        level,
+        type,
+        normalize_message(message),
+        normalize_message(file) if file else "",
+        function or "",
+    )
+
+
+class Entry(NamedTuple):
+    # All events of one fingerprint: the most frequent one stands for them.
+    event: Event
+    occurrences: int
+
+
+def summarize(events: Iterable[Event], normalized: bool = False) -> Dict[int, Entry]:
+    # fingerprint() for a whole table. Events are grouped on their normalized
+    # fields first, so the digest is computed once per group; file names
+    # repeat and are normalized once each, and --normalize messages already
+    # are templates.
+    files: Dict[Optional[str], str] = {None: ""}
+    groups: Dict[Tuple[str, str, str, str, str], Entry] = {}
+    for event in events:
+        level, type, message, file, _, function = event.key()
+        normal_file = files.get(file)
+        if normal_file is None:
+            normal_file = files[file] = normalize_message(file) if file else ""
+        if not normalized:
+            message = normalize_message(message)
+        group = (level, type, message, normal_file, function or "")
+        entry = groups.get(group)
+        if entry is None:
+            groups[group] = Entry(event, event.occurrences)
+            continue
+        first = entry.event
+        if event.occurrences > first.occurrences:
+            first = event
+        groups[group] = Entry(first, entry.occurrences + event.occurrences)
+    return {_digest(*group): entry for group, entry in groups.items()}
+
+
+def _native(values: array) -> array:
+    # The file is little-endian.
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def write_baseline(path: str, entries: Dict[int, Entry]) -> None:
+    # Fingerprints (8 bytes) and counts (4 bytes) as two flat arrays, then
+    # the level, type, message, file and function of each entry as a JSON
+    # line. Those are compressed in blocks, with the offset where each block
+    # ends, so a diff only decompresses the blocks of the resolved events it
+    # shows.
+    fingerprints = _native(array("Q", entries))
+    counts = _native(
+        array("I", [min(entry.occurrences, _COUNT_MAX) for entry in entries.values()])
+    )
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    rows = [
+        encode([e.level, e.type, e.message, e.file, e.function])
+        for e, _ in entries.values()
+    ]
+    blocks = [
+        zlib.compress("\n".join(rows[start : start + BLOCK]).encode("utf-8"), 1)
+        for start in range(0, len(rows), BLOCK)
+    ]
+    ends = _native(array("Q", accumulate(len(block) for block in blocks)))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        described = ends[-1] if ends else 0
+        handle.write(_HEADER.pack(MAGIC, VERSION, len(entries), described))
+        handle.write(fingerprints.tobytes())
+        handle.write(counts.tobytes())
+        handle.write(ends.tobytes())
+        handle.writelines(blocks)
+    os.replace(tmp_path, path)
+
+
+class Baseline:
+    def __init__(self, path: str) -> None:
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except OSError as exc:
+            raise BaselineError(f"{path}: {exc.strerror}") from None
+        if data[:4] != MAGIC or len(data) < _HEADER.size:
+            raise BaselineError(f"{path}: not a logforge baseline")
+        _, version, size, described = _HEADER.unpack_from(data)
+        if version != VERSION:
+            raise BaselineError(f"{path}: written by another version, write it again")
+        counts_start = _HEADER.size + 8 * size
+        ends_start = counts_start + 4 * size
+        end = ends_start + 8 * -(-size // BLOCK)
+        if len(data) != end + described:
+            raise BaselineError(f"{path}: truncated baseline")
+        fingerprints = _native(array("Q", data[_HEADER.size : counts_start]))
+        counts = _native(array("I", data[counts_start:ends_start]))
+        self.path = path
+        self.counts: Dict[int, int] = dict(zip(fingerprints, counts))
+        self._order = fingerprints
+        self._ends = _native(array("Q", data[ends_start:end]))
+        self._descriptions = data[end:]
+
+    def describe(self, fingerprints: Iterable[int]) -> List[Entry]:
+        wanted = set(fingerprints)
+        blocks: Dict[int, List[int]] = {}
+        for index, fp in enumerate(self._order):
+            if fp in wanted:
+                blocks.setdefault(index // BLOCK, []).append(index)
+        entries = []
+        for block, indexes in blocks.items():
+            start = self._ends[block - 1] if block else 0
+            rows = zlib.decompress(
+                self._descriptions[start : self._ends[block]]
+            ).split(b"\n")
+            for index in indexes:
+                level, type, message, file, function = json.loads(
+                    rows[index - block * BLOCK]
+                )
+                event = Event(level, type, message, file, None, function)
+                entries.append(Entry(event, self.counts[self._order[index]]))
+        return entries
+
+
+class Changed(NamedTuple):
+    entry: Entry
+    before: int
+
+
+class BaselineDiff(NamedTuple):
+    # At most `top` entries of each kind, the most frequent first, and how
+    # many there are in all.
+    new: List[Entry]
+    resolved: List[Entry]
+    changed: List[Changed]
+    totals: Tuple[int, int, int]
+
+
+def _entry_order(entry: Entry) -> Tuple[int, str, str]:
+    return (-entry.occurrences, entry.event.type, entry.event.message)
+
+
+def _changed_order(item: Changed) -> Tuple[int, int, str, str]:
+    return (item.before - item.entry.occurrences, *_entry_order(item.entry))
+
+
+def _select(items: List[_T], top: Optional[int], key: Callable[[_T], Any]) -> List[_T]:
+    if top is None:
+        return sorted(items, key=key)
+    return nsmallest(top, items, key=key)
+
+
+def diff(
+    entries: Dict[int, Entry], baseline: Baseline, top: Optional[int] = None
+) -> BaselineDiff:
+    # One pass over the current fingerprints and one set difference for the
+    # resolved ones: linear in the size of both tables. Only the entries
+    # shown are sorted, and only the resolved ones shown are described.
+    before = baseline.counts
+    get = before.get
+    new = []
+    changed = []
+    for fp, entry in entries.items():
+        count = get(fp)
+        if count is None:
+            new.append(entry)
+        elif count != min(entry.occurrences, _COUNT_MAX):
+            changed.append(Changed(entry, count))
+    resolved = before.keys() - entries.keys()
+    shown = resolved if top is None else nlargest(top, resolved, key=before.__getitem__)
+    return BaselineDiff(
+        _select(new, top, _entry_order),
+        sorted(baseline.describe(shown), key=_entry_order),
+        _select(changed, top, _changed_order),
+        (len(new), len(resolved), len(changed)),
+    )
+
+
+def _record(entry: Entry) -> Dict[str, Any]:
+    record = event_record(entry.event)
+    record["occurrences"] = entry.occurrences
+    record["fingerprint"] = f"{fingerprint(entry.event.key()):016x}"
+    return record
+
+
+def diff_json(result: BaselineDiff) -> str:
+    changed = []
+    for item in result.changed:
+        record = _record(item.entry)
+        record["baseline_occurrences"] = item.before
+        changed.append(record)
+    payload = {
+        "new": [_record(entry) for entry in result.new],
+        "resolved": [_record(entry) for entry in result.resolved],
+        "changed": changed,
+        "counts": dict(zip(("new", "resolved", "changed"), result.totals)),
+    }
+    return json.dumps(payload, indent=2, sort_keys=True)
+
+
+def _entry_lines(entry: Entry, count: str) -> List[str]:
+    event = entry.event
+    lines = [f"- [{event.level}] {event.type}{count}: {event.message}"]
+    location = format_location(event)
+    if location:
+        lines.append(f"  Location: {location}")
+    return lines
+
+
+def diff_text(result: BaselineDiff, path: str) -> str:
+    new, resolved, changed = result.totals
+    lines = [
+        f"Compared with baseline {path}: {new} new, {resolved} resolved, "
+        f"{changed} changed"
+    ]
+    sections = (
+        ("New", new, [(e, f" ({e.occurrences}x)") for e in result.new]),
+        (
+            "Resolved",
+            resolved,
+            [(e, f" (was {e.occurrences}x)") for e in result.resolved],
+        ),
+        (
+            "Changed",
+            changed,
+            [
+                (item.entry, f" ({item.before}x -> {item.entry.occurrences}x)")
+                for item in result.changed
+            ],
+        ),
+    )
+    for title, total, shown in sections:
+        if not total:
+            continue
+        lines.append(f"{title}:")
+        for entry, count in shown:
+            lines.extend(_entry_lines(entry, count))
+        if len(shown) < total:
+            lines.append(f"- ... {total - len(shown)} more not shown")
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+RULE_SAMPLE_LINES = 50_000
+
+_FUNCTIONS = ("parse", "handle_request", "load_config", "flush", "main", "compute")
+_MODULES = ("core", "net", "db", "cache", "auth", "io")
+_SIGNALS = (
+    "SIGSEGV, Segmentation fault",
+    "SIGABRT, Aborted",
+    "SIGFPE, Arithmetic exception",
+)
+
+
+def _compiler(rng: random.Random) -> Iterator[str]:
+    while True:
+        module = rng.choice(_MODULES)
+        line = rng.randint(1, 2000)
+        col = rng.randint(1, 80)
+        roll = rng.random()
+        path = f"src/{module}/{module}{rng.randint(0, 40)}.c"
+        variable = f"v{rng.randint(0, 99)}"
+        if roll < 0.5:
+            yield (
+                f"{path}:{line}:{col}: warning: unused variable '{variable}' "
+                "[-Wunused-variable]\n"
+            )
+        elif roll < 0.65:
+            yield f"{path}:{line}:{col}: error: expected ';' before 'return'\n"
+        else:
+            yield f"cc -O2 -Wall -c {path} -o build/{module}.o\n"
+            yield f" {line:5d} |     int {variable} = compute();\n"
+            yield "       |         ^\n"
+
+
+def _traceback(rng: random.Random) -> Iterator[str]:
+    while True:
+        for _ in range(rng.randint(2, 20)):
+            worker = rng.randint(1, 16)
+            yield f"INFO worker {worker} processed batch {rng.randint(0, 10**6)}\n"
+        yield "Traceback (most recent call last):\n"
+        for _ in range(rng.randint(2, 6)):
+            module = rng.choice(_MODULES)
+            line = rng.randint(1, 900)
+            function = rng.choice(_FUNCTIONS)
+            yield f'  File "/srv/app/{module}.py", line {line}, in {function}\n'
+            yield f"    result = {module}.{rng.choice(_FUNCTIONS)}(payload)\n"
+        error = rng.choice(("KeyError", "ValueError", "TimeoutError", "RuntimeError"))
+        yield f"{error}: request {rng.randint(0, 10**6)} could not be handled\n"
+
+
+def _gdb(rng: random.Random) -> Iterator[str]:
+    while True:
+        yield "Starting program: /usr/local/bin/server --port 8080\n"
+        thread = f"0x7ffff7d8{rng.randint(0, 0xFFFF):04x}"
+        yield f"[New Thread {thread} (LWP {rng.randint(1000, 99999)})]\n"
+        yield f"Program received signal {rng.choice(_SIGNALS)}.\n"
+        yield (
+            f"0x000055555555{rng.randint(0, 0xFFFF):04x} in {rng.choice(_FUNCTIONS)} "
+            f"() at src/{rng.choice(_MODULES)}.c:{rng.randint(1, 900)}\n"
+        )
+        yield "(gdb) bt\n"
+        for frame in range(rng.randint(2, 8)):
+            yield (
+                f"#{frame}  0x00007ffff7a{rng.randint(0, 0xFFFFF):05x} in "
+                f"{rng.choice(_FUNCTIONS)} (ctx=0x5555{rng.randint(0, 0xFFFF):04x}) "
+                f"at src/{rng.choice(_MODULES)}.c:{rng.randint(1, 900)}\n"
+            )
+        yield "(gdb) quit\n"
+
+
+def _syslog_prefix(rng: random.Random, index: int) -> str:
+    return (
+        f"Jan {1 + index // 86400 % 28:2d} {index // 3600 % 24:02d}:"
+        f"{index // 60 % 60:02d}:{index % 60:02d} host{rng.randint(1, 9)} "
+        f"{rng.choice(_MODULES)}d[{rng.randint(100, 9999)}]:"
+    )
+
+
+def _syslog(rng: random.Random) -> Iterator[str]:
+    index = 0
+    while True:
+        index += 1
+        prefix = _syslog_prefix(rng, index)
+        roll = rng.random()
+        if roll < 0.03:
+            request = f"{rng.getrandbits(32):08x}"
+            took = rng.randint(1, 5000)
+            yield f"{prefix} ERROR request {request} failed after {took}ms\n"
+        elif roll < 0.06:
+            depth = rng.randint(100, 10000)
+            yield f"{prefix} WARNING queue depth {depth} above limit\n"
+        elif roll < 0.065:
+            yield f"{prefix} FATAL cannot bind 0.0.0.0:{rng.randint(1024, 65535)}\n"
+        else:
+            path = f"/api/{rng.choice(_MODULES)}/{rng.randint(0, 10**6)}"
+            yield f"{prefix} GET {path} 200 {rng.randint(1, 900)}ms\n"
+
+
+def _noise(rng: random.Random) -> Iterator[str]:
+    index = 0
+    while True:
+        index += 1
+        session = f"{rng.getrandbits(32):08x}"
+        yield f"{_syslog_prefix(rng, index)} INFO session {session} closed cleanly\n"
+
+
+GENERATORS: Dict[str, Callable[[random.Random], Iterator[str]]] = {
+    "compiler": _compiler,
+    "traceback": _traceback,
+    "gdb": _gdb,
+    "syslog": _syslog,
+    "noise": _noise,
+}
+
+
+def generate(scenario: str, size: int, seed: int = 0) -> List[str]:
+    # Deterministic for a given (scenario, size, seed): the same corpus is
+    # produced on every machine and version, so results stay comparable.
+    lines = []
+    total = 0
+    for line in GENERATORS[scenario](random.Random(f"{scenario}:{seed}")):
+        if total >= size:
+            break
+        lines.append(line)
+        total += len(line.encode("utf-8"))
+    return lines
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _prefilter(line: str) -> bool:
+    lowered = line.lower()
+    return (
+        "error" in lowered
+        or "warning" in lowered
+        or "fatal" in lowered
+        or "failed" in lowered
+        or "SIG" in line
+    )
+
+
+def _rule_costs(lines: List[str]) -> Dict[str, float]:
+    # Each rule's regex timed alone over the same lines, in ns per line. In
+    # process_line most rules only ever see the lines that pass the prefilter.
+    from .analyzer import Analyzer
+
+    analyzer = Analyzer()
+    sample = lines[:RULE_SAMPLE_LINES]
+    stripped = [line.rstrip("\n") for line in sample]
+    rules: Dict[str, Callable[[str], Any]] = {
+        "prefilter": _prefilter,
+        "compiler": analyzer._compiler_re.match,
+        "traceback_file": analyzer._traceback_file_re.match,
+        "traceback_exception": lambda line: analyzer._traceback_exc_re.match(
+            line.strip()
+        ),
+        "gdb_signal": analyzer._gdb_signal_re.search,
+        "gdb_location": analyzer._gdb_location_re.search,
+        "generic_level": analyzer._generic_level_re.search,
+        "file_line": analyzer._file_line_re.search,
+        "function": analyzer._function_re.search,
+    }
+    costs = {}
+    for name, rule in rules.items():
+        start = time.perf_counter()
+        for line in stripped:
+            rule(line)
+        elapsed = time.perf_counter() - start
+        costs[name] = round(elapsed / max(1, len(stripped)) * 1e9, 1)
+    return costs
+
+
+def run_scenario(
+    scenario: str, size: int, seed: int = 0, repeat: int = 3
+) -> Dict[str, Any]:
+    from .analyzer import Analyzer
+
+    lines = generate(scenario, size, seed)
+    size_bytes = sum(len(line.encode("utf-8")) for line in lines)
+    baseline_rss = _peak_rss_kb()
+    best = float("inf")
+    events = 0
+    for _ in range(repeat):
+        analyzer = Analyzer()
+        start = time.perf_counter()
+        analyzer.process_lines(lines)
+        analyzer.finalize()
+        best = min(best, time.perf_counter() - start)
+        events = len(analyzer.get_events())
+    return {
+        "scenario": scenario,
+        "lines": len(lines),
+        "bytes": size_bytes,
+        "events": events,
+        "seconds": round(best, 4),
+        "lines_per_sec": round(len(lines) / best),
+        "mb_per_sec": round(size_bytes / 2**20 / best, 2),
+        "baseline_rss_kb": baseline_rss,
+        "peak_rss_kb": _peak_rss_kb(),
+        "rule_ns_per_line": _rule_costs(lines),
+    }
+
+
+def run_benchmarks(
+    scenarios: List[str],
+    size: int,
+    seed: int = 0,
+    repeat: int = 3,
+    label: Optional[str] = None,
+) -> Dict[str, Any]:
+    # Every scenario runs in a freshly spawned interpreter so peak RSS is its
+    # own and not the high-water mark left behind by the previous one.
+    import platform
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    results = []
+    for scenario in scenarios:
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            results.append(
+                pool.submit(run_scenario, scenario, size, seed, repeat).result()
+            )
+    return {
+        "label": label,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "size": size,
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def format_results(payload: Dict[str, Any]) -> str:
+    lines = [
+        f"{'scenario':>10} {'lines/s':>10} {'MB/s':>7} {'peak RSS':>10} {'events':>7}"
+    ]
+    for result in payload["results"]:
+        rss = result["peak_rss_kb"]
+        rss_text = f"{rss / 1024:.1f} MB" if rss is not None else "n/a"
+        lines.append(
+            f"{result['scenario']:>10} {result['lines_per_sec']:>10} "
+            f"{result['mb_per_sec']:>7.2f} {rss_text:>10} {result['events']:>7}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, Optional, Sequence
+
+from .analyzer import Analyzer
+from .model import EVENT_TYPES
+from .reader import CHUNK_SIZE, decode_lines
+
+VERSION = 3
+FINGERPRINT_SIZE = 4096
+
+_OPTIONAL_STR = (str, type(None))
+# level, type, message, file, line, function, occurrences, overcount, samples
+_EVENT_ROW = (
+    str, str, str, _OPTIONAL_STR, (int, type(None)), _OPTIONAL_STR, int, int, list
+)
+
+
+def fingerprint(path: str, offset: int) -> str:
+    # Hashes the head of the file and the bytes just before the resume offset,
+    # which catches rotation (new head) and in-place rewrites (new tail).
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        digest.update(handle.read(min(offset, FINGERPRINT_SIZE)))
+        start = max(0, offset - FINGERPRINT_SIZE)
+        handle.seek(start)
+        digest.update(handle.read(offset - start))
+    digest.update(str(offset).encode("ascii"))
+    return digest.hexdigest()
+
+
+def save_checkpoint(path: str, analyzer: Analyzer, source: str, offset: int) -> None:
+    traceback_active, location, pending = analyzer.get_state()
+    overcount = analyzer.get_overcounts()
+    samples = analyzer.get_samples()
+    payload = {
+        "version": VERSION,
+        "source": os.path.abspath(source),
+        "offset": offset,
+        "fingerprint": fingerprint(source, offset),
+        "state": [traceback_active, location, pending],
+        "context": analyzer.get_recent_context(),
+        "error_bound": analyzer.get_error_bound() or 0,
+        "normalize": samples is not None,
+        "events": [
+            [
+                *event.key(),
+                event.occurrences,
+                overcount.get(event.key(), 0),
+                samples.get(event.key(), []) if samples else [],
+            ]
+            for event in analyzer.get_events()
+        ],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _row(value: Any, types: Sequence[Any]) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) == len(types)
+        and all(isinstance(item, kind) for item, kind in zip(value, types))
+    )
+
+
+def _valid(payload: Dict[str, Any]) -> bool:
+    # The shape save_checkpoint writes, checked before restore() relies on it.
+    offset = payload.get("offset")
+    state = payload.get("state")
+    context = payload.get("context")
+    events = payload.get("events")
+    if not (
+        isinstance(offset, int)
+        and offset >= 0
+        and isinstance(payload.get("fingerprint"), str)
+        and isinstance(payload.get("error_bound"), int)
+        and isinstance(payload.get("normalize"), bool)
+        and _row(state, (bool, (list, type(None)), (list, type(None))))
+        and isinstance(context, list)
+        and all(isinstance(line, str) for line in context)
+        and isinstance(events, list)
+    ):
+        return False
+    _, location, pending = state
+    if location is not None and not _row(location, (str, int, _OPTIONAL_STR)):
+        return False
+    if pending is not None and not _row(pending, (str, str)):
+        return False
+    return all(
+        _row(row, _EVENT_ROW)
+        and row[0] in EVENT_TYPES
+        and all(isinstance(sample, str) for sample in row[8])
+        for row in events
+    )
+
+
+def load_checkpoint(path: str, source: str) -> Optional[Dict[str, Any]]:
+    # None when the source has to be analyzed from the start: no checkpoint,
+    # one for another version or file, or a damaged one (with a warning).
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict) and payload.get("version") != VERSION:
+        return None
+    if not isinstance(payload, dict) or not _valid(payload):
+        print(
+            f"warning: checkpoint {path} is damaged; analyzing {source} "
+            "from the start",
+            file=sys.stderr,
+        )
+        return None
+    if payload.get("source") != os.path.abspath(source):
+        return None
+    offset = payload["offset"]
+    if os.path.getsize(source) < offset:
+        return None
+    if fingerprint(source, offset) != payload["fingerprint"]:
+        return None
+    return payload
+
+
+def restore(analyzer: Analyzer, payload: Dict[str, Any]) -> None:
+    traceback_active, location, pending = payload["state"]
+    analyzer.set_state(
+        (
+            traceback_active,
+            tuple(location) if location else None,
+            tuple(pending) if pending else None,
+        )
+    )
+    analyzer._buffer.extend(payload["context"])
+    events = []
+    overcounts = {}
+    samples = {}
+    for row in payload["events"]:
+        level, type, message, file, line, function, occurrences = row[:7]
+        overcount, event_samples = row[7:]
+        event = EVENT_TYPES[level](type, message, file, line, function)
+        event.occurrences = occurrences
+        events.append(event)
+        if overcount:
+            overcounts[event.key()] = overcount
+        if event_samples:
+            samples[event.key()] = event_samples
+    analyzer.merge(events, overcounts, payload["error_bound"], samples)
+
+
+def analyze_incremental(
+    source: str,
+    checkpoint_path: str,
+    max_events: Optional[int] = None,
+    normalize: bool = False,
+) -> Analyzer:
+    # Resumes from the checkpoint when it still matches the source, analyzes
+    # the complete lines appended since, and saves a new checkpoint before a
+    # trailing partial line is looked at, so it is re-read on the next run.
+    analyzer = Analyzer(max_events=max_events, normalize=normalize)
+    payload = load_checkpoint(checkpoint_path, source)
+    # Raw and templated messages cannot be merged into one table.
+    if payload is not None and payload["normalize"] != normalize:
+        payload = None
+    offset = 0
+    if payload is not None:
+        restore(analyzer, payload)
+        offset = payload["offset"]
+
+    pending = b""
+    with open(source, "rb") as handle:
+        handle.seek(offset)
+        while True:
+            chunk = handle.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            data = pending + chunk
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                analyzer.process_lines(decode_lines(data[:cut]))
+                offset += cut
+            pending = data[cut:]
+
+    save_checkpoint(checkpoint_path, analyzer, source, offset)
+    analyzer.process_lines(decode_lines(pending))
+    return analyzer
@@ -1,10 +1,26 @@
 import argparse
+import os
+import shlex
 import sys
-from typing import List, Optional
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, TextIO
 
-from .analyzer import Analyzer
-from .report import generate_json, generate_text
-from .runner import run_command
+from .reader import InputError, decompressed, file_compression, iter_lines, map_file
+from .report import iter_json, iter_text
+
+# Everything else is imported by the command that needs it: a short CI step
+# or `--help` should not pay for multiprocessing, asyncio or the rule engine.
+if TYPE_CHECKING:
+    from .analyzer import Analyzer
+    from .baseline import Baseline
+    from .ndjson import NdjsonStream
+    from .parallel import SourceCounts
+    from .rules import RuleSet
+
+
+_COMMANDS = {"run", "analyze", "index", "query", "serve", "bench"}
+# The keys of bench.GENERATORS, so building the parser does not import it.
+_SCENARIOS = ("compiler", "traceback", "gdb", "syslog", "noise")
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -16,57 +32,928 @@ def _build_parser() -> argparse.ArgumentParser:
     run_parser.add_argument(
         "--json", action="store_true", help="Output summary as JSON"
     )
+    run_parser.add_argument(
+        "-c",
+        "--command",
+        dest="commands",
+        action="append",
+        default=[],
+        metavar="CMD",
+        help="Additional shell-quoted command to run concurrently (repeatable)",
+    )
+    run_parser.add_argument(
+        "--max-parallel",
+        type=int,
+        metavar="N",
+        help="Run at most N commands at a time (default: all)",
+    )
+    _add_event_options(run_parser)
+    _add_baseline_options(run_parser)
 
     analyze_parser = subparsers.add_parser("analyze", help="Analyze existing output")
-    analyze_parser.add_argument("source", nargs="?", help="File to read (default: stdin)")
+    analyze_parser.add_argument(
+        "sources",
+        nargs="*",
+        metavar="source",
+        help="Files or glob patterns to read, plain or gzip/bz2/xz/zstd "
+        "compressed (default: stdin)",
+    )
+    analyze_parser.add_argument(
+        "-r",
+        "--recursive",
+        dest="directories",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="Also analyze every file under DIR (repeatable)",
+    )
     analyze_parser.add_argument(
         "--json", action="store_true", help="Output summary as JSON"
     )
+    analyze_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Use N worker processes: one file per task for several files, "
+        "byte ranges of the file for one (default: 1)",
+    )
+    analyze_parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Memory-map the file and only decode lines that can match a rule",
+    )
+    analyze_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep reading the file as it grows (rotation-aware, like tail -F)",
+    )
+    analyze_parser.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="With --follow, how often to print an updated summary (default: 10)",
+    )
+    analyze_parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="Resume from FILE and only analyze bytes appended since the last run",
+    )
+    analyze_parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Input is `journalctl -o json` or `-o export` output: use the "
+        "records' priority, unit and code location",
+    )
+    _add_event_options(analyze_parser)
+    _add_baseline_options(analyze_parser)
+
+    index_parser = subparsers.add_parser(
+        "index", help="Analyze a file once and store the results for `query`"
+    )
+    index_parser.add_argument("source", help="Plain (uncompressed) log file")
+    index_parser.add_argument(
+        "-o",
+        "--output",
+        metavar="INDEX",
+        help="Where to write the index (default: SOURCE.lfidx)",
+    )
+    index_parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Group messages that differ only in numbers, IDs, addresses or times",
+    )
+    index_parser.add_argument(
+        "--rules",
+        dest="rule_files",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Load extra detection rules from a JSON or TOML file (repeatable)",
+    )
+
+    query_parser = subparsers.add_parser(
+        "query", help="List events, or where one occurred, from an index"
+    )
+    query_parser.add_argument("index", help="Index written by `logforge index`")
+    query_parser.add_argument("--level", choices=("ERROR", "WARNING"))
+    query_parser.add_argument("--type", help="Only events of this type")
+    query_parser.add_argument(
+        "--grep", metavar="TEXT", help="Only events whose message contains TEXT"
+    )
+    query_parser.add_argument("--file", help="Only events located in this file")
+    query_parser.add_argument(
+        "--since",
+        metavar="TIME",
+        help="Count only occurrences from TIME on (YYYY-MM-DD[ HH:MM[:SS]], UTC)",
+    )
+    query_parser.add_argument(
+        "--until", metavar="TIME", help="Count only occurrences up to TIME"
+    )
+    query_parser.add_argument(
+        "--top", type=int, metavar="N", help="Only the N most frequent events"
+    )
+    query_parser.add_argument(
+        "--event",
+        type=int,
+        metavar="ID",
+        help="Show where event ID occurred instead of listing events",
+    )
+    query_parser.add_argument(
+        "--context",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --event, also show the N lines before each occurrence",
+    )
+    query_parser.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        metavar="N",
+        help="With --event, show the first N occurrences (default: 10)",
+    )
+    query_parser.add_argument(
+        "--json", action="store_true", help="Output results as JSON"
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Receive syslog over the network and analyze it live"
+    )
+    serve_parser.add_argument(
+        "--udp",
+        action="append",
+        default=[],
+        metavar="HOST:PORT",
+        help="Listen for syslog datagrams (repeatable; default: 127.0.0.1:5514 "
+        "when no listener is given)",
+    )
+    serve_parser.add_argument(
+        "--tcp",
+        action="append",
+        default=[],
+        metavar="HOST:PORT",
+        help="Accept syslog over TCP, newline or octet-count framed (repeatable)",
+    )
+    serve_parser.add_argument(
+        "--unix",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Listen on a Unix datagram socket such as /dev/log (repeatable)",
+    )
+    serve_parser.add_argument(
+        "--http",
+        metavar="HOST:PORT",
+        help="Serve the live report at GET /events and counters at GET /stats",
+    )
+    serve_parser.add_argument(
+        "--json", action="store_true", help="Print the final summary as JSON"
+    )
+    _add_event_options(serve_parser)
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Measure analysis throughput on generated logs"
+    )
+    bench_parser.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=sorted(_SCENARIOS),
+        metavar="NAME",
+        help=f"Scenario to run (repeatable; default: all of {', '.join(_SCENARIOS)})",
+    )
+    bench_parser.add_argument(
+        "--size-mb",
+        type=float,
+        default=8.0,
+        metavar="MB",
+        help="Size of each generated log (default: 8)",
+    )
+    bench_parser.add_argument(
+        "--seed", type=int, default=0, help="Generator seed (default: 0)"
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        metavar="N",
+        help="Time N runs per scenario and keep the best (default: 3)",
+    )
+    bench_parser.add_argument(
+        "--label", help="Free-form tag stored in the results, e.g. a version"
+    )
+    bench_parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON"
+    )
+    bench_parser.add_argument(
+        "-o", "--output", metavar="FILE", help="Also write the JSON results to FILE"
+    )
 
     return parser
 
 
-def _emit_report(analyzer: Analyzer, to_json: bool) -> str:
-    events = analyzer.get_events()
+def _add_event_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-events",
+        type=int,
+        metavar="K",
+        help="Keep only the K most frequent events, with an error bound on counts",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Group messages that differ only in numbers, IDs, addresses or times",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-rule attempts, matches and time to stderr after the report",
+    )
+    parser.add_argument(
+        "--rules",
+        dest="rule_files",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Load extra detection rules from a JSON or TOML file (repeatable)",
+    )
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help="Report first/last seen and per-minute peaks from line timestamps",
+    )
+    parser.add_argument(
+        "--context",
+        dest="snippet_lines",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Show N lines before and after the first occurrence of each event",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        metavar="N",
+        help="Show only the N most frequent errors and N most frequent warnings",
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream events as JSON lines as they are found, with periodic "
+        "count deltas and a final summary, instead of the report",
+    )
+
+
+def _add_baseline_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="Instead of the report, list events that are new, resolved or "
+        "counted differently than in FILE; exit with 1 if any is new",
+    )
+    parser.add_argument(
+        "--write-baseline",
+        metavar="FILE",
+        help="Write the fingerprint and count of every event to FILE, "
+        "for a later --baseline",
+    )
+
+
+def _load_baseline(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> Optional["Baseline"]:
+    if not getattr(args, "baseline", None):
+        return None
+    from .baseline import Baseline, BaselineError
+
+    try:
+        return Baseline(args.baseline)
+    except BaselineError as exc:
+        parser.error(f"--baseline: {exc}")
+
+
+def _finish_report(
+    analyzer: "Analyzer",
+    args: argparse.Namespace,
+    out: TextIO,
+    baseline: Optional["Baseline"],
+    sources: Optional["SourceCounts"] = None,
+) -> int:
+    # Prints the report, or with a baseline what changed since it, and
+    # writes the new baseline. 1 when the baseline shows new events.
+    if baseline is None and not args.write_baseline:
+        _print_report(analyzer, args.json, out, sources, args.top)
+        return 0
+    from .baseline import diff, diff_json, diff_text, summarize, write_baseline
+
+    entries = summarize(analyzer.get_events(), args.normalize)
+    status = 0
+    if baseline is None:
+        _print_report(analyzer, args.json, out, sources, args.top)
+    else:
+        result = diff(entries, baseline, args.top)
+        if args.json:
+            print(diff_json(result), file=out)
+        else:
+            print(diff_text(result, baseline.path), file=out)
+        out.flush()
+        status = 1 if result.totals[0] else 0
+    if args.write_baseline:
+        write_baseline(args.write_baseline, entries)
+    return status
+
+
+def _report_chunks(
+    analyzer: "Analyzer",
+    to_json: bool,
+    sources: Optional["SourceCounts"] = None,
+    top: Optional[int] = None,
+) -> Iterator[str]:
+    # With top, only the events shown are ranked out of the table and only
+    # their samples, timelines and snippets are copied.
+    ranking = analyzer.get_ranking(top) if top is not None or not to_json else None
+    keys = None
+    if top is not None:
+        assert ranking is not None
+        keys = [event.key() for level in ranking.values() for event in level.events]
+    error_bound = analyzer.get_error_bound()
+    samples = analyzer.get_samples(keys)
+    timelines = analyzer.get_timelines(keys)
+    snippets = analyzer.get_snippets(keys)
+    if to_json:
+        if ranking is None:
+            events = analyzer.get_events()
+        else:
+            events = [event for level in ranking.values() for event in level.events]
+        yield from iter_json(
+            events,
+            error_bound,
+            analyzer.get_overcounts(keys),
+            samples,
+            sources,
+            timelines,
+            snippets,
+        )
+        yield "\n"
+        return
+    assert ranking is not None
+    for line in iter_text(ranking, error_bound, samples, sources, timelines, snippets):
+        yield line + "\n"
+
+
+def _emit_report(
+    analyzer: "Analyzer",
+    to_json: bool,
+    sources: Optional["SourceCounts"] = None,
+    top: Optional[int] = None,
+) -> str:
+    return "".join(_report_chunks(analyzer, to_json, sources, top))
+
+
+def _print_report(
+    analyzer: "Analyzer",
+    to_json: bool,
+    out: TextIO,
+    sources: Optional["SourceCounts"] = None,
+    top: Optional[int] = None,
+) -> None:
+    # Written as it is rendered: a large report is never one joined string.
+    out.writelines(_report_chunks(analyzer, to_json, sources, top))
+    out.flush()
+
+
+def _emit_profile(stats: Dict[str, Any], to_json: bool) -> None:
+    import json
+
+    from .profiling import format_stats
+
     if to_json:
-        return generate_json(events)
-    return generate_text(events)
+        print(json.dumps(stats, indent=2, sort_keys=True), file=sys.stderr)
+    else:
+        print(format_stats(stats), file=sys.stderr)
+
+
+def _expand_sources(
+    patterns: List[str], directories: List[str], may_be_missing: bool = False
+) -> List[str]:
+    import glob
+
+    sources: List[str] = []
+    for pattern in patterns:
+        if not glob.has_magic(pattern):
+            # --follow waits for a file that does not exist yet.
+            if not may_be_missing and not os.path.exists(pattern):
+                raise InputError(f"cannot read {pattern!r}: no such file")
+            sources.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise InputError(f"no files match {pattern!r}")
+        sources.extend(matches)
+    for directory in directories:
+        found = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            found.extend(os.path.join(root, name) for name in sorted(files))
+        if not found:
+            raise InputError(f"no files found under {directory!r}")
+        sources.extend(found)
+    return sources
+
 
+def _read_stream(source: Optional[str]) -> Iterator[str]:
+    if source is None:
+        with decompressed(sys.stdin.buffer) as stream:
+            yield from iter_lines(stream)
+        return
+    with open(source, "rb") as handle, decompressed(handle) as stream:
+        yield from iter_lines(stream)
 
-def _read_stream(source: Optional[str]) -> List[str]:
-    if source:
-        with open(source, "r", encoding="utf-8", errors="replace") as handle:
-            return handle.readlines()
-    return sys.stdin.read().splitlines(True)
+
+def _read_journal(analyzer: "Analyzer", source: Optional[str]) -> None:
+    from .journal import process_journal
+
+    if source is None:
+        with decompressed(sys.stdin.buffer) as stream:
+            process_journal(analyzer, stream)
+        return
+    with open(source, "rb") as handle, decompressed(handle) as stream:
+        process_journal(analyzer, stream)
+
+
+def _follow(
+    source: str,
+    to_json: bool,
+    to_ndjson: bool,
+    interval: float,
+    max_events: Optional[int],
+    normalize: bool,
+    rules: Optional["RuleSet"],
+    timeline: bool,
+    snippet_lines: int,
+    top: Optional[int],
+) -> int:
+    from .analyzer import Analyzer
+    from .follow import Follower, follow
+
+    options: Dict[str, Any] = dict(
+        max_events=max_events,
+        normalize=normalize,
+        rules=rules,
+        timeline=timeline,
+        snippet_lines=snippet_lines,
+    )
+    stream: Optional["NdjsonStream"] = None
+    if to_ndjson:
+        from .ndjson import DELTA_INTERVAL, NdjsonStream, StreamingAnalyzer
+
+        stream = NdjsonStream(sys.stdout)
+        analyzer: Analyzer = StreamingAnalyzer(stream, **options)
+    else:
+        # Reported every interval: keep the rankings between reports.
+        analyzer = Analyzer(ranked=True, **options)
+    follower = Follower(source, analyzer)
+
+    def emit() -> None:
+        # Streamed events go out as they are found; the timer only writes
+        # the deltas of a burst that was followed by silence.
+        if stream is None:
+            _print_report(analyzer, to_json, sys.stdout, top=top)
+        else:
+            stream.poll(force=True)
+
+    try:
+        follow(follower, emit, interval if stream is None else DELTA_INTERVAL)
+    except KeyboardInterrupt:
+        follower.poll()
+        analyzer.finalize()
+        if stream is not None:
+            stream.close()
+        else:
+            emit()
+    finally:
+        follower.close()
+    return 0
+
+
+def _query(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    import json
+
+    from .index import (
+        LogIndex,
+        LogIndexError,
+        event_summary,
+        format_events,
+        format_occurrences,
+        occurrence_records,
+        parse_minute,
+    )
+    from .timeline import format_minute
+
+    try:
+        since = parse_minute(args.since) if args.since else None
+        until = parse_minute(args.until) if args.until else None
+        index = LogIndex(args.index)
+    except (LogIndexError, ValueError) as exc:
+        parser.error(str(exc))
+    if args.context < 0 or args.limit < 1 or (args.top is not None and args.top < 1):
+        parser.error("--context must be at least 0, --limit and --top at least 1")
+    try:
+        if index.is_stale():
+            print(
+                f"warning: {index.source} changed since it was indexed; "
+                "run `logforge index` again for accurate lines",
+                file=sys.stderr,
+            )
+        events = index.events(
+            args.level,
+            args.type,
+            args.grep,
+            args.file,
+            since,
+            until,
+            args.top,
+            args.event,
+        )
+        if args.event is None:
+            if args.json:
+                print(json.dumps([event_summary(event) for event in events], indent=2))
+            else:
+                print(format_events(events))
+            return 0
+        if not events:
+            parser.error(f"--event: no matching event {args.event}")
+        records = occurrence_records(
+            index, args.event, since, until, args.limit, args.context
+        )
+        if args.json:
+            payload = {
+                **event_summary(events[0]),
+                "per_minute": {
+                    format_minute(minute): count
+                    for minute, count in index.per_minute(args.event)
+                    if (since is None or minute >= since)
+                    and (until is None or minute <= until)
+                },
+                "lines": records,
+            }
+            print(json.dumps(payload, indent=2))
+        else:
+            print(format_occurrences(events[0], records))
+        return 0
+    finally:
+        index.close()
+
+
+def _serve(
+    args: argparse.Namespace,
+    parser: argparse.ArgumentParser,
+    rules: Optional["RuleSet"],
+) -> int:
+    from .analyzer import Analyzer
+    from .serve import SyslogServer, parse_address
+
+    try:
+        udp = [parse_address(value) for value in args.udp]
+        tcp = [parse_address(value) for value in args.tcp]
+        http = parse_address(args.http) if args.http else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    if not (udp or tcp or args.unix):
+        udp = [("127.0.0.1", 5514)]
+    options: Dict[str, Any] = dict(
+        max_events=args.max_events,
+        normalize=args.normalize,
+        rules=rules,
+        timeline=args.timeline,
+        snippet_lines=args.snippet_lines,
+    )
+    stream: Optional["NdjsonStream"] = None
+    tick: Optional[Callable[[], None]] = None
+    if args.ndjson:
+        from .ndjson import NdjsonStream, StreamingAnalyzer
+
+        stream = NdjsonStream(sys.stdout)
+        analyzer: Analyzer = StreamingAnalyzer(stream, **options)
+        # Deltas of a burst followed by silence go out on the server's timer.
+        tick = partial(stream.poll, force=True)
+    else:
+        analyzer = Analyzer(ranked=http is not None, **options)
+    # The HTTP endpoint always answers in JSON; --json is for the summary
+    # printed on shutdown.
+    server = SyslogServer(
+        analyzer, lambda: _emit_report(analyzer, True, top=args.top), tick
+    )
+    try:
+        server.run(udp, tcp, args.unix, http)
+    except OSError as exc:
+        print(f"logforge serve: {exc}", file=sys.stderr)
+        return 1
+    analyzer.finalize()
+    if stream is not None:
+        stream.close()
+    else:
+        _print_report(analyzer, args.json, sys.stdout, top=args.top)
+    return 0
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     parser = _build_parser()
     raw_argv = list(argv) if argv is not None else sys.argv[1:]
-    if raw_argv and raw_argv[0] not in {"run", "analyze"}:
+    if raw_argv and raw_argv[0] not in _COMMANDS:
         raw_argv = ["analyze", raw_argv[0], *raw_argv[1:]]
     args = parser.parse_args(raw_argv)
+    rules: Optional["RuleSet"] = None
+    if getattr(args, "rule_files", None):
+        from .rules import RuleError, load_rules
+
+        try:
+            rules = load_rules(args.rule_files)
+        except (OSError, RuleError) as exc:
+            parser.error(f"--rules: {exc}")
+    if getattr(args, "snippet_lines", 0) < 0:
+        parser.error("--context must be at least 0")
+    if getattr(args, "top", None) is not None and args.top < 1:
+        parser.error("--top must be at least 1")
+    if getattr(args, "ndjson", False) and (
+        args.json
+        or args.profile
+        or args.timeline
+        or args.snippet_lines
+        or args.top is not None
+    ):
+        parser.error(
+            "--ndjson cannot be combined with --json, --profile, --timeline, "
+            "--context or --top"
+        )
+    if (getattr(args, "baseline", None) or getattr(args, "write_baseline", None)) and (
+        args.ndjson or getattr(args, "follow", False)
+    ):
+        parser.error(
+            "--baseline and --write-baseline cannot be combined with --ndjson "
+            "or --follow"
+        )
+    baseline = _load_baseline(args, parser)
 
     if args.command == "run":
+        from .analyzer import Analyzer
+        from .profiling import ProfilingAnalyzer, combine_stats
+        from .runner import run_commands
+
         cmd = args.cmd
         if cmd and cmd[0] == "--":
             cmd = cmd[1:]
-        if not cmd:
+        commands = [shlex.split(command) for command in args.commands]
+        if cmd:
+            commands.append(cmd)
+        if not commands or not all(commands):
             parser.error("run requires a command to execute")
-        analyzer = Analyzer()
-        exit_code = run_command(cmd, analyzer)
-        analyzer.finalize()
-        report = _emit_report(analyzer, args.json)
-        print(report, file=sys.stderr)
-        return exit_code
+        if args.max_parallel is not None and args.max_parallel < 1:
+            parser.error("--max-parallel must be at least 1")
+        if args.max_events is not None and args.max_events < 1:
+            parser.error("--max-events must be at least 1")
+        options: Dict[str, Any] = dict(
+            max_events=args.max_events,
+            normalize=args.normalize,
+            rules=rules,
+            timeline=args.timeline,
+            snippet_lines=args.snippet_lines,
+        )
+        stream: Optional["NdjsonStream"] = None
+        if args.ndjson:
+            from .ndjson import NdjsonStream, StreamingAnalyzer
+
+            # Like the report, the stream goes to stderr: stdout carries the
+            # commands' own output.
+            stream = NdjsonStream(sys.stderr)
+            analyzers: List[Analyzer] = [
+                StreamingAnalyzer(stream, **options) for _ in commands
+            ]
+        else:
+            analyzer_class = ProfilingAnalyzer if args.profile else Analyzer
+            analyzers = [analyzer_class(**options) for _ in commands]
+        exit_codes = run_commands(commands, analyzers, args.max_parallel)
+        for analyzer in analyzers:
+            analyzer.finalize()
+        exit_code = next((code for code in exit_codes if code != 0), 0)
+        if stream is not None:
+            stream.close()
+            return exit_code
+        if args.profile:
+            stats = combine_stats(analyzer.stats() for analyzer in analyzers)
+        analyzer = analyzers[0]
+        for other in analyzers[1:]:
+            analyzer.merge(
+                other.get_events(),
+                other.get_overcounts(),
+                other.get_error_bound() or 0,
+                other.get_samples(),
+                other.get_timelines(),
+                other.get_snippets(),
+            )
+        status = _finish_report(analyzer, args, sys.stderr, baseline)
+        if args.profile:
+            _emit_profile(stats, args.json)
+        return exit_code or status
 
     if args.command == "analyze":
-        analyzer = Analyzer()
-        lines = _read_stream(args.source)
-        analyzer.process_lines(lines)
+        from .analyzer import Analyzer
+        from .profiling import ProfilingAnalyzer
+
+        if args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        try:
+            sources = _expand_sources(args.sources, args.directories, args.follow)
+        except InputError as exc:
+            parser.error(str(exc))
+        several = len(sources) > 1
+        modes = (args.jobs > 1, args.mmap, args.follow, bool(args.checkpoint))
+        if any(modes) and not sources:
+            parser.error("--jobs, --mmap, --follow and --checkpoint require a file")
+        if sum(modes) > 1:
+            parser.error("--jobs, --mmap, --follow and --checkpoint are exclusive")
+        if several and any(modes[1:]):
+            parser.error("--mmap, --follow and --checkpoint take a single file")
+        if any(modes) and not several:
+            if os.path.isfile(sources[0]) and file_compression(sources[0]):
+                parser.error(
+                    "--jobs, --mmap, --follow and --checkpoint cannot read "
+                    "a compressed file"
+                )
+        if args.max_events is not None and args.max_events < 1:
+            parser.error("--max-events must be at least 1")
+        if args.interval <= 0:
+            parser.error("--interval must be positive")
+        if args.profile and (
+            several or args.jobs > 1 or args.follow or args.checkpoint
+        ):
+            parser.error(
+                "--profile works on a single file or stdin, plain or with --mmap"
+            )
+        analyzer_class = ProfilingAnalyzer if args.profile else Analyzer
+        if (
+            args.jobs > 1
+            and not several
+            and (
+                args.max_events is not None
+                or args.normalize
+                or rules is not None
+                or args.timeline
+                or args.snippet_lines
+            )
+        ):
+            parser.error(
+                "--max-events, --normalize, --rules, --timeline and --context "
+                "cannot be combined with --jobs on a single file"
+            )
+        if (rules is not None or args.timeline or args.snippet_lines) and (
+            args.checkpoint
+        ):
+            parser.error(
+                "--rules, --timeline and --context cannot be combined with "
+                "--checkpoint"
+            )
+        if args.ndjson and (several or args.jobs > 1 or args.mmap or args.checkpoint):
+            parser.error(
+                "--ndjson works on a single file or stdin, plain or with --follow"
+            )
+        if args.journal and (several or any(modes) or args.timeline or args.ndjson):
+            parser.error(
+                "--journal works on a single file or stdin, without --jobs, "
+                "--mmap, --follow, --checkpoint, --timeline or --ndjson"
+            )
+        per_source: Optional["SourceCounts"] = None
+        if args.follow:
+            return _follow(
+                sources[0],
+                args.json,
+                args.ndjson,
+                args.interval,
+                args.max_events,
+                args.normalize,
+                rules,
+                args.timeline,
+                args.snippet_lines,
+                args.top,
+            )
+        if args.checkpoint:
+            from .checkpoint import analyze_incremental
+
+            analyzer = analyze_incremental(
+                sources[0], args.checkpoint, args.max_events, args.normalize
+            )
+        elif several:
+            from .parallel import analyze_files
+
+            try:
+                analyzer, per_source = analyze_files(
+                    sources,
+                    args.jobs,
+                    args.max_events,
+                    args.normalize,
+                    rules,
+                    args.timeline,
+                    args.snippet_lines,
+                )
+            except InputError as exc:
+                parser.error(str(exc))
+        elif args.jobs > 1:
+            from .parallel import analyze_file
+
+            analyzer = analyze_file(sources[0], args.jobs)
+        elif args.mmap:
+            analyzer = analyzer_class(
+                max_events=args.max_events,
+                normalize=args.normalize,
+                rules=rules,
+                timeline=args.timeline,
+                snippet_lines=args.snippet_lines,
+            )
+            with map_file(sources[0]) as data:
+                analyzer.process_buffer(data)
+        else:
+            options = dict(
+                max_events=args.max_events,
+                normalize=args.normalize,
+                rules=rules,
+                timeline=args.timeline,
+                snippet_lines=args.snippet_lines,
+            )
+            stream = None
+            if args.ndjson:
+                from .ndjson import NdjsonStream, StreamingAnalyzer
+
+                stream = NdjsonStream(sys.stdout)
+                analyzer = StreamingAnalyzer(stream, **options)
+            else:
+                analyzer = analyzer_class(**options)
+            try:
+                if args.journal:
+                    _read_journal(analyzer, sources[0] if sources else None)
+                else:
+                    analyzer.process_lines(
+                        _read_stream(sources[0] if sources else None)
+                    )
+            except InputError as exc:
+                parser.error(str(exc))
+            if stream is not None:
+                analyzer.finalize()
+                stream.close()
+                return 0
         analyzer.finalize()
-        report = _emit_report(analyzer, args.json)
-        print(report)
+        status = _finish_report(analyzer, args, sys.stdout, baseline, per_source)
+        if isinstance(analyzer, ProfilingAnalyzer):
+            _emit_profile(analyzer.stats(), args.json)
+        return status
+
+    if args.command == "index":
+        from .index import build_index
+
+        output = args.output or f"{args.source}.lfidx"
+        try:
+            analyzer = build_index(args.source, output, args.normalize, rules)
+        except (OSError, InputError) as exc:
+            parser.error(str(exc))
+        events = analyzer.get_events()
+        print(
+            f"Indexed {len(events)} events, "
+            f"{sum(event.occurrences for event in events)} occurrences into {output}"
+        )
+        return 0
+
+    if args.command == "query":
+        return _query(args, parser)
+
+    if args.command == "serve":
+        if args.profile:
+            parser.error("--profile is not supported by serve")
+        if args.max_events is not None and args.max_events < 1:
+            parser.error("--max-events must be at least 1")
+        return _serve(args, parser, rules)
+
+    if args.command == "bench":
+        import json
+
+        from .bench import format_results, run_benchmarks
+
+        if args.size_mb <= 0:
+            parser.error("--size-mb must be positive")
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        payload = run_benchmarks(
+            args.scenarios or list(_SCENARIOS),
+            int(args.size_mb * 2**20),
+            args.seed,
+            args.repeat,
+            args.label,
+        )
+        results = json.dumps(payload, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                handle.write(results + "\n")
+        print(results if args.json else format_results(payload))
         return 0
 
     parser.error("Unknown command")
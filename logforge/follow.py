@@ -0,0 +1,96 @@
+import os
+import time
+from typing import BinaryIO, Callable, Optional, Tuple
+
+from .analyzer import Analyzer
+from .reader import CHUNK_SIZE, LineSplitter
+
+POLL_INTERVAL = 0.5
+
+
+class Follower:
+    # tail -F for one path: appended bytes are fed to a persistent Analyzer,
+    # a new inode at the path is treated as a rotation (the old file is read
+    # to its end first) and a shrinking file as a truncation.
+    def __init__(self, path: str, analyzer: Analyzer) -> None:
+        self.path = path
+        self.analyzer = analyzer
+        self._handle: Optional[BinaryIO] = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._offset = 0
+        self._splitter = LineSplitter()
+
+    def poll(self) -> int:
+        if self._handle is None and not self._open():
+            return 0
+        consumed = self._drain()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return consumed
+        if (stat.st_dev, stat.st_ino) != self._identity:
+            self._end_of_file()
+            self.close()
+            if self._open():
+                consumed += self._drain()
+        elif stat.st_size < self._offset:
+            self._end_of_file()
+            assert self._handle is not None
+            self._handle.seek(0)
+            self._offset = 0
+            consumed += self._drain()
+        return consumed
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._identity = None
+
+    def _open(self) -> bool:
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(handle.fileno())
+        self._handle = handle
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._offset = 0
+        return True
+
+    def _drain(self) -> int:
+        assert self._handle is not None
+        consumed = 0
+        while True:
+            chunk = self._handle.read(CHUNK_SIZE)
+            if not chunk:
+                return consumed
+            consumed += len(chunk)
+            self._offset += len(chunk)
+            self.analyzer.process_lines(self._splitter.feed(chunk))
+
+    def _end_of_file(self) -> None:
+        self.analyzer.process_lines(self._splitter.flush())
+
+
+def follow(
+    follower: Follower,
+    emit: Callable[[], None],
+    interval: float,
+    poll_interval: float = POLL_INTERVAL,
+) -> None:
+    follower.poll()
+    emit()
+    dirty = False
+    deadline = time.monotonic() + interval
+    while True:
+        if follower.poll():
+            dirty = True
+        else:
+            time.sleep(poll_interval)
+        now = time.monotonic()
+        if now >= deadline:
+            if dirty:
+                emit()
+                dirty = False
+            deadline = now + interval
@@ -0,0 +1,418 @@
+import os
+import pathlib
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .analyzer import Analyzer
+from .model import EVENT_TYPES, Event, EventKey
+from .reader import CHUNK_SIZE, InputError, decode_lines, file_compression, iter_lines
+from .report import event_record, format_location
+from .rules import RuleSet
+from .timeline import TimestampParser, format_minute
+
+VERSION = 1
+# Lines are numbered from 1. The byte offset of the first line of every
+# block is stored, so a context read never seeks further than one block.
+BLOCK_SIZE = 1 << 16
+FLUSH_ROWS = 1 << 16
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    file TEXT,
+    line INTEGER,
+    function TEXT,
+    occurrences INTEGER NOT NULL,
+    first_line INTEGER,
+    last_line INTEGER
+);
+CREATE TABLE occurrences (
+    event INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    minute INTEGER,
+    PRIMARY KEY (event, line)
+) WITHOUT ROWID;
+CREATE TABLE buckets (
+    event INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (event, minute)
+) WITHOUT ROWID;
+CREATE TABLE blocks (line INTEGER PRIMARY KEY, offset INTEGER NOT NULL);
+"""
+
+
+class LogIndexError(ValueError):
+    pass
+
+
+class _IndexingAnalyzer(Analyzer):
+    # Records the line number (and minute, from the line's timestamp) of
+    # every occurrence; rows are written to the index in batches.
+    def __init__(self, db: sqlite3.Connection, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._watch = True
+        if self._clock is None:
+            self._clock = TimestampParser()
+        self._db = db
+        self.line_no = 0
+        self.ids: Dict[EventKey, int] = {}
+        self.buckets: Dict[Tuple[int, int], int] = {}
+        self._rows: List[Tuple[int, int, Optional[int]]] = []
+
+    def process_lines(self, lines: Iterable[str]) -> None:
+        process_line = self.process_line
+        for self.line_no, line in enumerate(lines, self.line_no + 1):
+            process_line(line)
+
+    def _seen(self, event: Event) -> None:
+        super()._seen(event)
+        key = event.key()
+        event_id = self.ids.get(key)
+        if event_id is None:
+            event_id = self.ids[key] = len(self.ids) + 1
+        assert self._clock is not None
+        second = self._clock.parse(self._buffer[-1]) if self._buffer else None
+        minute = None if second is None else second // 60
+        if minute is not None:
+            bucket = (event_id, minute)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self._rows.append((event_id, self.line_no, minute))
+        if len(self._rows) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO occurrences VALUES (?, ?, ?)", self._rows
+        )
+        self._rows = []
+
+
+def _blocks(handle: Any) -> Iterator[Tuple[int, bytes]]:
+    # Newline-aligned blocks of about BLOCK_SIZE bytes with their offsets.
+    offset = 0
+    pending = b""
+    while True:
+        chunk = handle.read(CHUNK_SIZE)
+        data = pending + chunk
+        start = 0
+        while len(data) - start > BLOCK_SIZE or (not chunk and start < len(data)):
+            cut = data.find(b"\n", start + BLOCK_SIZE) + 1
+            if not cut:
+                if chunk:
+                    break
+                cut = len(data)
+            yield offset, data[start:cut]
+            offset += cut - start
+            start = cut
+        pending = data[start:]
+        if not chunk:
+            return
+
+
+def build_index(
+    source: str,
+    index_path: str,
+    normalize: bool = False,
+    rules: Optional[RuleSet] = None,
+) -> Analyzer:
+    # One pass over a plain file: the event table, every occurrence's line,
+    # per-minute counts and block offsets go into a SQLite file, written
+    # under a temporary name and moved into place once complete.
+    if file_compression(source):
+        raise InputError(f"{source}: cannot index a compressed file")
+    stat = os.stat(source)
+    tmp_path = f"{index_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.executescript(_SCHEMA)
+        analyzer = _IndexingAnalyzer(db, normalize=normalize, rules=rules)
+        blocks = []
+        with open(source, "rb") as handle:
+            for offset, data in _blocks(handle):
+                blocks.append((analyzer.line_no + 1, offset))
+                analyzer.process_lines(decode_lines(data))
+        analyzer.finalize()
+        analyzer.flush()
+        _write_tables(db, analyzer, blocks)
+        meta = {
+            "version": VERSION,
+            "source": os.path.abspath(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "lines": analyzer.line_no,
+            "normalize": int(normalize),
+            "built": int(time.time()),
+        }
+        db.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [(key, str(value)) for key, value in meta.items()],
+        )
+        db.commit()
+    finally:
+        db.close()
+    os.replace(tmp_path, index_path)
+    return analyzer
+
+
+def _write_tables(
+    db: sqlite3.Connection,
+    analyzer: _IndexingAnalyzer,
+    blocks: List[Tuple[int, int]],
+) -> None:
+    spans = {
+        event: (first, last)
+        for event, first, last in db.execute(
+            "SELECT event, MIN(line), MAX(line) FROM occurrences GROUP BY event"
+        )
+    }
+    rows = []
+    for event in analyzer.get_events():
+        event_id = analyzer.ids[event.key()]
+        first, last = spans.get(event_id, (None, None))
+        rows.append((event_id, *event.key(), event.occurrences, first, last))
+    db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    db.executemany(
+        "INSERT INTO buckets VALUES (?, ?, ?)",
+        [(*bucket, count) for bucket, count in analyzer.buckets.items()],
+    )
+    db.executemany("INSERT INTO blocks VALUES (?, ?)", blocks)
+
+
+class IndexedEvent:
+    __slots__ = ("id", "event", "first_line", "last_line")
+
+    def __init__(
+        self,
+        id: int,
+        event: Event,
+        first_line: Optional[int],
+        last_line: Optional[int],
+    ) -> None:
+        self.id = id
+        self.event = event
+        self.first_line = first_line
+        self.last_line = last_line
+
+
+class LogIndex:
+    def __init__(self, path: str) -> None:
+        if not os.path.isfile(path):
+            raise LogIndexError(f"{path}: no such index")
+        try:
+            uri = pathlib.Path(path).absolute().as_uri()
+            self._db = sqlite3.connect(f"{uri}?mode=ro", uri=True)
+            self.meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError as exc:
+            raise LogIndexError(f"{path}: not a logforge index ({exc})") from None
+        if self.meta.get("version") != str(VERSION):
+            raise LogIndexError(f"{path}: built by another version, index again")
+        self.source = self.meta["source"]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def is_stale(self) -> bool:
+        try:
+            stat = os.stat(self.source)
+        except OSError:
+            return True
+        return (str(stat.st_size), str(stat.st_mtime_ns)) != (
+            self.meta["size"],
+            self.meta["mtime_ns"],
+        )
+
+    def events(
+        self,
+        level: Optional[str] = None,
+        type: Optional[str] = None,
+        text: Optional[str] = None,
+        file: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        top: Optional[int] = None,
+        event_id: Optional[int] = None,
+    ) -> List[IndexedEvent]:
+        # since and until are epoch minutes, both inclusive; with either one
+        # an event's count is its occurrences within the window.
+        where: List[str] = []
+        params: List[Any] = []
+        for column, value in (
+            ("id", event_id),
+            ("level", level),
+            ("type", type),
+            ("file", file),
+        ):
+            if value is not None:
+                where.append(f"events.{column} = ?")
+                params.append(value)
+        if text is not None:
+            where.append("instr(events.message, ?) > 0")
+            params.append(text)
+        count = "events.occurrences"
+        join = ""
+        if since is not None or until is not None:
+            count = "SUM(buckets.count)"
+            join = (
+                "JOIN buckets ON buckets.event = events.id"
+                " AND buckets.minute BETWEEN ? AND ?"
+            )
+            params[:0] = [
+                -1 if since is None else since,
+                2**62 if until is None else until,
+            ]
+        query = (
+            "SELECT events.id, level, events.type, message, events.file,"
+            f" events.line, function, {count} AS hits, first_line, last_line"
+            f" FROM events {join}"
+            f" {('WHERE ' + ' AND '.join(where)) if where else ''}"
+            " GROUP BY events.id ORDER BY hits DESC, events.id"
+        )
+        if top is not None:
+            query += " LIMIT ?"
+            params.append(top)
+        result = []
+        for row in self._db.execute(query, params):
+            event_id_, level_, type_, message, file_, line, function = row[:7]
+            event = EVENT_TYPES[level_](type_, message, file_, line, function)
+            event.occurrences = row[7]
+            result.append(IndexedEvent(event_id_, event, row[8], row[9]))
+        return result
+
+    def occurrences(
+        self,
+        event_id: int,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, Optional[int]]]:
+        query = "SELECT line, minute FROM occurrences WHERE event = ?"
+        params: List[Any] = [event_id]
+        if since is not None:
+            query += " AND minute >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND minute <= ?"
+            params.append(until)
+        query += " ORDER BY line"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return list(self._db.execute(query, params))
+
+    def per_minute(self, event_id: int) -> List[Tuple[int, int]]:
+        return list(
+            self._db.execute(
+                "SELECT minute, count FROM buckets WHERE event = ? ORDER BY minute",
+                (event_id,),
+            )
+        )
+
+    def lines(self, first: int, last: int) -> List[Tuple[int, str]]:
+        # Lines first..last of the source, read from the start of the block
+        # holding the first one.
+        first = max(first, 1)
+        row = self._db.execute(
+            "SELECT line, offset FROM blocks WHERE line <= ?"
+            " ORDER BY line DESC LIMIT 1",
+            (first,),
+        ).fetchone()
+        if row is None:
+            return []
+        line_no, offset = row
+        result = []
+        with open(self.source, "rb") as handle:
+            handle.seek(offset)
+            for text in iter_lines(handle, BLOCK_SIZE):
+                if line_no > last:
+                    break
+                if line_no >= first:
+                    result.append((line_no, text.rstrip("\n")))
+                line_no += 1
+        return result
+
+
+def parse_minute(text: str) -> int:
+    # "2024-01-12", "2024-01-12 10", "2024-01-12T10:00" or with seconds, UTC.
+    padded = text
+    if text[:4].isdigit() and 10 <= len(text) < 19:
+        padded = text + " 00:00:00"[len(text) - 10 :]
+    second = TimestampParser().parse(padded)
+    if second is None or not text[:4].isdigit():
+        raise ValueError(f"invalid time {text!r}, expected YYYY-MM-DD[ HH:MM[:SS]]")
+    return second // 60
+
+
+def event_summary(indexed: IndexedEvent) -> Dict[str, Any]:
+    return {
+        "id": indexed.id,
+        **event_record(indexed.event),
+        "first_line": indexed.first_line,
+        "last_line": indexed.last_line,
+    }
+
+
+def occurrence_records(
+    index: LogIndex,
+    event_id: int,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: Optional[int] = None,
+    context: int = 0,
+) -> List[Dict[str, Any]]:
+    # Each occurrence with the `context` lines before it and the line itself.
+    records = []
+    for line, minute in index.occurrences(event_id, since, until, limit):
+        records.append(
+            {
+                "line": line,
+                "minute": None if minute is None else format_minute(minute),
+                "context": [
+                    [number, text] for number, text in index.lines(line - context, line)
+                ],
+            }
+        )
+    return records
+
+
+def _format_header(indexed: IndexedEvent) -> List[str]:
+    event = indexed.event
+    count = f" ({event.occurrences}x)" if event.occurrences > 1 else ""
+    lines = [f"#{indexed.id} [{event.level}] {event.type}{count}: {event.message}"]
+    location = format_location(event)
+    if location:
+        lines.append(f"  Location: {location}")
+    if indexed.first_line is not None:
+        if indexed.first_line == indexed.last_line:
+            lines.append(f"  Lines: {indexed.first_line}")
+        else:
+            lines.append(f"  Lines: {indexed.first_line} to {indexed.last_line}")
+    return lines
+
+
+def format_events(indexed_events: List[IndexedEvent]) -> str:
+    if not indexed_events:
+        return "No matching events."
+    lines: List[str] = []
+    for indexed in indexed_events:
+        lines.extend(_format_header(indexed))
+    return "\n".join(lines)
+
+
+def format_occurrences(indexed: IndexedEvent, records: List[Dict[str, Any]]) -> str:
+    lines = _format_header(indexed)
+    for record in records:
+        lines.append("--")
+        for number, text in record["context"]:
+            marker = ">" if number == record["line"] else " "
+            lines.append(f"{marker}{number:>8}: {text}")
+    return "\n".join(lines)
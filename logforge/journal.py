@@ -0,0 +1,240 @@
+import json
+import re
+from itertools import chain
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from .analyzer import Analyzer
+from .reader import CHUNK_SIZE, InputError
+
+# syslog priorities: 0-3 (emerg, alert, crit, err) are errors, 4 a warning.
+# Records with a higher priority, or none, go through the line rules.
+PRIORITY_LEVELS = {
+    "0": "ERROR",
+    "1": "ERROR",
+    "2": "ERROR",
+    "3": "ERROR",
+    "4": "WARNING",
+}
+
+# Fields as journalctl -o json writes them, without spaces.
+_PRIORITY_FIELD = b'"PRIORITY":"'
+_MESSAGE_FIELD = b'"MESSAGE":"'
+# A priority below warning and the quote that ends it.
+_QUIET = frozenset((b'5"', b'6"', b'7"'))
+
+# An export field name, as the first line of a "FIELD=value" or binary field.
+_FIELD_NAME = re.compile(rb"[A-Z_][A-Z0-9_]*")
+
+JsonValue = Union[None, str, List[int], List[str]]
+ExportRecord = Dict[bytes, bytes]
+
+
+def _text(value: JsonValue) -> Optional[str]:
+    # journalctl -o json writes a field as a string, as an array of byte
+    # values when it is not valid UTF-8, and as an array of those when the
+    # record holds the field more than once (the first one is used).
+    if value is None or isinstance(value, str):
+        return value
+    if not value:
+        return None
+    first = value[0]
+    if isinstance(first, int):
+        return bytes(value).decode("utf-8", "replace")  # type: ignore[arg-type]
+    return _text(first)  # type: ignore[arg-type]
+
+
+def _decode(value: Optional[bytes]) -> Optional[str]:
+    return None if value is None else value.decode("utf-8", "replace")
+
+
+def _chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _json_lines(first: bytes, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    tail = b""
+    for chunk in chain((first,), chunks):
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def _quiet_message(raw: bytes) -> Optional[bytes]:
+    # The still-escaped MESSAGE of a JSON record with a priority below
+    # warning, found without decoding it; None if that cannot be told. A
+    # quote inside a JSON string is escaped, so the first '","' after the
+    # value starts ends it, and without one MESSAGE is the last field.
+    found = raw.find(_PRIORITY_FIELD)
+    if found < 0:
+        return None
+    found += len(_PRIORITY_FIELD)
+    # Sliced: a truncated last record may end right after the field name.
+    if raw[found : found + 2] not in _QUIET:
+        return None
+    start = raw.find(_MESSAGE_FIELD)
+    if start < 0:
+        return None
+    start += len(_MESSAGE_FIELD)
+    end = raw.find(b'","', start)
+    if end < 0:
+        end = len(raw.rstrip()) - 2
+        if raw[end:].rstrip() != b'"}':
+            return None
+    message = raw[start:end]
+    # Escaped non-ASCII could hide a character the prefilter looks for.
+    return None if b"\\u" in message else message
+
+
+def _export_records(first: bytes, chunks: Iterator[bytes]) -> Iterator[ExportRecord]:
+    # journalctl -o export: "FIELD=value" lines, a record ends at an empty
+    # line. Records are split at once when every line holds a "=", and read
+    # field by field only if they have binary fields ("FIELD\n", a 64-bit
+    # little-endian size, the data and "\n").
+    data = first
+    pos = 0
+    while True:
+        end = data.find(b"\n\n", pos)
+        if end >= 0:
+            try:
+                record = dict(
+                    line.split(b"=", 1) for line in data[pos:end].split(b"\n")
+                )
+            except ValueError:
+                parsed = _parse_record(data, pos, False)
+                if parsed is not None:
+                    record, pos = parsed
+                    if record:
+                        yield record
+                    continue
+            else:
+                pos = end + 2
+                yield record
+                continue
+        chunk = next(chunks, b"")
+        if not chunk:
+            break
+        data = data[pos:] + chunk
+        pos = 0
+    while pos < len(data):
+        parsed = _parse_record(data, pos, True)
+        assert parsed is not None
+        record, pos = parsed
+        if record:
+            yield record
+
+
+def _parse_record(
+    data: bytes, pos: int, final: bool
+) -> Optional[Tuple[ExportRecord, int]]:
+    # One record from pos, field by field. None if data ends inside it and
+    # more may come; at the end of input (final) it may lack its empty line.
+    record: ExportRecord = {}
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        if end < 0:
+            if not final:
+                return None
+            end = len(data)
+        line = data[pos:end]
+        if not line:
+            return record, end + 1
+        if b"=" in line:
+            field, _, value = line.partition(b"=")
+            record[field] = value
+            pos = end + 1
+            continue
+        size_end = end + 9
+        size = int.from_bytes(data[end + 1 : size_end], "little")
+        if size_end + size > len(data):
+            if final:
+                raise InputError("journal export input ends inside a binary field")
+            return None
+        record[line] = data[size_end : size_end + size]
+        pos = size_end + size + 1
+    return (record, pos) if final else None
+
+
+def process_journal(analyzer: Analyzer, stream: BinaryIO) -> None:
+    # Reads journalctl -o json or -o export output, told apart by the first
+    # byte; input whose first line is not an export field is neither. Records
+    # with an error or warning priority become events with the unit as type
+    # and CODE_FILE/CODE_LINE/CODE_FUNC as location; the others are only
+    # decoded if the byte prefilter says their MESSAGE could match.
+    chunks = _chunks(stream)
+    first = b""
+    for first in chunks:
+        if first.strip():
+            break
+    if first.lstrip()[:1] == b"{":
+        _process_json(analyzer, _json_lines(first, chunks))
+    elif first.strip():
+        head = first.lstrip(b"\n").split(b"\n", 1)[0].split(b"=", 1)[0]
+        if not _FIELD_NAME.fullmatch(head):
+            raise InputError("not journalctl -o json/export output")
+        _process_export(analyzer, _export_records(first, chunks))
+
+
+def _process_json(analyzer: Analyzer, lines: Iterator[bytes]) -> None:
+    loads = json.loads
+    for number, raw in enumerate(lines, 1):
+        message = _quiet_message(raw)
+        if message is not None and not analyzer.may_match(message):
+            continue
+        try:
+            record = loads(raw)
+        except ValueError:
+            if not raw.strip():
+                continue
+            raise InputError(f"line {number}: not a journal JSON record") from None
+        if not isinstance(record, dict):
+            raise InputError(f"line {number}: not a journal JSON record")
+        _process(
+            analyzer,
+            _text(record.get("MESSAGE")) or "",
+            _text(record.get("PRIORITY")),
+            _text(record.get("_SYSTEMD_UNIT"))
+            or _text(record.get("SYSLOG_IDENTIFIER")),
+            _text(record.get("CODE_FILE")),
+            _text(record.get("CODE_LINE")),
+            _text(record.get("CODE_FUNC")),
+        )
+
+
+def _process_export(analyzer: Analyzer, records: Iterator[ExportRecord]) -> None:
+    for record in records:
+        priority = _decode(record.get(b"PRIORITY"))
+        message = record.get(b"MESSAGE", b"")
+        if priority not in PRIORITY_LEVELS and not analyzer.may_match(message):
+            continue
+        _process(
+            analyzer,
+            message.decode("utf-8", "replace"),
+            priority,
+            _decode(record.get(b"_SYSTEMD_UNIT") or record.get(b"SYSLOG_IDENTIFIER")),
+            _decode(record.get(b"CODE_FILE")),
+            _decode(record.get(b"CODE_LINE")),
+            _decode(record.get(b"CODE_FUNC")),
+        )
+
+
+def _process(
+    analyzer: Analyzer,
+    message: str,
+    priority: Optional[str],
+    unit: Optional[str],
+    file: Optional[str],
+    line: Optional[str],
+    function: Optional[str],
+) -> None:
+    level = PRIORITY_LEVELS.get(priority or "")
+    if level is None:
+        analyzer.process_lines(message.split("\n"))
+        return
+    line_no = int(line) if line and line.isdigit() else None
+    analyzer.process_record(message, level, unit or "journal", file, line_no, function)
@@ -1,9 +1,8 @@
-from dataclasses import dataclass
-from typing import Optional
+import sys
+from typing import Any, NamedTuple, Optional, Tuple
 
 
-@dataclass(frozen=True)
-class EventKey:
+class EventKey(NamedTuple):
     level: str
     type: str
     message: str
@@ -12,28 +11,85 @@ class EventKey:
     function: Optional[str]
 
 
-@dataclass
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
 class Event:
-    level: str
-    type: str
-    message: str
-    file: Optional[str] = None
-    line: Optional[int] = None
-    function: Optional[str] = None
-    occurrences: int = 1
+    # The identifying fields live in a single EventKey tuple which is also the
+    # key of Analyzer._events, so an event costs one tuple plus two slots.
+    __slots__ = ("_key", "occurrences")
+
+    def __init__(
+        self,
+        level: str,
+        type: str,
+        message: str,
+        file: Optional[str] = None,
+        line: Optional[int] = None,
+        function: Optional[str] = None,
+        occurrences: int = 1,
+    ) -> None:
+        self._key = EventKey(
+            sys.intern(level),
+            sys.intern(type),
+            message,
+            _intern(file),
+            line,
+            _intern(function),
+        )
+        self.occurrences = occurrences
+
+    @property
+    def level(self) -> str:
+        return self._key[0]
+
+    @property
+    def type(self) -> str:
+        return self._key[1]
+
+    @property
+    def message(self) -> str:
+        return self._key[2]
+
+    @property
+    def file(self) -> Optional[str]:
+        return self._key[3]
+
+    @property
+    def line(self) -> Optional[int]:
+        return self._key[4]
+
+    @property
+    def function(self) -> Optional[str]:
+        return self._key[5]
 
     def key(self) -> EventKey:
-        return EventKey(
-            level=self.level,
-            type=self.type,
-            message=self.message,
-            file=self.file,
-            line=self.line,
-            function=self.function,
+        return self._key
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self._key, self.occurrences) == (other._key, other.occurrences)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in zip(EventKey._fields, self._key)
         )
+        return f"{type(self).__name__}({fields}, occurrences={self.occurrences!r})"
+
+    def __getstate__(self) -> tuple:
+        return (self._key, self.occurrences)
+
+    def __setstate__(self, state: tuple) -> None:
+        self._key, self.occurrences = state
 
 
 class ErrorEvent(Event):
+    __slots__ = ()
+
     def __init__(
         self,
         type: str,
@@ -53,6 +109,8 @@ class ErrorEvent(Event):
 
 
 class WarningEvent(Event):
+    __slots__ = ()
+
     def __init__(
         self,
         type: str,
@@ -69,3 +127,24 @@ class WarningEvent(Event):
             line=line,
             function=function,
         )
+
+
+EVENT_TYPES = {"ERROR": ErrorEvent, "WARNING": WarningEvent}
+
+
+class Snippet(NamedTuple):
+    # The lines around an event's first occurrence, its own line at `index`.
+    lines: Tuple[str, ...]
+    index: int
+
+    @property
+    def before(self) -> Tuple[str, ...]:
+        return self.lines[: self.index]
+
+    @property
+    def line(self) -> str:
+        return self.lines[self.index]
+
+    @property
+    def after(self) -> Tuple[str, ...]:
+        return self.lines[self.index + 1 :]
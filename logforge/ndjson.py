@@ -0,0 +1,151 @@
+import json
+import time
+from typing import Any, Dict, Iterable, List, TextIO
+
+from .analyzer import Analyzer
+from .model import Event, EventKey
+from .report import event_record
+
+DELTA_INTERVAL = 1.0
+POLL_LINES = 1024
+
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+class NdjsonStream:
+    # One JSON object per line: an "event" record the first time a key is
+    # seen (with a small integer id), "delta" records with the occurrences
+    # added per id since the previous one, and a closing "summary". Several
+    # analyzers (one per command with `run`) can share a stream; their
+    # events share ids and their deltas are added up. Under --max-events an
+    # evicted key that comes back is streamed as a new event with a new id,
+    # so the ids held stay bounded by the analyzers' tables.
+    def __init__(self, out: TextIO, interval: float = DELTA_INTERVAL) -> None:
+        self._out = out
+        self._interval = interval
+        self._ids: Dict[EventKey, int] = {}
+        self._next_id = 0
+        self._added: Dict[int, int] = {}
+        self._occurrences = 0
+        self._levels: Dict[str, int] = {}
+        self._analyzers: List["StreamingAnalyzer"] = []
+        self._deadline = time.monotonic() + interval
+        self._pending = False
+
+    def register(self, analyzer: "StreamingAnalyzer") -> None:
+        self._analyzers.append(analyzer)
+
+    def new_event(self, event: Event) -> bool:
+        key = event.key()
+        if key in self._ids:
+            return False
+        event_id = self._ids[key] = self._next_id
+        self._next_id += 1
+        self._occurrences += event.occurrences
+        self._levels[event.level] = self._levels.get(event.level, 0) + 1
+        self._write({"kind": "event", "id": event_id, **event_record(event)})
+        return True
+
+    def add(self, event: Event, count: int) -> None:
+        # Occurrences counted since the previous delta, written with the next.
+        event_id = self._ids[event.key()]
+        self._added[event_id] = self._added.get(event_id, 0) + count
+        self._occurrences += count
+
+    def release(self, events: Iterable[Event]) -> None:
+        # Forgets the ids of evicted events no registered analyzer still holds.
+        for event in events:
+            key = event.key()
+            if not any(key in analyzer._events for analyzer in self._analyzers):
+                self._ids.pop(key, None)
+
+    def poll(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now >= self._deadline:
+            self._deadline = now + self._interval
+            self._write_deltas()
+        if self._pending:
+            self._out.flush()
+            self._pending = False
+
+    def close(self) -> None:
+        # Call once the registered analyzers are finalized and before they
+        # are merged anywhere: the summary adds up what was streamed.
+        self.poll(force=True)
+        summary: Dict[str, Any] = {
+            "kind": "summary",
+            "unique": self._next_id,
+            "occurrences": self._occurrences,
+            "errors": self._levels.get("ERROR", 0),
+            "warnings": self._levels.get("WARNING", 0),
+        }
+        bounds = [analyzer.get_error_bound() for analyzer in self._analyzers]
+        if any(bound is not None for bound in bounds):
+            summary["error_bound"] = sum(bound or 0 for bound in bounds)
+        self._write(summary)
+        self._out.flush()
+        self._pending = False
+
+    def _write_deltas(self) -> None:
+        for analyzer in self._analyzers:
+            analyzer.collect()
+        if self._added:
+            self._write({"kind": "delta", "counts": sorted(self._added.items())})
+            self._added = {}
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._out.write(_dumps(record) + "\n")
+        self._pending = True
+
+
+class StreamingAnalyzer(Analyzer):
+    def __init__(self, stream: NdjsonStream, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stream = stream
+        # Events counted since the previous delta with the occurrences already
+        # sent, kept per occurrence as for ranking: a delta only looks at the
+        # events that changed, not at the whole table.
+        self._touched = {}
+        self._watch = True
+        stream.register(self)
+
+    def process_lines(self, lines: Iterable[str]) -> None:
+        process_line = self.process_line
+        poll = self._stream.poll
+        for count, line in enumerate(lines, 1):
+            process_line(line)
+            if not count % POLL_LINES:
+                poll()
+        poll()
+
+    def collect(self) -> None:
+        touched = self._touched
+        assert touched is not None, "streamed analyzers are not merged"
+        add = self._stream.add
+        for event, sent in touched.values():
+            if event.occurrences > sent:
+                add(event, event.occurrences - sent)
+        self._touched = {}
+
+    def _insert(self, event: Event, overcount: int = 0) -> None:
+        super()._insert(event, overcount)
+        if self._stream.new_event(event) and self._touched is not None:
+            self._touched[id(event)] = (event, event.occurrences)
+
+    def _evict(self) -> None:
+        touched = self._touched
+        before = list(self._events.values())
+        super()._evict()
+        events = self._events
+        evicted = [event for event in before if event.key() not in events]
+        # Counts not sent yet for the evicted events go out with the next
+        # delta; a key evicted here and seen again later is counted afresh.
+        kept = {}
+        if touched is not None:
+            for ident, (event, sent) in touched.items():
+                if events.get(event.key()) is event:
+                    kept[ident] = (event, sent)
+                elif event.occurrences > sent:
+                    self._stream.add(event, event.occurrences - sent)
+        self._touched = kept
+        self._stream.release(evicted)
@@ -0,0 +1,16 @@
+import re
+
+SAMPLE_LIMIT = 3
+PLACEHOLDER = "<*>"
+
+# Any word that starts with hex digits and contains a decimal digit, plus
+# what is glued to it by ".", ":" or "-": numbers, PIDs, durations ("35ms"),
+# times, dates, IPs with ports, hex addresses and ids, UUIDs. Words that only
+# contain a digit after a non-hex letter ("sha256", "utf8") are kept. A
+# single pass with a constant replacement keeps this cheap enough to run on
+# every matched line.
+_VARIABLE_RE = re.compile(r"\b[0-9a-fA-F]*\d[\w.:-]*")
+
+
+def normalize_message(message: str) -> str:
+    return _VARIABLE_RE.sub(PLACEHOLDER, message)
@@ -0,0 +1,249 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .analyzer import Analyzer, AnalyzerState
+from .model import EVENT_TYPES, Event, EventKey, Snippet
+from .reader import RangeReader, decompressed, iter_lines
+from .rules import RuleSet
+from .timeline import Timeline
+
+SourceCounts = Dict[EventKey, Dict[str, int]]
+
+HEAD_LINES = 4096
+MIN_RANGE_SIZE = 1 << 20
+
+_FRESH_STATE: AnalyzerState = Analyzer().get_state()
+
+
+@dataclass
+class _RangeResult:
+    # Events of the first `head_lines` lines are kept as ordered hits tagged
+    # with their line index so the parent can drop the ones produced before
+    # the range's real starting state is known; the rest are pre-aggregated.
+    head: List[Tuple[int, Event]]
+    events: List[Event]
+    state: AnalyzerState
+    buffer: List[str]
+
+
+@dataclass
+class _SourceResult:
+    events: List[Event]
+    overcount: Dict[EventKey, int]
+    error_bound: int
+    samples: Optional[Dict[EventKey, List[str]]]
+    timelines: Optional[Dict[EventKey, Timeline]]
+    snippets: Optional[Dict[EventKey, Snippet]]
+
+
+class _RangeAnalyzer(Analyzer):
+    def __init__(self) -> None:
+        super().__init__()
+        self.head: Optional[List[Tuple[int, Event]]] = []
+        self.line_index = 0
+
+    def _record(
+        self,
+        level: str,
+        type: str,
+        message: str,
+        file: Optional[str] = None,
+        line: Optional[int] = None,
+        function: Optional[str] = None,
+    ) -> Event:
+        if self.head is None:
+            return super()._record(level, type, message, file, line, function)
+        event = EVENT_TYPES[level](type, message, file, line, function)
+        self.head.append((self.line_index, event))
+        return event
+
+    def _cache_line(self, raw_line: str, event: Event) -> None:
+        if self.head is None:
+            super()._cache_line(raw_line, event)
+
+
+def split_ranges(
+    path: str, jobs: int, min_range_size: int = MIN_RANGE_SIZE
+) -> List[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    count = max(1, min(jobs, size // max(1, min_range_size)))
+    bounds = [0]
+    with open(path, "rb") as handle:
+        for index in range(1, count):
+            handle.seek(size * index // count)
+            handle.readline()
+            offset = handle.tell()
+            if bounds[-1] < offset < size:
+                bounds.append(offset)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _iter_range(path: str, start: int, end: int) -> Iterator[str]:
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        yield from iter_lines(RangeReader(handle, end - start))
+
+
+def _analyze_range(path: str, start: int, end: int, head_lines: int) -> _RangeResult:
+    analyzer = _RangeAnalyzer()
+    lines = _iter_range(path, start, end)
+    for index, line in zip(range(head_lines), lines):
+        analyzer.line_index = index
+        analyzer.process_line(line)
+    head = analyzer.head or []
+    analyzer.head = None
+    analyzer.process_lines(lines)
+    return _RangeResult(
+        head=head,
+        events=analyzer.get_events(),
+        state=analyzer.get_state(),
+        buffer=analyzer.get_recent_context(),
+    )
+
+
+def _replay(
+    path: str, start: int, end: int, state: AnalyzerState, head_lines: int
+) -> Tuple[Optional[int], _RangeResult]:
+    # Re-run the start of a range from its true starting state next to a
+    # fresh analyzer until both states agree; from that line on the worker's
+    # own results are exact. If they never agree inside the head window the
+    # whole range is replayed and the returned result replaces the worker's.
+    true = _RangeAnalyzer()
+    true.set_state(state)
+    shadow: Optional[Analyzer] = Analyzer()
+    head: List[Tuple[int, Event]] = []
+    for index, line in enumerate(_iter_range(path, start, end)):
+        if shadow is not None:
+            if true.get_state() == shadow.get_state():
+                return index, _RangeResult(true.head or [], [], state, [])
+            if index < head_lines:
+                shadow.process_line(line)
+            else:
+                shadow = None
+                head = true.head or []
+                true.head = None
+        true.line_index = index
+        true.process_line(line)
+    if true.head is not None:
+        head = true.head
+    return None, _RangeResult(
+        head=head,
+        events=true.get_events(),
+        state=true.get_state(),
+        buffer=true.get_recent_context(),
+    )
+
+
+def analyze_file(
+    path: str,
+    jobs: int,
+    min_range_size: int = MIN_RANGE_SIZE,
+    head_lines: int = HEAD_LINES,
+) -> Analyzer:
+    ranges = split_ranges(path, jobs, min_range_size)
+    if len(ranges) == 1:
+        results = [_analyze_range(path, *ranges[0], head_lines)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(_analyze_range, path, start, end, head_lines)
+                for start, end in ranges
+            ]
+            results = [future.result() for future in futures]
+
+    merged = Analyzer()
+    state = _FRESH_STATE
+    for (start, end), result in zip(ranges, results):
+        head = result.head
+        if state != _FRESH_STATE:
+            sync, replayed = _replay(path, start, end, state, head_lines)
+            if sync is None:
+                result = replayed
+                head = replayed.head
+            else:
+                head = replayed.head + [hit for hit in head if hit[0] >= sync]
+        for _, event in head:
+            merged._add_event(event)
+        merged.merge(result.events)
+        merged._buffer.extend(result.buffer)
+        state = result.state
+    merged.set_state(state)
+    return merged
+
+
+def _analyze_source(
+    path: str,
+    max_events: Optional[int],
+    normalize: bool,
+    rules: Optional[RuleSet],
+    timeline: bool,
+    snippet_lines: int,
+) -> _SourceResult:
+    analyzer = Analyzer(
+        max_events=max_events,
+        normalize=normalize,
+        rules=rules,
+        timeline=timeline,
+        snippet_lines=snippet_lines,
+    )
+    with open(path, "rb") as handle, decompressed(handle) as stream:
+        analyzer.process_lines(iter_lines(stream))
+    analyzer.finalize()
+    return _SourceResult(
+        events=analyzer.get_events(),
+        overcount=analyzer.get_overcounts(),
+        error_bound=analyzer.get_error_bound() or 0,
+        samples=analyzer.get_samples(),
+        timelines=analyzer.get_timelines(),
+        snippets=analyzer.get_snippets(),
+    )
+
+
+def analyze_files(
+    paths: Sequence[str],
+    jobs: int,
+    max_events: Optional[int] = None,
+    normalize: bool = False,
+    rules: Optional[RuleSet] = None,
+    timeline: bool = False,
+    snippet_lines: int = 0,
+) -> Tuple[Analyzer, SourceCounts]:
+    # One file per task, each with its own analyzer (state never carries over
+    # from one file into the next). Files are submitted biggest first so one
+    # large file does not end up alone at the tail of the run; results are
+    # still merged in the given order so the report does not depend on timing.
+    paths = list(dict.fromkeys(paths))
+    order = sorted(paths, key=os.path.getsize, reverse=True)
+    options = (max_events, normalize, rules, timeline, snippet_lines)
+    if jobs == 1 or len(paths) == 1:
+        results = {path: _analyze_source(path, *options) for path in order}
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+            futures = {
+                path: pool.submit(_analyze_source, path, *options) for path in order
+            }
+            results = {path: future.result() for path, future in futures.items()}
+
+    merged = Analyzer(
+        max_events=max_events,
+        normalize=normalize,
+        timeline=timeline,
+        snippet_lines=snippet_lines,
+    )
+    sources: SourceCounts = {}
+    for path in paths:
+        result = results[path]
+        for event in result.events:
+            sources.setdefault(event.key(), {})[path] = event.occurrences
+        merged.merge(
+            result.events,
+            result.overcount,
+            result.error_bound,
+            result.samples,
+            result.timelines,
+            result.snippets,
+        )
+    return merged, sources
@@ -0,0 +1,60 @@
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .model import Event
+
+LEVELS = ("ERROR", "WARNING")
+
+# Events touched since the previous ranking, by id(), with their count at
+# that ranking: 0 for events that did not exist yet.
+Touched = Mapping[int, Tuple[Event, int]]
+
+
+class LevelRanking(NamedTuple):
+    unique: int
+    occurrences: int
+    events: List[Event]
+
+
+def rank_key(event: Event) -> Tuple[int, str, str]:
+    return (-event.occurrences, event.type, event.message)
+
+
+def rank(
+    previous: Mapping[str, LevelRanking], touched: Touched, top: Optional[int] = None
+) -> Dict[str, LevelRanking]:
+    # Counts only grow between rankings, so an event left out of the previous
+    # top can only enter it by being counted again: the new top is ranked
+    # from the previous one and the touched events alone.
+    changed: Dict[str, List[Event]] = {level: [] for level in (*LEVELS, *previous)}
+    added = dict.fromkeys(changed, 0)
+    new = dict.fromkeys(changed, 0)
+    for event, before in touched.values():
+        level = event.level
+        if level not in changed:
+            changed[level], added[level], new[level] = [], 0, 0
+        changed[level].append(event)
+        added[level] += event.occurrences - before
+        if not before:
+            new[level] += 1
+    rankings = {}
+    for level, events in changed.items():
+        old = previous.get(level)
+        if old is not None:
+            events = [e for e in old.events if id(e) not in touched] + events
+            unique = old.unique + new[level]
+            occurrences = old.occurrences + added[level]
+        else:
+            unique, occurrences = new[level], added[level]
+        if top is None:
+            events.sort(key=rank_key)
+        else:
+            events = nsmallest(top, events, key=rank_key)
+        rankings[level] = LevelRanking(unique, occurrences, events)
+    return rankings
+
+
+def rank_events(
+    events: Iterable[Event], top: Optional[int] = None
+) -> Dict[str, LevelRanking]:
+    return rank({}, {id(event): (event, 0) for event in events}, top)
@@ -0,0 +1,262 @@
+import codecs
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import queue
+
+ByteBuffer = Union[bytes, mmap.mmap]
+
+CHUNK_SIZE = 1 << 20
+PREFETCH_DEPTH = 4
+
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+_MAGIC_SIZE = max(len(magic) for magic, _ in _MAGIC)
+
+
+class InputError(ValueError):
+    pass
+
+
+class LineSplitter:
+    # Incremental text-mode universal newlines ("\r\n" and "\r" become "\n")
+    # over byte chunks; only the current partial line is kept between feeds.
+    def __init__(self, encoding: str = "utf-8", errors: str = "replace") -> None:
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self._partial: List[str] = []
+        self._carry = ""
+
+    def feed(self, data: bytes) -> List[str]:
+        return self._split(self._decoder.decode(data), final=False)
+
+    def flush(self) -> List[str]:
+        lines = self._split(self._decoder.decode(b"", True), final=True)
+        if self._partial:
+            lines.append("".join(self._partial))
+            self._partial = []
+        self._decoder.reset()
+        return lines
+
+    def _split(self, text: str, final: bool) -> List[str]:
+        text = self._carry + text
+        self._carry = ""
+        if not final and text.endswith("\r"):
+            self._carry = "\r"
+            text = text[:-1]
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if "\n" not in text:
+            if text:
+                self._partial.append(text)
+            return []
+        lines = text.split("\n")
+        if self._partial:
+            self._partial.append(lines[0])
+            lines[0] = "".join(self._partial)
+            self._partial = []
+        tail = lines.pop()
+        if tail:
+            self._partial.append(tail)
+        return [line + "\n" for line in lines]
+
+
+def iter_lines(
+    stream: BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+    encoding: str = "utf-8",
+    errors: str = "replace",
+) -> Iterator[str]:
+    splitter = LineSplitter(encoding, errors)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from splitter.feed(chunk)
+    yield from splitter.flush()
+
+
+class RangeReader:
+    def __init__(self, stream: BinaryIO, length: int) -> None:
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def decode_lines(
+    data: bytes, encoding: str = "utf-8", errors: str = "replace"
+) -> List[str]:
+    # Same line semantics as iter_lines for a complete, newline-aligned block.
+    text = data.decode(encoding, errors)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = text.split("\n")
+    tail = lines.pop()
+    result = [line + "\n" for line in lines]
+    if tail:
+        result.append(tail)
+    return result
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[ByteBuffer]:
+    with open(path, "rb") as handle:
+        # Empty files cannot be mapped.
+        if os.fstat(handle.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def detect_compression(head: bytes) -> Optional[str]:
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def file_compression(path: str) -> Optional[str]:
+    with open(path, "rb") as handle:
+        return detect_compression(handle.read(_MAGIC_SIZE))
+
+
+# The decompression modules are imported on first use: most runs read plain
+# text and should not pay for loading them at startup.
+def _open_gzip(raw: BinaryIO) -> BinaryIO:
+    import gzip
+
+    return gzip.GzipFile(fileobj=raw, mode="rb")
+
+
+def _open_bz2(raw: BinaryIO) -> BinaryIO:
+    import bz2
+
+    return bz2.BZ2File(raw, mode="rb")
+
+
+def _open_xz(raw: BinaryIO) -> BinaryIO:
+    import lzma
+
+    return lzma.LZMAFile(raw, mode="rb")
+
+
+def _open_zstd(raw: BinaryIO) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:  # optional: only needed for .zst input
+        raise InputError("zstd input needs the 'zstandard' package") from None
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+
+_DECOMPRESSORS: Dict[str, Callable[[BinaryIO], Any]] = {
+    "gzip": _open_gzip,
+    "bz2": _open_bz2,
+    "xz": _open_xz,
+    "zstd": _open_zstd,
+}
+
+
+class PrefetchReader:
+    # Reads (and so decompresses) the wrapped stream on a background thread,
+    # PREFETCH_DEPTH chunks ahead of the consumer. zlib, bz2 and lzma release
+    # the GIL while decompressing, so this overlaps with line analysis. Each
+    # read() returns the next chunk whatever size was asked for.
+    def __init__(
+        self,
+        stream: BinaryIO,
+        chunk_size: int = CHUNK_SIZE,
+        depth: int = PREFETCH_DEPTH,
+    ) -> None:
+        # Imported here rather than at module level: plain input never
+        # starts a prefetch thread.
+        import queue
+        import threading
+
+        self._chunks: "queue.Queue[Union[bytes, BaseException]]" = queue.Queue(depth)
+        self._closed = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(
+            target=self._fill, args=(stream, chunk_size), daemon=True
+        )
+        self._thread.start()
+
+    def _fill(self, stream: BinaryIO, chunk_size: int) -> None:
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not self._put(chunk) or not chunk:
+                    return
+        except Exception as exc:
+            self._put(exc)
+
+    def _put(self, item: Union[bytes, BaseException]) -> bool:
+        import queue
+
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        if self._done:
+            return b""
+        item = self._chunks.get()
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        if not item:
+            self._done = True
+        return item
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+
+@contextmanager
+def decompressed(raw: BinaryIO) -> Iterator[BinaryIO]:
+    # Plain input is passed through untouched; compressed input is detected
+    # by its magic bytes and decompressed on a PrefetchReader thread.
+    if not hasattr(raw, "peek"):
+        raw = io.BufferedReader(raw)  # type: ignore[arg-type]
+    head = raw.peek(_MAGIC_SIZE)[:_MAGIC_SIZE]  # type: ignore[attr-defined]
+    kind = detect_compression(head)
+    if kind is None:
+        yield raw
+        return
+    stream = _DECOMPRESSORS[kind](raw)
+    reader = PrefetchReader(stream)
+    try:
+        yield reader  # type: ignore[misc]
+    finally:
+        reader.close()
+        stream.close()
@@ -1,10 +1,13 @@
-import json
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
 
-from .model import Event
+from .model import Event, EventKey, Snippet
+from .ranking import LevelRanking, rank_events
+from .timeline import Timeline, format_minute, format_time
 
+SOURCES_SHOWN = 5
 
-def _format_location(event: Event) -> str:
+
+def format_location(event: Event) -> str:
     parts: List[str] = []
     if event.file:
         if event.line is not None:
@@ -16,60 +19,178 @@ def _format_location(event: Event) -> str:
     return " ".join(parts)
 
 
-def generate_text(events: Iterable[Event]) -> str:
-    event_list = list(events)
-    if not event_list:
-        return "No errors or warnings detected."
+def _format_sources(counts: Mapping[str, int]) -> str:
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    parts = [f"{source} ({count}x)" for source, count in ranked[:SOURCES_SHOWN]]
+    if len(ranked) > SOURCES_SHOWN:
+        parts.append(f"{len(ranked) - SOURCES_SHOWN} more")
+    return ", ".join(parts)
+
+
+def _format_timeline(timeline: Timeline) -> str:
+    seen = format_time(timeline.first)
+    if timeline.last != timeline.first:
+        seen = f"{seen} to {format_time(timeline.last)}"
+    peak = format_minute(timeline.peak_minute)
+    return f"{seen}, peak {timeline.peak}/min at {peak}"
+
+
+def _timeline_record(timeline: Optional[Timeline]) -> Dict[str, Any]:
+    if timeline is None:
+        return {
+            "first_seen": None,
+            "last_seen": None,
+            "peak_per_minute": None,
+            "peak_minute": None,
+            "per_minute": {},
+        }
+    return {
+        "first_seen": format_time(timeline.first),
+        "last_seen": format_time(timeline.last),
+        "peak_per_minute": timeline.peak,
+        "peak_minute": format_minute(timeline.peak_minute),
+        "per_minute": {
+            format_minute(minute): count for minute, count in timeline.per_minute()
+        },
+    }
+
+
+def _format_snippet(snippet: Snippet) -> List[str]:
+    lines = ["  Context:"]
+    lines.extend(f"    | {line}" for line in snippet.before)
+    lines.append(f"    > {snippet.line}")
+    lines.extend(f"    | {line}" for line in snippet.after)
+    return lines
+
+
+def _snippet_record(snippet: Optional[Snippet]) -> Optional[Dict[str, Any]]:
+    if snippet is None:
+        return None
+    return {
+        "before": list(snippet.before),
+        "line": snippet.line,
+        "after": list(snippet.after),
+    }
 
-    errors = [e for e in event_list if e.level == "ERROR"]
-    warnings = [e for e in event_list if e.level == "WARNING"]
 
-    def total_occurrences(items: List[Event]) -> int:
-        return sum(e.occurrences for e in items)
+def event_record(event: Event) -> Dict[str, Any]:
+    return {
+        "level": event.level,
+        "type": event.type,
+        "message": event.message,
+        "file": event.file,
+        "line": event.line,
+        "function": event.function,
+        "occurrences": event.occurrences,
+    }
 
-    lines: List[str] = []
-    if errors:
-        lines.append(
-            f"Errors: {len(errors)} unique, {total_occurrences(errors)} occurrences"
+
+def generate_text(
+    events: Iterable[Event],
+    error_bound: Optional[int] = None,
+    samples: Optional[Mapping[EventKey, List[str]]] = None,
+    sources: Optional[Mapping[EventKey, Mapping[str, int]]] = None,
+    timelines: Optional[Mapping[EventKey, Timeline]] = None,
+    snippets: Optional[Mapping[EventKey, Snippet]] = None,
+) -> str:
+    return "\n".join(
+        iter_text(
+            rank_events(events), error_bound, samples, sources, timelines, snippets
         )
-        for event in sorted(errors, key=lambda e: (-e.occurrences, e.type, e.message)):
-            location = _format_location(event)
+    )
+
+
+def iter_text(
+    ranking: Mapping[str, LevelRanking],
+    error_bound: Optional[int] = None,
+    samples: Optional[Mapping[EventKey, List[str]]] = None,
+    sources: Optional[Mapping[EventKey, Mapping[str, int]]] = None,
+    timelines: Optional[Mapping[EventKey, Timeline]] = None,
+    snippets: Optional[Mapping[EventKey, Snippet]] = None,
+) -> Iterator[str]:
+    # The report line by line, from rankings that may hold only the top
+    # events of each level; the headers still count them all.
+    if not any(level.unique for level in ranking.values()):
+        yield "No errors or warnings detected."
+        return
+    for level, title in (("ERROR", "Errors"), ("WARNING", "Warnings")):
+        ranked = ranking.get(level)
+        if ranked is None or not ranked.unique:
+            continue
+        yield f"{title}: {ranked.unique} unique, {ranked.occurrences} occurrences"
+        for event in ranked.events:
+            location = format_location(event)
             count = f" ({event.occurrences}x)" if event.occurrences > 1 else ""
-            lines.append(
-                f"- [{event.level}] {event.type}{count}: {event.message}"
-            )
+            yield f"- [{event.level}] {event.type}{count}: {event.message}"
             if location:
-                lines.append(f"  Location: {location}")
-    if warnings:
-        lines.append(
-            f"Warnings: {len(warnings)} unique, {total_occurrences(warnings)} occurrences"
+                yield f"  Location: {location}"
+            key = event.key()
+            if samples and samples.get(key):
+                yield f"  Example: {samples[key][0]}"
+            if sources and sources.get(key):
+                yield f"  Sources: {_format_sources(sources[key])}"
+            if timelines and timelines.get(key):
+                yield f"  Seen: {_format_timeline(timelines[key])}"
+            if snippets and snippets.get(key):
+                yield from _format_snippet(snippets[key])
+        if len(ranked.events) < ranked.unique:
+            yield f"- ... {ranked.unique - len(ranked.events)} more not shown"
+    if error_bound:
+        yield (
+            f"Only the most frequent events were kept: counts may be overstated "
+            f"by up to {error_bound}, and unlisted events occurred at most "
+            f"{error_bound} times."
         )
-        for event in sorted(
-            warnings, key=lambda e: (-e.occurrences, e.type, e.message)
-        ):
-            location = _format_location(event)
-            count = f" ({event.occurrences}x)" if event.occurrences > 1 else ""
-            lines.append(
-                f"- [{event.level}] {event.type}{count}: {event.message}"
-            )
-            if location:
-                lines.append(f"  Location: {location}")
 
-    return "\n".join(lines)
+
+def generate_json(
+    events: Iterable[Event],
+    error_bound: Optional[int] = None,
+    overcount: Optional[Mapping[EventKey, int]] = None,
+    samples: Optional[Mapping[EventKey, List[str]]] = None,
+    sources: Optional[Mapping[EventKey, Mapping[str, int]]] = None,
+    timelines: Optional[Mapping[EventKey, Timeline]] = None,
+    snippets: Optional[Mapping[EventKey, Snippet]] = None,
+) -> str:
+    return "".join(
+        iter_json(
+            events, error_bound, overcount, samples, sources, timelines, snippets
+        )
+    )
 
 
-def generate_json(events: Iterable[Event]) -> str:
+def iter_json(
+    events: Iterable[Event],
+    error_bound: Optional[int] = None,
+    overcount: Optional[Mapping[EventKey, int]] = None,
+    samples: Optional[Mapping[EventKey, List[str]]] = None,
+    sources: Optional[Mapping[EventKey, Mapping[str, int]]] = None,
+    timelines: Optional[Mapping[EventKey, Timeline]] = None,
+    snippets: Optional[Mapping[EventKey, Snippet]] = None,
+) -> Iterator[str]:
+    # With an error bound (bounded analysis) the list is wrapped in an object
+    # and every event states how far its count may be above the true one.
+    # With samples (normalized messages) every event lists a few originals,
+    # and with sources (several input files) its count per file. With
+    # timelines every event has first/last seen and its per-minute counts,
+    # and with snippets the lines around its first occurrence.
+    import json
+
     payload = []
     for event in events:
-        payload.append(
-            {
-                "level": event.level,
-                "type": event.type,
-                "message": event.message,
-                "file": event.file,
-                "line": event.line,
-                "function": event.function,
-                "occurrences": event.occurrences,
-            }
-        )
-    return json.dumps(payload, indent=2, sort_keys=True)
+        item = event_record(event)
+        if error_bound is not None:
+            item["overcount"] = overcount.get(event.key(), 0) if overcount else 0
+        if samples is not None:
+            item["samples"] = samples.get(event.key(), [])
+        if sources is not None:
+            item["sources"] = dict(sources.get(event.key(), {}))
+        if timelines is not None:
+            item.update(_timeline_record(timelines.get(event.key())))
+        if snippets is not None:
+            item["context"] = _snippet_record(snippets.get(event.key()))
+        payload.append(item)
+    encoder = json.JSONEncoder(indent=2, sort_keys=True)
+    if error_bound is not None:
+        return encoder.iterencode({"error_bound": error_bound, "events": payload})
+    return encoder.iterencode(payload)
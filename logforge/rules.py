@@ -0,0 +1,472 @@
+import os
+import re
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .model import Event
+
+# Bumped whenever the normalized form below changes, so stale caches are
+# never read back.
+ENGINE_VERSION = 4
+DEFAULT_MAX_LINES = 200
+
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_QUANTIFIERS = set("*+?{")
+_ESCAPED_LITERALS = set(".^$*+?{}[]\\|()/-\"' ")
+
+Record = Callable[..., Event]
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _has_alternation(pattern: str) -> bool:
+    # Whether the pattern has a "|" outside any group or character class.
+    depth = 0
+    index = 0
+    in_class = False
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A "]" right after "[" or "[^" is a literal member.
+            if pattern[index + 1 : index + 2] == "^":
+                index += 1
+            if pattern[index + 1 : index + 2] == "]":
+                index += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif char == "|" and depth == 0:
+            return True
+        index += 1
+    return False
+
+
+def _literal_prefix(pattern: str) -> Tuple[str, bool]:
+    # The literal text every match must start with, and whether it is
+    # anchored at the start of the line. Only plain characters and escaped
+    # punctuation are taken; anything else, including a group (which may
+    # hold alternatives), ends the prefix. A top-level "|" means there is
+    # no common prefix at all.
+    if _has_alternation(pattern):
+        return "", False
+    anchored = pattern.startswith("^")
+    index = 1 if anchored else 0
+    literal: List[str] = []
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern):
+            escaped = pattern[index + 1]
+            if escaped not in _ESCAPED_LITERALS:
+                break
+            char, step = escaped, 2
+        elif char in _REGEX_META:
+            break
+        else:
+            step = 1
+        following = pattern[index + step : index + step + 1]
+        if following and following in _QUANTIFIERS:
+            break
+        literal.append(char)
+        index += step
+    return "".join(literal), anchored
+
+
+class _Pattern:
+    # Compiled on first use: with a good prefilter most patterns of a large
+    # rule set are never needed for a given log.
+    __slots__ = ("source", "flags", "_compiled")
+
+    def __init__(self, source: str, flags: int) -> None:
+        self.source = source
+        self.flags = flags
+        self._compiled: Optional["re.Pattern[str]"] = None
+
+    def search(self, line: str) -> Optional["re.Match[str]"]:
+        if self._compiled is None:
+            self._compiled = re.compile(self.source, self.flags)
+        return self._compiled.search(line)
+
+
+class Rule:
+    __slots__ = (
+        "name",
+        "priority",
+        "event",
+        "start",
+        "cont",
+        "end",
+        "capture",
+        "incomplete",
+        "max_lines",
+        "ignorecase",
+        "keywords",
+        "anchored",
+    )
+
+    def __init__(self, spec: Dict[str, Any]) -> None:
+        self.name: str = spec["name"]
+        self.priority: int = spec["priority"]
+        self.event: Dict[str, Optional[str]] = spec["event"]
+        self.ignorecase: bool = spec["ignorecase"]
+        flags = re.IGNORECASE if self.ignorecase else 0
+        self.start = _Pattern(spec["start"], flags)
+        self.cont = _Pattern(spec["continue"], flags) if spec["continue"] else None
+        self.end = _Pattern(spec["end"], flags) if spec["end"] else None
+        self.capture: str = spec["capture"]
+        self.incomplete: str = spec["incomplete"]
+        self.max_lines: int = spec["max_lines"]
+        self.keywords: List[str] = spec["keywords"]
+        self.anchored: bool = spec["anchored"]
+
+    @property
+    def multiline(self) -> bool:
+        return self.cont is not None or self.end is not None
+
+    def accepts(self, line: str, lowered: str) -> bool:
+        if not self.keywords:
+            return True
+        text = lowered if self.ignorecase else line
+        if self.anchored:
+            return text.startswith(self.keywords[0])
+        return any(keyword in text for keyword in self.keywords)
+
+
+def _check_template(name: str, field: str, template: Any, groups: Set[str]) -> None:
+    # Templates are filled with format_map at the end of a block: a field
+    # it cannot fill must be reported now, not raised partway through a log.
+    if not isinstance(template, str):
+        raise RuleError(f"rule {name!r}: {field!r} must be a string template")
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError as exc:
+        raise RuleError(f"rule {name!r}: bad {field!r} template: {exc}") from None
+    for _, key, spec, conversion in parsed:
+        if key is None:
+            continue
+        try:
+            # Every field is filled with a string.
+            format("", spec or "")
+            if conversion not in (None, "r", "s", "a"):
+                raise ValueError(f"unknown conversion !{conversion}")
+        except ValueError as exc:
+            raise RuleError(f"rule {name!r}: bad {field!r} template: {exc}") from None
+        if not key.isidentifier():
+            raise RuleError(
+                f"rule {name!r}: {field!r} template field {{{key}}} must be "
+                "a named group, 'first' or 'last'"
+            )
+        if key not in groups:
+            raise RuleError(
+                f"rule {name!r}: {field!r} template uses {{{key}}}, which is "
+                "not a named group of its patterns"
+            )
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _normalize(raw: Any, index: int) -> Dict[str, Any]:
+    # Validates one rule as read from the file and fills in defaults; the
+    # result is what the cache stores.
+    name = f"rule{index}"
+    if not isinstance(raw, dict):
+        raise RuleError(f"rule {name!r}: must be a table/object, not {raw!r}")
+    name = raw.get("name") or name
+    start = raw.get("start")
+    if not isinstance(start, str) or not start:
+        raise RuleError(f"rule {name!r}: 'start' must be a non-empty regex")
+    for key in ("start", "continue", "end"):
+        if raw.get(key) is not None:
+            try:
+                re.compile(raw[key])
+            except re.error as exc:
+                raise RuleError(f"rule {name!r}: bad {key!r} regex: {exc}") from None
+    level = str(raw.get("level", "ERROR")).upper()
+    if level not in ("ERROR", "WARNING"):
+        raise RuleError(f"rule {name!r}: level must be ERROR or WARNING")
+    capture = raw.get("capture", "first")
+    if capture not in ("first", "last"):
+        raise RuleError(f"rule {name!r}: capture must be 'first' or 'last'")
+    incomplete = raw.get("incomplete", "emit")
+    if incomplete not in ("emit", "drop"):
+        raise RuleError(f"rule {name!r}: incomplete must be 'emit' or 'drop'")
+    ignorecase = raw.get("ignorecase", False)
+    if not isinstance(ignorecase, bool):
+        raise RuleError(f"rule {name!r}: ignorecase must be true or false")
+    priority = raw.get("priority", 0)
+    if not _is_int(priority):
+        raise RuleError(f"rule {name!r}: priority must be an integer")
+    max_lines = raw.get("max_lines", DEFAULT_MAX_LINES)
+    if not _is_int(max_lines) or max_lines < 1:
+        raise RuleError(f"rule {name!r}: max_lines must be a positive integer")
+    keywords = raw.get("keywords", [])
+    if not isinstance(keywords, list) or not all(
+        isinstance(keyword, str) for keyword in keywords
+    ):
+        raise RuleError(f"rule {name!r}: keywords must be a list of strings")
+
+    anchored = False
+    if not keywords:
+        prefix, anchored = _literal_prefix(start)
+        keywords = [prefix] if prefix else []
+        anchored = anchored and bool(prefix)
+    if ignorecase:
+        keywords = [keyword.lower() for keyword in keywords]
+
+    event = {
+        "level": level,
+        "type": raw.get("type", name),
+        "message": raw.get("message", "{first}"),
+        "file": raw.get("file"),
+        "line": raw.get("line"),
+        "function": raw.get("function"),
+    }
+    groups = {"first", "last"}
+    for key in ("start", "continue", "end"):
+        if raw.get(key) is not None:
+            groups.update(re.compile(raw[key]).groupindex)
+    for field, template in event.items():
+        if template is not None:
+            _check_template(name, field, template, groups)
+    return {
+        "name": name,
+        "priority": priority,
+        "event": event,
+        "start": start,
+        "continue": raw.get("continue"),
+        "end": raw.get("end"),
+        "capture": capture,
+        "incomplete": incomplete,
+        "max_lines": max_lines,
+        "ignorecase": ignorecase,
+        "keywords": keywords,
+        "anchored": anchored,
+    }
+
+
+class RuleSet:
+    def __init__(self, specs: Sequence[Dict[str, Any]]) -> None:
+        # Highest priority first; file order breaks ties.
+        self.rules = sorted(
+            (Rule(spec) for spec in specs), key=lambda rule: -rule.priority
+        )
+        self._unfiltered = [rule for rule in self.rules if not rule.keywords]
+        # Cheap checks telling whether any rule's literal is on the line at
+        # all; most lines of a log match none and only pay for these.
+        prefixes: Set[str] = set()
+        literals: Set[str] = set()
+        folded: Set[str] = set()
+        for rule in self.rules:
+            if rule.ignorecase:
+                folded.update(rule.keywords)
+            elif rule.anchored:
+                prefixes.update(rule.keywords)
+            else:
+                literals.update(rule.keywords)
+        # Anchored prefixes are bucketed on their first few characters so a
+        # line is only compared with the prefixes it can possibly start with.
+        self._head_size = min((len(prefix) for prefix in prefixes), default=0)
+        buckets: Dict[str, List[str]] = {}
+        for prefix in sorted(prefixes):
+            buckets.setdefault(prefix[: self._head_size], []).append(prefix)
+        self._heads = {head: tuple(group) for head, group in buckets.items()}
+        self._gate = _literal_gate(literals, 0)
+        self._folded_gate = _literal_gate(folded, re.IGNORECASE)
+
+    def start(self, line: str) -> Optional[Tuple[Rule, "re.Match[str]"]]:
+        heads = self._heads.get(line[: self._head_size]) if self._heads else None
+        if (
+            (heads is not None and line.startswith(heads))
+            or (self._gate is not None and self._gate.search(line) is not None)
+            or (
+                self._folded_gate is not None
+                and self._folded_gate.search(line) is not None
+            )
+        ):
+            candidates = self.rules
+        elif self._unfiltered:
+            candidates = self._unfiltered
+        else:
+            return None
+        lowered = line.lower()
+        for rule in candidates:
+            if rule.accepts(line, lowered):
+                match = rule.start.search(line)
+                if match is not None:
+                    return rule, match
+        return None
+
+
+def _literal_gate(literals: Set[str], flags: int) -> Optional["re.Pattern[str]"]:
+    if not literals:
+        return None
+    alternatives = "|".join(re.escape(literal) for literal in sorted(literals))
+    return re.compile(alternatives, flags)
+
+
+class _Fields(Dict[str, str]):
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+class _Block:
+    __slots__ = ("rule", "fields", "lines")
+
+    def __init__(self, rule: Rule, fields: _Fields) -> None:
+        self.rule = rule
+        self.fields = fields
+        self.lines = 1
+
+
+def _merge_groups(fields: _Fields, match: "re.Match[str]", overwrite: bool) -> None:
+    for key, value in match.groupdict().items():
+        if value is not None and (overwrite or not fields.get(key)):
+            fields[key] = value
+
+
+class RuleRunner:
+    # Per-analyzer state for one RuleSet: at most one multi-line block is
+    # open at a time, and its continue/end patterns are tried before any
+    # rule can start a new one.
+    def __init__(self, rules: RuleSet, record: Record) -> None:
+        self._rules = rules
+        self._record = record
+        self._block: Optional[_Block] = None
+
+    def process(self, line: str) -> bool:
+        block = self._block
+        if block is not None:
+            rule = block.rule
+            if rule.end is not None:
+                match = rule.end.search(line)
+                if match is not None:
+                    _merge_groups(block.fields, match, True)
+                    block.fields["last"] = line.strip()
+                    self._close(emit=True)
+                    return True
+            if rule.cont is not None and block.lines < rule.max_lines:
+                match = rule.cont.search(line)
+                if match is not None:
+                    _merge_groups(block.fields, match, rule.capture == "last")
+                    block.fields["last"] = line.strip()
+                    block.lines += 1
+                    return True
+            self._close(emit=rule.incomplete == "emit")
+
+        found = self._rules.start(line)
+        if found is None:
+            return False
+        rule, match = found
+        fields = _Fields(first=line.strip(), last=line.strip())
+        _merge_groups(fields, match, True)
+        self._block = _Block(rule, fields)
+        if not rule.multiline:
+            self._close(emit=True)
+        return True
+
+    def finalize(self) -> None:
+        if self._block is not None:
+            self._close(emit=self._block.rule.incomplete == "emit")
+
+    def _close(self, emit: bool) -> None:
+        block = self._block
+        assert block is not None
+        self._block = None
+        if not emit:
+            return
+        values = {
+            field: template.format_map(block.fields).strip() if template else None
+            for field, template in block.rule.event.items()
+        }
+        line = values["line"]
+        self._record(
+            values["level"],
+            values["type"] or block.rule.name,
+            values["message"] or block.fields["first"],
+            values["file"] or None,
+            int(line) if line and line.isdigit() else None,
+            values["function"] or None,
+        )
+
+
+def _read_rule_file(path: str, data: bytes) -> List[Dict[str, Any]]:
+    import json
+
+    if path.endswith(".toml"):
+        # Only imported for TOML files, and missing before Python 3.11 unless
+        # tomli is installed.
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib  # type: ignore[no-redef]
+            except ImportError:
+                raise RuleError(
+                    f"{path}: TOML rule files need Python 3.11+ or tomli"
+                ) from None
+        try:
+            document = tomllib.loads(data.decode("utf-8"))
+        except ValueError as exc:
+            raise RuleError(f"{path}: {exc}") from None
+    else:
+        try:
+            document = json.loads(data.decode("utf-8"))
+        except ValueError as exc:
+            raise RuleError(f"{path}: {exc}") from None
+    rules = document.get("rules") if isinstance(document, dict) else None
+    if not isinstance(rules, list):
+        raise RuleError(f"{path}: expected a top-level 'rules' list")
+    return rules
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "logforge", "rules")
+
+
+def load_rules(paths: Sequence[str], cache_dir: Optional[str] = None) -> RuleSet:
+    # The validated, normalized form of each file is cached under a name
+    # derived from its contents, so unchanged rule files skip parsing and
+    # validation on the next start.
+    import hashlib
+    import json
+
+    cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+    specs: List[Dict[str, Any]] = []
+    for path in paths:
+        with open(path, "rb") as handle:
+            data = handle.read()
+        digest = hashlib.sha256(data + f"\0{ENGINE_VERSION}".encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{digest}.json")
+        try:
+            with open(cache_path, "r", encoding="utf-8") as handle:
+                specs.extend(json.load(handle))
+            continue
+        except (OSError, ValueError):
+            pass
+        normalized = [
+            _normalize(raw, index)
+            for index, raw in enumerate(_read_rule_file(path, data))
+        ]
+        specs.extend(normalized)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(normalized, handle)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # caching is best effort
+    return RuleSet(specs)
@@ -1,35 +1,159 @@
-import selectors
-import subprocess
+import asyncio
+import queue
 import sys
-from typing import List
+import threading
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
 
 from .analyzer import Analyzer
+from .reader import LineSplitter
 
+READ_SIZE = 1 << 16
+FLUSH_SIZE = 1 << 16
+FLUSH_INTERVAL = 0.05
+QUEUE_SIZE = 256
+
+_Chunk = Optional[Tuple[int, int, bytes]]
+
+
+class _BatchedWriter:
+    # Passthrough output is collected and written once it reaches FLUSH_SIZE
+    # or when the periodic flush runs, instead of one write+flush per read.
+    def __init__(self, output: BinaryIO) -> None:
+        self._output = output
+        self._pending = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._pending += data
+        if len(self._pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._output.write(self._pending)
+            self._pending.clear()
+            self._output.flush()
+
+
+def _analyze_chunks(
+    chunks: "queue.Queue[_Chunk]", analyzers: Sequence[Analyzer]
+) -> None:
+    # Runs on its own thread so regex work never delays reading the pipes;
+    # an empty chunk marks the end of one stream and None the end of the run.
+    splitters: Dict[Tuple[int, int], LineSplitter] = {}
+    while True:
+        item = chunks.get()
+        if item is None:
+            return
+        index, stream, chunk = item
+        splitter = splitters.setdefault((index, stream), LineSplitter())
+        if chunk:
+            analyzers[index].process_lines(splitter.feed(chunk))
+        else:
+            analyzers[index].process_lines(splitter.flush())
+
+
+async def _enqueue(chunks: "queue.Queue[_Chunk]", item: _Chunk) -> None:
+    try:
+        chunks.put_nowait(item)
+    except queue.Full:
+        # Reading only waits once analysis is QUEUE_SIZE chunks behind.
+        await asyncio.get_running_loop().run_in_executor(None, chunks.put, item)
+
+
+async def _pump(
+    source: asyncio.StreamReader,
+    output: _BatchedWriter,
+    chunks: "queue.Queue[_Chunk]",
+    index: int,
+    stream: int,
+) -> None:
+    while True:
+        chunk = await source.read(READ_SIZE)
+        output.write(chunk)
+        await _enqueue(chunks, (index, stream, chunk))
+        if not chunk:
+            return
 
-def run_command(command: List[str], analyzer: Analyzer) -> int:
-    process = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1,
-    )
 
-    selector = selectors.DefaultSelector()
+async def _run(
+    command: Sequence[str],
+    index: int,
+    outputs: Tuple[_BatchedWriter, _BatchedWriter],
+    chunks: "queue.Queue[_Chunk]",
+    limit: Optional[asyncio.Semaphore],
+) -> int:
+    if limit is not None:
+        async with limit:
+            return await _run(command, index, outputs, chunks, None)
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
     assert process.stdout is not None
     assert process.stderr is not None
-    selector.register(process.stdout, selectors.EVENT_READ, (process.stdout, sys.stdout))
-    selector.register(process.stderr, selectors.EVENT_READ, (process.stderr, sys.stderr))
-
-    while selector.get_map():
-        for key, _ in selector.select():
-            stream, output = key.data
-            line = stream.readline()
-            if line == "":
-                selector.unregister(stream)
-                continue
-            output.write(line)
+    await asyncio.gather(
+        _pump(process.stdout, outputs[0], chunks, index, 0),
+        _pump(process.stderr, outputs[1], chunks, index, 1),
+    )
+    return await process.wait()
+
+
+async def _flush_periodically(outputs: Sequence[_BatchedWriter]) -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        for output in outputs:
+            output.flush()
+
+
+async def _run_all(
+    commands: Sequence[Sequence[str]],
+    analyzers: Sequence[Analyzer],
+    max_parallel: Optional[int],
+    stdout: BinaryIO,
+    stderr: BinaryIO,
+) -> List[int]:
+    limit = asyncio.Semaphore(max_parallel) if max_parallel else None
+    outputs = (_BatchedWriter(stdout), _BatchedWriter(stderr))
+    chunks: "queue.Queue[_Chunk]" = queue.Queue(QUEUE_SIZE)
+    worker = threading.Thread(target=_analyze_chunks, args=(chunks, analyzers))
+    worker.start()
+    flusher = asyncio.ensure_future(_flush_periodically(outputs))
+    try:
+        exit_codes = await asyncio.gather(
+            *(
+                _run(command, index, outputs, chunks, limit)
+                for index, command in enumerate(commands)
+            )
+        )
+    finally:
+        flusher.cancel()
+        for output in outputs:
             output.flush()
-            analyzer.process_line(line)
+        await _enqueue(chunks, None)
+        await asyncio.get_running_loop().run_in_executor(None, worker.join)
+    return list(exit_codes)
+
+
+def run_commands(
+    commands: Sequence[Sequence[str]],
+    analyzers: Sequence[Analyzer],
+    max_parallel: Optional[int] = None,
+    stdout: Optional[BinaryIO] = None,
+    stderr: Optional[BinaryIO] = None,
+) -> List[int]:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return asyncio.run(
+        _run_all(
+            commands,
+            analyzers,
+            max_parallel,
+            sys.stdout.buffer if stdout is None else stdout,
+            sys.stderr.buffer if stderr is None else stderr,
+        )
+    )
+
 
-    return process.wait()
+def run_command(command: List[str], analyzer: Analyzer) -> int:
+    return run_commands([command], [analyzer])[0]
@@ -0,0 +1,331 @@
+import asyncio
+import json
+import os
+import re
+import signal
+import socket
+import stat
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .analyzer import Analyzer
+from .reader import decode_lines
+
+# Received bytes are handed to the analyzer in batches: as soon as this much
+# is pending, or FLUSH_INTERVAL after the first pending message.
+BATCH_BYTES = 1 << 18
+FLUSH_INTERVAL = 0.05
+TICK_INTERVAL = 1.0
+# A TCP peer sending more than this without a newline (or in one
+# octet-counted frame) is disconnected.
+MAX_MESSAGE = 1 << 20
+UDP_RECEIVE_BUFFER = 1 << 23
+# Datagrams read per wakeup at most, so TCP peers and HTTP still get a turn.
+DRAIN_LIMIT = 4096
+
+# Headers are rewritten over a whole batch, the way rsyslog writes files:
+# RFC 5424 "<PRI>1 TIMESTAMP HOST APP PROCID MSGID SD MSG" becomes
+# "TIMESTAMP HOST APP[PROCID]: MSG" and RFC 3164 just loses its "<PRI>".
+_SD = rb"(?:-|(?:\[(?:[^\]\\]|\\.)*\])+)"
+_RFC5424_NO_PID_RE = re.compile(
+    rb"^<\d{1,3}>1 (\S+) (\S+) (\S+) - \S+ " + _SD + rb" ?(?:\xef\xbb\xbf)?",
+    re.MULTILINE,
+)
+_RFC5424_RE = re.compile(
+    rb"^<\d{1,3}>1 (\S+) (\S+) (\S+) (\S+) \S+ " + _SD + rb" ?(?:\xef\xbb\xbf)?",
+    re.MULTILINE,
+)
+_PRI_RE = re.compile(rb"^<\d{1,3}>", re.MULTILINE)
+
+
+def to_lines(data: bytes) -> bytes:
+    data = _RFC5424_NO_PID_RE.sub(rb"\1 \2 \3: ", data)
+    data = _RFC5424_RE.sub(rb"\1 \2 \3[\4]: ", data)
+    return _PRI_RE.sub(b"", data)
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"invalid address {value!r}, expected HOST:PORT")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def _remove_stale_socket(path: str) -> None:
+    # A socket left behind by a server that is gone is replaced; anything
+    # else at the path (a file, or a socket still in use) is an error.
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise OSError(f"{path} exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise OSError(f"{path} is in use by another process")
+
+
+class _Datagrams:
+    # asyncio's datagram transport reads one datagram per loop iteration;
+    # this reader drains the socket on every wakeup instead, so a burst
+    # becomes a single add() and the kernel buffer empties quickly.
+    def __init__(self, server: "SyslogServer", sock: socket.socket) -> None:
+        self._server = server
+        self._sock = sock
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER)
+        except OSError:
+            pass
+
+    def read(self) -> None:
+        recv = self._sock.recv
+        datagrams = []
+        for _ in range(DRAIN_LIMIT):
+            try:
+                data = recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                continue
+            datagrams.append(data if data[-1:] == b"\n" else data + b"\n")
+        if datagrams:
+            self._server.add(b"".join(datagrams), len(datagrams))
+
+
+class _Stream(asyncio.Protocol):
+    # RFC 6587 framing, chosen by the first byte of the connection: a digit
+    # means octet counting ("LEN MSG"), anything else newline-terminated
+    # messages, which are passed on in whole chunks.
+    def __init__(self, server: "SyslogServer") -> None:
+        self._server = server
+        self._buffer = b""
+        self._counted: Optional[bool] = None
+        self._transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport  # type: ignore[assignment]
+
+    def data_received(self, data: bytes) -> None:
+        data = self._buffer + data
+        if self._counted is None:
+            self._counted = data[:1].isdigit()
+        if self._counted:
+            data = self._frames(data)
+        else:
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                self._server.add(data[:cut], data.count(b"\n", 0, cut))
+                data = data[cut:]
+        if len(data) > MAX_MESSAGE:
+            assert self._transport is not None
+            self._transport.close()
+            data = b""
+        self._buffer = data
+
+    def _frames(self, data: bytes) -> bytes:
+        messages = []
+        pos = 0
+        while True:
+            space = data.find(b" ", pos, pos + 10)
+            if space < 0 or not data[pos:space].isdigit():
+                break
+            end = space + 1 + int(data[pos:space])
+            if end > len(data):
+                break
+            message = data[space + 1 : end]
+            messages.append(message if message[-1:] == b"\n" else message + b"\n")
+            pos = end
+        if messages:
+            self._server.add(b"".join(messages), len(messages))
+        return data[pos:]
+
+    def eof_received(self) -> Optional[bool]:
+        if self._buffer:
+            self.data_received(b"\n" if not self._counted else b"")
+        return None
+
+
+class SyslogServer:
+    # Receives syslog over UDP, TCP and Unix datagram sockets into one
+    # analyzer. Batches are analyzed on the event loop itself, so a TCP
+    # peer is not read from meanwhile and TCP flow control slows it down;
+    # UDP has no such back-pressure, its socket gets a large receive buffer.
+    def __init__(
+        self,
+        analyzer: Analyzer,
+        render: Callable[[], str],
+        tick: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.analyzer = analyzer
+        self._render = render
+        # Called every TICK_INTERVAL while serving, even when no message
+        # comes in (--ndjson writes its pending count deltas from it).
+        self._tick = tick
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tick_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        # Path -> (device, inode) of the sockets this server bound.
+        self._unix_paths: Dict[str, Tuple[int, int]] = {}
+        self.addresses: Dict[str, List[Any]] = {}
+        self.stats: Dict[str, int] = {"messages": 0, "bytes": 0, "batches": 0}
+
+    def add(self, data: bytes, messages: int) -> None:
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        self.stats["messages"] += messages
+        self.stats["bytes"] += len(data)
+        if self._pending_bytes >= BATCH_BYTES:
+            self.flush()
+        elif self._flush_handle is None and self._loop is not None:
+            self._flush_handle = self._loop.call_later(FLUSH_INTERVAL, self.flush)
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        data = b"".join(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+        self.analyzer.process_lines(decode_lines(to_lines(data)))
+        self.stats["batches"] += 1
+
+    def run(
+        self,
+        udp: Sequence[Tuple[str, int]] = (),
+        tcp: Sequence[Tuple[str, int]] = (),
+        unix: Sequence[str] = (),
+        http: Optional[Tuple[str, int]] = None,
+        ready: Optional[threading.Event] = None,
+    ) -> None:
+        asyncio.run(self._main(udp, tcp, unix, http, ready))
+
+    def stop(self) -> None:
+        # Safe to call from any thread (and from signal handlers).
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def _main(
+        self,
+        udp: Sequence[Tuple[str, int]],
+        tcp: Sequence[Tuple[str, int]],
+        unix: Sequence[str],
+        http: Optional[Tuple[str, int]],
+        ready: Optional[threading.Event],
+    ) -> None:
+        loop = self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        readers: List[int] = []
+        closers: List[Any] = []
+        try:
+            for host, port in udp:
+                family = socket.AF_INET6 if ":" in host else socket.AF_INET
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                closers.append(sock)
+                sock.bind((host, port))
+                loop.add_reader(sock.fileno(), _Datagrams(self, sock).read)
+                readers.append(sock.fileno())
+                self._bound("udp", sock.getsockname())
+            for path in unix:
+                _remove_stale_socket(path)
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                closers.append(sock)
+                sock.bind(path)
+                info = os.lstat(path)
+                self._unix_paths[path] = (info.st_dev, info.st_ino)
+                loop.add_reader(sock.fileno(), _Datagrams(self, sock).read)
+                readers.append(sock.fileno())
+                self._bound("unix", path)
+            for host, port in tcp:
+                server = await loop.create_server(lambda: _Stream(self), host, port)
+                closers.append(server)
+                for sock in server.sockets:
+                    self._bound("tcp", sock.getsockname())
+            if http is not None:
+                server = await asyncio.start_server(self._http, *http)
+                closers.append(server)
+                for sock in server.sockets:
+                    self._bound("http", sock.getsockname())
+            if threading.current_thread() is threading.main_thread():
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    loop.add_signal_handler(signum, self._stop.set)
+            if self._tick is not None:
+                self._tick_handle = loop.call_later(TICK_INTERVAL, self._on_tick)
+            if ready is not None:
+                ready.set()
+            await self._stop.wait()
+        finally:
+            if self._tick_handle is not None:
+                self._tick_handle.cancel()
+                self._tick_handle = None
+            for fd in readers:
+                loop.remove_reader(fd)
+            for closer in closers:
+                closer.close()
+            for path, identity in self._unix_paths.items():
+                # Only the socket bound here, not whatever replaced it since.
+                try:
+                    info = os.lstat(path)
+                except FileNotFoundError:
+                    continue
+                if (info.st_dev, info.st_ino) == identity:
+                    os.remove(path)
+            self._unix_paths = {}
+            self.flush()
+            self._loop = None
+            if ready is not None:
+                ready.set()
+
+    def _on_tick(self) -> None:
+        assert self._tick is not None and self._loop is not None
+        self.flush()
+        self._tick()
+        self._tick_handle = self._loop.call_later(TICK_INTERVAL, self._on_tick)
+
+    def _bound(self, kind: str, address: Any) -> None:
+        self.addresses.setdefault(kind, []).append(address)
+
+    async def _http(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # GET /events: the report as JSON, GET /stats: ingest counters.
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        method, _, rest = request.decode("latin-1").partition(" ")
+        path = rest.partition(" ")[0].partition("?")[0]
+        status = "200 OK"
+        if method != "GET":
+            status, body = "405 Method Not Allowed", '{"error": "GET only"}'
+        elif path == "/events":
+            self.flush()
+            body = self._render()
+        elif path == "/stats":
+            body = json.dumps(
+                {**self.stats, "events": len(self.analyzer.get_events())}
+            )
+        else:
+            status, body = "404 Not Found", '{"error": "try /events or /stats"}'
+        payload = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode(
+                "ascii"
+            )
+            + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,151 @@
+import calendar
+import re
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+RING_MINUTES = 60
+MINUTE_CACHE_SIZE = 4096
+
+_MONTHS = {
+    name: index
+    for index, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun")
+        + ("Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        1,
+    )
+}
+_SYSLOG_MINUTE_RE = re.compile(r"([A-Z][a-z]{2}) ([ \d]?\d) (\d\d):(\d\d)")
+_ISO_MINUTE_RE = re.compile(r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)")
+
+
+class TimestampParser:
+    # Seconds since the epoch (timestamps taken as UTC) from the start of a
+    # line: "Jan 12 10:00:03" (syslog, year assumed) or "2024-01-12T10:00:03"
+    # / "2024-01-12 10:00:03" (ISO 8601, fraction and zone ignored), after an
+    # optional "<PRI>" or "[". Neighbouring lines share their minute, so the
+    # minute prefix is looked up in a cache and only the seconds are parsed.
+    def __init__(self, year: Optional[int] = None) -> None:
+        self._year = time.gmtime().tm_year if year is None else year
+        self._minutes: Dict[str, Optional[int]] = {}
+
+    def parse(self, line: str) -> Optional[int]:
+        start = 0
+        if line[:1] == "<":
+            start = line.find(">", 1, 6) + 1
+        elif line[:1] == "[":
+            start = 1
+        head = line[start : start + 19]
+        if head[12:13] == ":" and head[3:4] == " ":
+            prefix, seconds = head[:12], head[13:15]
+        elif head[13:14] == ":" and head[4:5] == "-":
+            prefix, seconds = head[:16], head[17:19]
+        else:
+            return None
+        minute = self._minutes.get(prefix, -1)
+        if minute == -1:
+            minute = self._minute(prefix)
+            if len(self._minutes) >= MINUTE_CACHE_SIZE:
+                self._minutes.clear()
+            self._minutes[prefix] = minute
+        if minute is None or not seconds.isdigit():
+            return None
+        return minute * 60 + int(seconds)
+
+    def _minute(self, prefix: str) -> Optional[int]:
+        match = _SYSLOG_MINUTE_RE.fullmatch(prefix)
+        if match is not None:
+            year = self._year
+            month = _MONTHS.get(match.group(1), 0)
+            day, hour, minute = (int(group) for group in match.groups()[1:])
+        else:
+            match = _ISO_MINUTE_RE.fullmatch(prefix)
+            if match is None:
+                return None
+            year, month, day, hour, minute = (int(group) for group in match.groups())
+        if not 1 <= month <= 12 or not 1 <= day <= 31 or hour > 23 or minute > 59:
+            return None
+        return calendar.timegm((year, month, day, hour, minute, 0)) // 60
+
+
+class Timeline:
+    # First/last seen and per-minute counts of one event. An event seen in a
+    # single minute keeps one counter; the ring of the last RING_MINUTES
+    # minutes is only allocated once it spans more. The peak minute is kept
+    # over the whole run, including minutes that have left the ring.
+    __slots__ = ("first", "last", "minute", "count", "ring", "peak", "peak_minute")
+
+    def __init__(self, second: int) -> None:
+        self.first = second
+        self.last = second
+        self.minute = second // 60
+        self.count = 0
+        self.ring: Optional["array[int]"] = None
+        self.peak = 0
+        self.peak_minute = self.minute
+
+    def add(self, second: int) -> None:
+        if second > self.last:
+            self.last = second
+        elif second < self.first:
+            self.first = second
+        minute = second // 60
+        if minute == self.minute and self.ring is None:
+            count = self.count = self.count + 1
+            if count > self.peak:
+                self.peak = count
+                self.peak_minute = minute
+            return
+        self.add_minute(minute, 1)
+
+    def add_minute(self, minute: int, count: int) -> None:
+        if self.ring is None:
+            if minute == self.minute:
+                self.count += count
+                self._update_peak(minute, self.count)
+                return
+            self.ring = array("I", bytes(4 * RING_MINUTES))
+            self.ring[self.minute % RING_MINUTES] = self.count
+        ring = self.ring
+        head = self.minute
+        if minute > head:
+            for stale in range(max(head + 1, minute - RING_MINUTES + 1), minute + 1):
+                ring[stale % RING_MINUTES] = 0
+            self.minute = minute
+        elif minute <= head - RING_MINUTES:
+            return
+        slot = minute % RING_MINUTES
+        ring[slot] += count
+        self._update_peak(minute, ring[slot])
+
+    def _update_peak(self, minute: int, count: int) -> None:
+        if count > self.peak:
+            self.peak = count
+            self.peak_minute = minute
+
+    def per_minute(self) -> List[Tuple[int, int]]:
+        if self.ring is None:
+            return [(self.minute, self.count)]
+        first = self.minute - RING_MINUTES + 1
+        return [
+            (minute, self.ring[minute % RING_MINUTES])
+            for minute in range(first, self.minute + 1)
+            if self.ring[minute % RING_MINUTES]
+        ]
+
+    def merge(self, other: "Timeline") -> None:
+        self.first = min(self.first, other.first)
+        self.last = max(self.last, other.last)
+        for minute, count in other.per_minute():
+            self.add_minute(minute, count)
+        if other.peak > self.peak:
+            self.peak = other.peak
+            self.peak_minute = other.peak_minute
+
+
+def format_time(second: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(second))
+
+
+def format_minute(minute: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.gmtime(minute * 60))
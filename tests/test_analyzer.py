@@ -1,6 +1,10 @@
+import io
+import os
+import tempfile
 import unittest
 
-from logforge.analyzer import Analyzer
+from logforge.analyzer import SNIPPET_LINE_LIMIT, Analyzer
+from logforge.reader import map_file
 
 
 class AnalyzerTests(unittest.TestCase):
@@ -68,6 +72,154 @@ class AnalyzerTests(unittest.TestCase):
         event = events[0]
         self.assertEqual(event.type, "SIGABRT")
 
+    def test_noise_line_resolves_pending_signal(self) -> None:
+        analyzer = Analyzer()
+        analyzer.process_line("Program received signal SIGSEGV, Segmentation fault.\n")
+        analyzer.process_line("nothing interesting here\n")
+        events = analyzer.get_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].type, "SIGSEGV")
+        self.assertIsNone(events[0].file)
+
+    def test_signal_takes_precedence_over_keyword(self) -> None:
+        analyzer = Analyzer()
+        analyzer.process_line("ERROR: Program received signal SIGABRT\n")
+        analyzer.finalize()
+        events = analyzer.get_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].type, "SIGABRT")
+
+    def test_non_ascii_case_folded_keyword(self) -> None:
+        analyzer = Analyzer()
+        analyzer.process_line("disk warnıng: nearly full\n")
+        events = analyzer.get_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].type, "unknown_warning")
+
+    def test_repeated_lines_are_counted(self) -> None:
+        analyzer = Analyzer()
+        for _ in range(3):
+            analyzer.process_line("main.c:10:5: warning: unused variable 'x'\n")
+            analyzer.process_line("ERROR: disk full\n")
+        analyzer.process_line("SIGSEGV\n")
+        analyzer.process_line("ERROR: disk full\n")
+        analyzer.finalize()
+        counts = {e.type: e.occurrences for e in analyzer.get_events()}
+        self.assertEqual(
+            counts, {"compiler_warning": 3, "unknown_error": 4, "SIGSEGV": 1}
+        )
+
+    def test_process_buffer_matches_process_lines(self) -> None:
+        data = (
+            "boot ok\r\n"
+            "Traceback (most recent call last):\n"
+            '  File "/tmp/app.py", line 42, in run\n'
+            "ValueError: bad\n"
+            "caf\u00e9 noise\n"
+            "Program received signal SIGSEGV, Segmentation fault.\n"
+            "#0  main () at main.c:12\n"
+            "plain noise\n"
+            "ERROR: disk full"
+        ).encode("utf-8")
+        expected = Analyzer(context_lines=3)
+        expected.process_lines(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+        analyzer = Analyzer(context_lines=3)
+        analyzer.process_buffer(data)
+        self.assertEqual(analyzer.get_events(), expected.get_events())
+        self.assertEqual(
+            analyzer.get_recent_context(), expected.get_recent_context()
+        )
+        # Snippets need every line, read from the mapping in slices.
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "wb") as handle:
+                handle.write(data)
+            with_snippets = Analyzer(context_lines=3, snippet_lines=1)
+            with map_file(path) as mapped:
+                with_snippets.process_buffer(mapped)
+        self.assertEqual(with_snippets.get_events(), expected.get_events())
+
+    def test_bounded_table_keeps_heavy_hitters(self) -> None:
+        analyzer = Analyzer(max_events=16)
+        for i in range(2000):
+            analyzer.process_line(f"ERROR: request {i} timed out\n")
+            if i % 4 == 0:
+                analyzer.process_line("ERROR: disk full\n")
+            if i % 10 == 0:
+                analyzer.process_line("WARNING: slow query\n")
+        events = {e.message: e for e in analyzer.get_events()}
+        overcount = analyzer.get_overcounts()
+        bound = analyzer.get_error_bound()
+        self.assertLessEqual(len(events), 16)
+        self.assertGreater(bound, 0)
+        for message, true_count in (
+            ("ERROR: disk full", 500),
+            ("WARNING: slow query", 200),
+        ):
+            event = events[message]
+            extra = overcount.get(event.key(), 0)
+            self.assertLessEqual(extra, bound)
+            self.assertLessEqual(event.occurrences - extra, true_count)
+            self.assertGreaterEqual(event.occurrences, true_count)
+
+    def test_merge_of_bounded_analyzers_keeps_bounds(self) -> None:
+        left, right = Analyzer(max_events=4), Analyzer(max_events=4)
+        for i in range(20):
+            left.process_line(f"ERROR: left {i}\n")
+            left.process_line("ERROR: shared\n")
+            right.process_line(f"ERROR: right {i}\n")
+        left.merge(right.get_events(), right.get_overcounts(), right.get_error_bound())
+        shared = next(e for e in left.get_events() if e.message == "ERROR: shared")
+        extra = left.get_overcounts().get(shared.key(), 0)
+        self.assertLessEqual(shared.occurrences - extra, 20)
+        self.assertGreaterEqual(shared.occurrences, 20)
+        self.assertLessEqual(len(left.get_events()), 4)
+
+    def test_unbounded_analyzer_reports_no_error_bound(self) -> None:
+        analyzer = Analyzer()
+        analyzer.process_line("ERROR: disk full\n")
+        self.assertIsNone(analyzer.get_error_bound())
+        self.assertEqual(analyzer.get_overcounts(), {})
+
+    def test_snippet_keeps_first_occurrence_context(self) -> None:
+        analyzer = Analyzer(snippet_lines=2)
+        long_line = "x" * (SNIPPET_LINE_LIMIT + 10)
+        analyzer.process_lines(
+            [
+                "boot\n",
+                long_line + "\n",
+                "ERROR: disk full\n",
+                "retrying\n",
+                "ERROR: disk full\n",
+                "giving up\n",
+            ]
+        )
+        analyzer.finalize()
+        [event] = analyzer.get_events()
+        snippets = analyzer.get_snippets()
+        assert snippets is not None
+        snippet = snippets[event.key()]
+        self.assertEqual(snippet.before, ("boot", "x" * SNIPPET_LINE_LIMIT))
+        self.assertEqual(snippet.line, "ERROR: disk full")
+        # The repeat does not replace the first occurrence's snippet.
+        self.assertEqual(snippet.after, ("retrying", "ERROR: disk full"))
+        self.assertIsNone(Analyzer().get_snippets())
+
+    def test_snippets_share_lines_and_survive_merge(self) -> None:
+        left, right = Analyzer(snippet_lines=1), Analyzer(snippet_lines=1)
+        left.process_lines(["ERROR: one\n", "ERROR: two\n"])
+        right.process_lines(["before\n", "ERROR: two\n", "ERROR: three\n"])
+        snippets = left.get_snippets()
+        assert snippets is not None
+        one, two = (snippets[event.key()] for event in left.get_events())
+        self.assertIs(one.after[0], two.line)
+        left.merge(right.get_events(), snippets=right.get_snippets())
+        merged = left.get_snippets()
+        assert merged is not None
+        by_message = {key.message: snippet for key, snippet in merged.items()}
+        self.assertEqual(by_message["ERROR: two"].before, ("ERROR: one",))
+        self.assertEqual(by_message["ERROR: three"].before, ("ERROR: two",))
+
 
 if __name__ == "__main__":
     unittest.main()
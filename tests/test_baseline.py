@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from typing import List
+
+from logforge.baseline import (
+    BLOCK,
+    Baseline,
+    BaselineError,
+    diff,
+    fingerprint,
+    summarize,
+    write_baseline,
+)
+from logforge.cli import main
+from logforge.model import Event, EventKey
+
+
+def _word(number: int) -> str:
+    # Distinct messages that --normalize would not turn into one template.
+    return "".join("ghijklmnop"[int(digit)] for digit in str(number))
+
+
+def _key(message: str, line: int = 1, file: str = "src/a.c") -> EventKey:
+    return Event("ERROR", "compiler_error", message, file, line).key()
+
+
+class BaselineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "base.lfb")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_fingerprint_ignores_volatile_parts(self) -> None:
+        self.assertEqual(
+            fingerprint(_key("timeout after 35ms", 10, "build-17/a.c")),
+            fingerprint(_key("timeout after 120ms", 42, "build-18/a.c")),
+        )
+        self.assertEqual(
+            fingerprint(_key("timeout after 35ms")),
+            fingerprint(_key("timeout after <*>")),
+        )
+        self.assertNotEqual(
+            fingerprint(_key("x undeclared")), fingerprint(_key("y undeclared"))
+        )
+        self.assertNotEqual(
+            fingerprint(_key("x undeclared")),
+            fingerprint(Event("WARNING", "compiler_error", "x undeclared").key()),
+        )
+        self.assertEqual(fingerprint(_key("x")), 0xF985B0EE1447384E)
+
+    def test_diff_reports_new_resolved_and_changed(self) -> None:
+        # More entries than a block of descriptions, resolved ones in several.
+        before = [
+            Event("ERROR", "t", f"message {_word(i)}", occurrences=2)
+            for i in range(BLOCK + 100)
+        ]
+        write_baseline(self.path, summarize(before))
+        after = [
+            Event("ERROR", "t", f"message {_word(i)}", occurrences=2 + (i == 7))
+            for i in range(1, BLOCK + 99)
+        ]
+        after.append(Event("ERROR", "t", "brand new"))
+        result = diff(summarize(after), Baseline(self.path))
+        self.assertEqual(result.totals, (1, 2, 1))
+        self.assertEqual([e.event.message for e in result.new], ["brand new"])
+        self.assertEqual(
+            sorted(e.event.message for e in result.resolved),
+            ["message g", f"message {_word(BLOCK + 99)}"],
+        )
+        (changed,) = result.changed
+        self.assertEqual(
+            (changed.entry.event.message, changed.before, changed.entry.occurrences),
+            ("message n", 2, 3),
+        )
+
+    def test_events_of_one_fingerprint_are_counted_together(self) -> None:
+        entries = summarize(
+            [
+                Event("ERROR", "compiler_error", "x undeclared", "a.c", 3, None, 2),
+                Event("ERROR", "compiler_error", "x undeclared", "a.c", 9, None, 5),
+            ]
+        )
+        (entry,) = entries.values()
+        self.assertEqual((entry.event.line, entry.occurrences), (9, 7))
+
+    def test_top_limits_entries_shown(self) -> None:
+        def events(prefix: str) -> List[Event]:
+            return [
+                Event("ERROR", "t", f"{prefix} {_word(i)}", occurrences=i)
+                for i in range(1, 9)
+            ]
+
+        write_baseline(self.path, summarize(events("old")))
+        after = events("new")
+        result = diff(summarize(after), Baseline(self.path), top=2)
+        self.assertEqual(result.totals, (8, 8, 0))
+        self.assertEqual([e.occurrences for e in result.new], [8, 7])
+        self.assertEqual([e.occurrences for e in result.resolved], [8, 7])
+
+    def test_invalid_files(self) -> None:
+        write_baseline(self.path, summarize([Event("ERROR", "t", "m")]))
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        with open(self.path, "wb") as handle:
+            handle.write(data[:-3])
+        with self.assertRaises(BaselineError):
+            Baseline(self.path)
+        with open(self.path, "wb") as handle:
+            handle.write(b"ERROR: not a baseline\n")
+        with self.assertRaises(BaselineError):
+            Baseline(self.path)
+        with self.assertRaises(BaselineError):
+            Baseline(os.path.join(self.tmp.name, "missing.lfb"))
+
+    def test_cli_baseline(self) -> None:
+        main_log = os.path.join(self.tmp.name, "main.log")
+        branch_log = os.path.join(self.tmp.name, "branch.log")
+        with open(main_log, "w", encoding="utf-8") as handle:
+            handle.write("src/a.c:10:5: error: x undeclared\nERROR: job 12 failed\n")
+        with open(branch_log, "w", encoding="utf-8") as handle:
+            handle.write("src/a.c:14:5: error: x undeclared\nERROR: disk full\n")
+        with redirect_stdout(io.StringIO()):
+            main(["analyze", main_log, "--write-baseline", self.path])
+            self.assertEqual(main(["analyze", main_log, "--baseline", self.path]), 0)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = main(["analyze", branch_log, "--baseline", self.path, "--json"])
+        self.assertEqual(status, 1)
+        payload = json.loads(out.getvalue())
+        self.assertEqual(payload["counts"], {"new": 1, "resolved": 1, "changed": 0})
+        self.assertEqual(payload["new"][0]["message"], "ERROR: disk full")
+        self.assertEqual(payload["resolved"][0]["message"], "ERROR: job 12 failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
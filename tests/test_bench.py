@@ -0,0 +1,44 @@
+import unittest
+
+from logforge.analyzer import Analyzer
+from logforge.bench import GENERATORS, generate, run_scenario
+from logforge.cli import _SCENARIOS
+
+
+class BenchTests(unittest.TestCase):
+    def test_generators_are_deterministic_and_sized(self) -> None:
+        for scenario in GENERATORS:
+            lines = generate(scenario, 4096, seed=1)
+            self.assertEqual(lines, generate(scenario, 4096, seed=1))
+            self.assertNotEqual(lines, generate(scenario, 4096, seed=2))
+            size = sum(len(line.encode("utf-8")) for line in lines)
+            self.assertGreaterEqual(size, 4096)
+            self.assertLess(size - len(lines[-1].encode("utf-8")), 4096)
+
+    def test_generators_exercise_their_rules(self) -> None:
+        expected = {
+            "compiler": {"compiler_warning", "compiler_error"},
+            "traceback": {"KeyError", "ValueError", "TimeoutError", "RuntimeError"},
+            "gdb": {"SIGSEGV", "SIGABRT", "SIGFPE"},
+            "syslog": {"unknown_error", "unknown_warning", "fatal"},
+            "noise": set(),
+        }
+        for scenario, types in expected.items():
+            analyzer = Analyzer()
+            analyzer.process_lines(generate(scenario, 1 << 16))
+            analyzer.finalize()
+            self.assertEqual({e.type for e in analyzer.get_events()}, types)
+
+    def test_cli_lists_every_scenario(self) -> None:
+        self.assertEqual(_SCENARIOS, tuple(GENERATORS))
+
+    def test_run_scenario_reports_metrics(self) -> None:
+        result = run_scenario("syslog", 1 << 14, repeat=1)
+        self.assertEqual(result["scenario"], "syslog")
+        self.assertGreater(result["lines_per_sec"], 0)
+        self.assertGreater(result["mb_per_sec"], 0)
+        self.assertIn("generic_level", result["rule_ns_per_line"])
+
+
+if __name__ == "__main__":
+    unittest.main()
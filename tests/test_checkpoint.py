@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from logforge.analyzer import Analyzer
+from logforge.checkpoint import analyze_incremental
+
+LINES = [
+    "ERROR: disk full\n",
+    "Traceback (most recent call last):\n",
+    '  File "/srv/app.py", line 10, in handler\n',
+    "KeyError: 'user'\n",
+    "Program received signal SIGSEGV, Segmentation fault.\n",
+    "#0  compute () at calc.c:128\n",
+    "ERROR: disk full\n",
+]
+
+
+def _snapshot(analyzer: Analyzer) -> list:
+    return [
+        (e.level, e.type, e.message, e.file, e.line, e.function, e.occurrences)
+        for e in analyzer.get_events()
+    ]
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, "app.log")
+        self.checkpoint = os.path.join(tmp.name, "app.ckpt")
+
+    def _write(self, text: str, mode: str = "a") -> None:
+        with open(self.source, mode, encoding="utf-8") as handle:
+            handle.write(text)
+
+    def test_resume_matches_full_run(self) -> None:
+        # Split inside the traceback and between the signal and its frame.
+        for split in (2, 5):
+            self._write("".join(LINES[:split]), "w")
+            analyze_incremental(self.source, self.checkpoint)
+            self._write("".join(LINES[split:]))
+            resumed = analyze_incremental(self.source, self.checkpoint)
+            expected = Analyzer()
+            expected.process_lines(LINES)
+            self.assertEqual(_snapshot(resumed), _snapshot(expected))
+            os.unlink(self.checkpoint)
+
+    def test_partial_last_line_is_reported_once(self) -> None:
+        self._write("ERROR: one\nERROR: tw")
+        first = analyze_incremental(self.source, self.checkpoint)
+        self.assertEqual(len(first.get_events()), 2)
+        self._write("o\n")
+        second = analyze_incremental(self.source, self.checkpoint)
+        counts = {e.message: e.occurrences for e in second.get_events()}
+        self.assertEqual(counts, {"ERROR: one": 1, "ERROR: two": 1})
+
+    def test_replaced_source_starts_over(self) -> None:
+        self._write("ERROR: old\n")
+        analyze_incremental(self.source, self.checkpoint)
+        self._write("ERROR: new\nERROR: new\n", "w")
+        analyzer = analyze_incremental(self.source, self.checkpoint)
+        counts = {e.message: e.occurrences for e in analyzer.get_events()}
+        self.assertEqual(counts, {"ERROR: new": 2})
+
+    def test_damaged_checkpoint_starts_over(self) -> None:
+        self._write("".join(LINES), "w")
+        analyze_incremental(self.source, self.checkpoint)
+        with open(self.checkpoint, encoding="utf-8") as handle:
+            saved = json.load(handle)
+        expected = Analyzer()
+        expected.process_lines(LINES)
+        damaged = [
+            {key: value for key, value in saved.items() if key != "offset"},
+            {**saved, "offset": "12"},
+            {**saved, "state": [False, None]},
+            {**saved, "state": [False, ["a.py"], None]},
+            {**saved, "events": [["ERROR", "x"]]},
+            {**saved, "events": [["NOTICE", *saved["events"][0][1:]]]},
+            {**saved, "context": [1]},
+            [saved],
+        ]
+        for payload in damaged:
+            with open(self.checkpoint, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle)
+            errors = io.StringIO()
+            with redirect_stderr(errors):
+                analyzer = analyze_incremental(self.source, self.checkpoint)
+            self.assertIn("is damaged", errors.getvalue())
+            self.assertEqual(_snapshot(analyzer), _snapshot(expected))
+        with open(self.checkpoint, "w", encoding="utf-8") as handle:
+            handle.write('{"version": ')
+        with redirect_stderr(io.StringIO()):
+            analyzer = analyze_incremental(self.source, self.checkpoint)
+        self.assertEqual(_snapshot(analyzer), _snapshot(expected))
+
+    def test_bounded_resume_keeps_error_bound(self) -> None:
+        self._write("".join(f"ERROR: job {i}\n" for i in range(40)))
+        first = analyze_incremental(self.source, self.checkpoint, max_events=8)
+        self._write("ERROR: job 0\n")
+        resumed = analyze_incremental(self.source, self.checkpoint, max_events=8)
+        expected = Analyzer(max_events=8)
+        with open(self.source, encoding="utf-8") as handle:
+            expected.process_lines(handle)
+        self.assertGreater(first.get_error_bound(), 0)
+        self.assertEqual(_snapshot(resumed), _snapshot(expected))
+        self.assertEqual(resumed.get_error_bound(), expected.get_error_bound())
+        self.assertEqual(resumed.get_overcounts(), expected.get_overcounts())
+
+
+if __name__ == "__main__":
+    unittest.main()
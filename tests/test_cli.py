@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+from logforge.cli import _COMMANDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupTests(unittest.TestCase):
+    def test_heavy_modules_are_not_imported_at_startup(self) -> None:
+        heavy = (
+            "asyncio",
+            "bz2",
+            "concurrent.futures",
+            "gzip",
+            "json",
+            "logforge.analyzer",
+            "logforge.bench",
+            "lzma",
+            "multiprocessing",
+            "random",
+            "subprocess",
+        )
+        code = (
+            "import sys, logforge.cli; "
+            f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+
+class WrapperTests(unittest.TestCase):
+    def test_syslog_wrapper_passes_every_subcommand_through(self) -> None:
+        with open(os.path.join(ROOT, "bin", "syslog"), encoding="utf-8") as handle:
+            script = handle.read()
+        match = re.search(r"^  (run\|[\w|-]+)\)$", script, re.MULTILINE)
+        assert match is not None
+        self.assertLessEqual(_COMMANDS, set(match.group(1).split("|")))
+
+
+if __name__ == "__main__":
+    unittest.main()
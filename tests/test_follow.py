@@ -0,0 +1,75 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.follow import Follower
+
+
+class FollowerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "syslog")
+        self.analyzer = Analyzer()
+        self.follower = Follower(self.path, self.analyzer)
+        self.addCleanup(self.follower.close)
+
+    def _append(self, text: str, path: str = "") -> None:
+        with open(path or self.path, "a", encoding="utf-8") as handle:
+            handle.write(text)
+
+    def _counts(self) -> dict:
+        return {e.message: e.occurrences for e in self.analyzer.get_events()}
+
+    def test_missing_file_is_waited_for(self) -> None:
+        self.assertEqual(self.follower.poll(), 0)
+        self._append("ERROR: one\n")
+        self.follower.poll()
+        self.assertEqual(self._counts(), {"ERROR: one": 1})
+
+    def test_reads_only_appended_complete_lines(self) -> None:
+        self._append("ERROR: one\n")
+        self.follower.poll()
+        self._append("ERROR: tw")
+        self.follower.poll()
+        self.assertEqual(self._counts(), {"ERROR: one": 1})
+        self._append("o\nERROR: one\n")
+        self.assertEqual(self.follower.poll(), len("o\nERROR: one\n"))
+        self.assertEqual(self._counts(), {"ERROR: one": 2, "ERROR: two": 1})
+
+    def test_rotation_drains_old_file_then_reads_new_one(self) -> None:
+        self._append("ERROR: old\n")
+        self.follower.poll()
+        os.rename(self.path, self.path + ".1")
+        self._append("ERROR: late\n", self.path + ".1")
+        self._append("ERROR: new\n")
+        self.follower.poll()
+        self.assertEqual(
+            self._counts(), {"ERROR: old": 1, "ERROR: late": 1, "ERROR: new": 1}
+        )
+
+    def test_truncation_restarts_from_beginning(self) -> None:
+        self._append("ERROR: before truncation\n")
+        self.follower.poll()
+        with open(self.path, "w", encoding="utf-8") as handle:
+            handle.write("ERROR: after\n")
+        self.follower.poll()
+        self.assertEqual(
+            self._counts(), {"ERROR: before truncation": 1, "ERROR: after": 1}
+        )
+
+    def test_interval_must_be_positive(self) -> None:
+        self._append("ERROR: one\n")
+        for interval in ("0", "-1"):
+            errors = io.StringIO()
+            with redirect_stderr(errors), self.assertRaises(SystemExit):
+                main(["analyze", self.path, "--follow", "--interval", interval])
+            self.assertIn("--interval must be positive", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
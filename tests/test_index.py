@@ -0,0 +1,116 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from logforge import index as index_module
+from logforge.cli import main
+from logforge.index import LogIndex, build_index, occurrence_records, parse_minute
+from logforge.reader import InputError
+
+LINES = [
+    "2024-01-12T10:00:01 app: ERROR disk full\n",
+    "2024-01-12T10:00:02 app: starting worker\n",
+    "Traceback (most recent call last):\n",
+    '  File "/srv/app.py", line 10, in handler\n',
+    "KeyError: 'user'\n",
+    "2024-01-12T10:01:30 app: ERROR disk full\n",
+    "2024-01-12T11:00:00 app: WARNING slow request\n",
+    "2024-01-12T11:00:05 app: ERROR disk full\n",
+]
+
+
+class IndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.source = os.path.join(tmp.name, "app.log")
+        self.index_path = os.path.join(tmp.name, "app.lfidx")
+        with open(self.source, "w", encoding="utf-8") as handle:
+            handle.writelines(LINES)
+
+    def _open(self) -> LogIndex:
+        build_index(self.source, self.index_path, normalize=True)
+        index = LogIndex(self.index_path)
+        self.addCleanup(index.close)
+        return index
+
+    def test_events_and_filters(self) -> None:
+        index = self._open()
+        events = index.events()
+        self.assertEqual(
+            [(e.event.type, e.event.occurrences) for e in events],
+            [("unknown_error", 3), ("KeyError", 1), ("unknown_warning", 1)],
+        )
+        self.assertEqual((events[0].first_line, events[0].last_line), (1, 8))
+        self.assertEqual(events[1].event.file, "/srv/app.py")
+        [warning] = index.events(level="WARNING")
+        self.assertEqual(warning.event.type, "unknown_warning")
+        self.assertEqual(len(index.events(text="disk full")), 1)
+        self.assertEqual(len(index.events(top=2)), 2)
+
+    def test_time_window_counts_occurrences_inside_it(self) -> None:
+        index = self._open()
+        since = parse_minute("2024-01-12 10:00")
+        until = parse_minute("2024-01-12T10:59:59")
+        [disk] = index.events(since=since, until=until)
+        self.assertEqual(disk.event.occurrences, 2)
+        self.assertEqual(
+            [line for line, _ in index.occurrences(disk.id, since=since)], [1, 6, 8]
+        )
+        with self.assertRaises(ValueError):
+            parse_minute("yesterday")
+
+    def test_context_lines_across_blocks(self) -> None:
+        # Tiny blocks: every context read starts from a stored block offset.
+        with mock.patch.object(index_module, "BLOCK_SIZE", 40):
+            index = self._open()
+            [traceback] = index.events(type="KeyError")
+            [record] = occurrence_records(index, traceback.id, context=2)
+        self.assertEqual(
+            record["context"],
+            [
+                [3, "Traceback (most recent call last):"],
+                [4, '  File "/srv/app.py", line 10, in handler'],
+                [5, "KeyError: 'user'"],
+            ],
+        )
+
+    def test_stale_and_compressed_sources(self) -> None:
+        index = self._open()
+        self.assertFalse(index.is_stale())
+        with open(self.source, "a", encoding="utf-8") as handle:
+            handle.write("ERROR: more\n")
+        self.assertTrue(index.is_stale())
+        packed = os.path.join(self.tmp, "app.log.gz")
+        with gzip.open(packed, "wt", encoding="utf-8") as handle:
+            handle.writelines(LINES)
+        with self.assertRaises(InputError):
+            build_index(packed, self.index_path)
+
+    def test_cli_index_and_query(self) -> None:
+        with redirect_stdout(io.StringIO()):
+            main(["index", self.source, "-o", self.index_path, "--normalize"])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["query", self.index_path, "--event", "1", "--limit", "2", "--json"])
+        payload = json.loads(out.getvalue())
+        self.assertEqual(payload["occurrences"], 3)
+        self.assertEqual([record["line"] for record in payload["lines"]], [1, 6])
+        self.assertEqual(
+            payload["per_minute"],
+            {"2024-01-12 10:00": 1, "2024-01-12 10:01": 1, "2024-01-12 11:00": 1},
+        )
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["query", self.index_path, "--grep", "slow"])
+        self.assertIn("#3 [WARNING] unknown_warning", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
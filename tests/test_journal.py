@@ -0,0 +1,157 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.journal import process_journal
+from logforge.reader import InputError
+
+RECORDS: List[Dict[str, Any]] = [
+    {
+        "PRIORITY": "3",
+        "_SYSTEMD_UNIT": "nginx.service",
+        "MESSAGE": "upstream timed out",
+        "CODE_FILE": "src/http.c",
+        "CODE_LINE": "120",
+        "CODE_FUNC": "ngx_read",
+    },
+    {"PRIORITY": "6", "SYSLOG_IDENTIFIER": "app", "MESSAGE": "all good"},
+    {
+        "PRIORITY": "6",
+        "SYSLOG_IDENTIFIER": "app",
+        "MESSAGE": 'Traceback (most recent call last):\n  File "/srv/a.py", '
+        "line 3, in run\nKeyError: 'x'",
+    },
+    {"PRIORITY": "4", "SYSLOG_IDENTIFIER": "kernel", "MESSAGE": [108, 111, 119]},
+]
+
+
+def _export(records: List[Dict[str, Any]]) -> bytes:
+    out = []
+    for record in records:
+        for field, value in record.items():
+            data = bytes(value) if isinstance(value, list) else value.encode()
+            if b"\n" in data:
+                size = len(data).to_bytes(8, "little")
+                out.append(field.encode() + b"\n" + size + data + b"\n")
+            else:
+                out.append(field.encode() + b"=" + data + b"\n")
+        out.append(b"\n")
+    return b"".join(out)
+
+
+def _summary(analyzer: Analyzer) -> List[Any]:
+    return sorted(
+        (e.level, e.type, e.message, e.file, e.line, e.function, e.occurrences)
+        for e in analyzer.get_events()
+    )
+
+
+class JournalTests(unittest.TestCase):
+    expected = [
+        ("ERROR", "KeyError", "KeyError: 'x'", "/srv/a.py", 3, "run", 1),
+        (
+            "ERROR",
+            "nginx.service",
+            "upstream timed out",
+            "src/http.c",
+            120,
+            "ngx_read",
+            1,
+        ),
+        ("WARNING", "kernel", "low", None, None, None, 1),
+    ]
+
+    def test_json_records(self) -> None:
+        analyzer = Analyzer()
+        data = "".join(json.dumps(record) + "\n" for record in RECORDS)
+        process_journal(analyzer, io.BytesIO(data.encode()))
+        self.assertEqual(_summary(analyzer), self.expected)
+
+    def test_export_records_with_binary_fields(self) -> None:
+        analyzer = Analyzer()
+        process_journal(analyzer, io.BytesIO(_export(RECORDS)))
+        self.assertEqual(_summary(analyzer), self.expected)
+
+    def test_compact_quiet_records(self) -> None:
+        # journalctl writes no spaces between fields: the byte prefilter only
+        # reads MESSAGE from records like these.
+        messages = [
+            'said "ok", then \\ left',
+            'quoted "ERROR: disk full" here',
+            'path C:\\temp\\ and "a","b" ERROR: x","y',
+            "trailing backslash \\",
+            "Traceback (most recent call last):",
+            '  File "/srv/a.py", line 3, in run',
+            '    raise KeyError("x")',
+            "KeyError: 'x'",
+            "é WARNING: slow",
+        ]
+        data = b"".join(
+            json.dumps(
+                {"PRIORITY": "6", "MESSAGE": message, "_PID": "7"}
+                if number % 2
+                else {"_PID": "7", "PRIORITY": "7", "MESSAGE": message},
+                separators=(",", ":"),
+            ).encode()
+            + b"\n"
+            for number, message in enumerate(messages)
+        )
+        analyzer = Analyzer()
+        process_journal(analyzer, io.BytesIO(data))
+        expected = Analyzer()
+        expected.process_lines(messages)
+        analyzer.finalize()
+        expected.finalize()
+        self.assertEqual(_summary(analyzer), _summary(expected))
+        self.assertIn("KeyError", {event.type for event in analyzer.get_events()})
+        self.assertEqual(len(analyzer.get_events()), 4)
+
+    def test_records_split_across_reads(self) -> None:
+        class Trickle(io.BytesIO):
+            def read(self, size: int = -1) -> bytes:
+                return super().read(7)
+
+        for data in (
+            "".join(json.dumps(record) + "\n" for record in RECORDS).encode(),
+            _export(RECORDS),
+        ):
+            analyzer = Analyzer()
+            process_journal(analyzer, Trickle(data))
+            self.assertEqual(_summary(analyzer), self.expected)
+
+    def test_invalid_json_record(self) -> None:
+        with self.assertRaises(InputError):
+            process_journal(Analyzer(), io.BytesIO(b'{"PRIORITY":"3"}\n{"PRI'))
+        for tail in (b'{"PRIORITY":"', b'{"PRIORITY":"6'):
+            with self.assertRaises(InputError):
+                process_journal(Analyzer(), io.BytesIO(b'{"PRIORITY":"3"}\n' + tail))
+
+    def test_other_input_is_rejected(self) -> None:
+        for data in (
+            b"Jan 12 10:00:03 web app[7]: ERROR: disk full\n",
+            b"-- Logs begin at Fri 2024-01-12. --\nJan 12 web app: x=1\n",
+        ):
+            with self.assertRaisesRegex(InputError, "not journalctl"):
+                process_journal(Analyzer(), io.BytesIO(data))
+
+    def test_cli_journal(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.json")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(record) + "\n" for record in RECORDS)
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main(["analyze", path, "--journal", "--json"])
+        events = {event["type"]: event for event in json.loads(out.getvalue())}
+        self.assertEqual(events["nginx.service"]["file"], "src/http.c")
+        self.assertEqual(events["nginx.service"]["function"], "ngx_read")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import pickle
+import unittest
+
+from logforge.model import ErrorEvent, Event, EventKey, WarningEvent
+
+
+class ModelTests(unittest.TestCase):
+    def test_key_is_tuple_compatible(self) -> None:
+        event = WarningEvent(type="compiler_warning", message="m", file="a.c", line=3)
+        key = event.key()
+        self.assertIsInstance(key, EventKey)
+        self.assertEqual(key, ("WARNING", "compiler_warning", "m", "a.c", 3, None))
+        self.assertEqual(hash(key), hash(tuple(key)))
+
+    def test_equality_and_pickle(self) -> None:
+        event = ErrorEvent(type="ValueError", message="bad", file="/tmp/app.py")
+        event.occurrences = 4
+        clone = pickle.loads(pickle.dumps(event))
+        self.assertIsInstance(clone, ErrorEvent)
+        self.assertEqual(clone, event)
+        self.assertNotEqual(clone, Event("ERROR", "ValueError", "bad", "/tmp/app.py"))
+
+    def test_slots(self) -> None:
+        event = ErrorEvent(type="fatal", message="boom")
+        with self.assertRaises(AttributeError):
+            event.extra = 1  # type: ignore[attr-defined]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+from unittest import mock
+
+from logforge.cli import main
+from logforge.ndjson import POLL_LINES, NdjsonStream, StreamingAnalyzer
+from logforge.serve import SyslogServer
+
+
+def _records(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+class NdjsonTests(unittest.TestCase):
+    def test_events_stream_before_the_end_of_input(self) -> None:
+        out = io.StringIO()
+        analyzer = StreamingAnalyzer(NdjsonStream(out))
+        lines = ["ERROR: disk full\n"] + ["INFO ok\n"] * POLL_LINES
+        analyzer.process_lines(iter(lines))
+        [record] = _records(out.getvalue())
+        self.assertEqual(record["kind"], "event")
+        self.assertEqual(record["message"], "ERROR: disk full")
+
+    def test_deltas_and_summary_add_up(self) -> None:
+        out = io.StringIO()
+        stream = NdjsonStream(out, interval=0.0)
+        left, right = StreamingAnalyzer(stream), StreamingAnalyzer(stream)
+        left.process_lines(["ERROR: a\n", "ERROR: a\n"])
+        right.process_lines(["ERROR: a\n", "WARNING: b\n"])
+        left.finalize()
+        right.finalize()
+        stream.close()
+        records = _records(out.getvalue())
+        events = [record for record in records if record["kind"] == "event"]
+        self.assertEqual([event["id"] for event in events], [0, 1])
+        totals = {event["id"]: event["occurrences"] for event in events}
+        for record in records:
+            if record["kind"] == "delta":
+                for event_id, added in record["counts"]:
+                    totals[event_id] += added
+        self.assertEqual(totals, {0: 3, 1: 1})
+        self.assertEqual(
+            records[-1],
+            {
+                "kind": "summary",
+                "unique": 2,
+                "occurrences": 4,
+                "errors": 1,
+                "warnings": 1,
+            },
+        )
+
+    def test_bounded_summary_has_error_bound(self) -> None:
+        out = io.StringIO()
+        stream = NdjsonStream(out)
+        analyzer = StreamingAnalyzer(stream, max_events=4)
+        analyzer.process_lines(f"ERROR: job {i}\n" for i in range(20))
+        analyzer.finalize()
+        stream.close()
+        summary = _records(out.getvalue())[-1]
+        self.assertEqual(summary["unique"], 20)
+        self.assertGreater(summary["error_bound"], 0)
+
+    def test_evicted_ids_are_released(self) -> None:
+        out = io.StringIO()
+        stream = NdjsonStream(out, interval=0.0)
+        analyzer = StreamingAnalyzer(stream, max_events=4)
+        for i in range(200):
+            analyzer.process_lines([f"ERROR: job {i % 50}\n", "ERROR: hot\n"])
+            self.assertLessEqual(len(stream._ids), len(analyzer._events))
+        analyzer.finalize()
+        stream.close()
+        records = _records(out.getvalue())
+        events = [record for record in records if record["kind"] == "event"]
+        streamed = sum(event["occurrences"] for event in events)
+        for record in records:
+            if record["kind"] == "delta":
+                streamed += sum(added for _, added in record["counts"])
+        # Space-Saving counts may run over, by at most error_bound per key.
+        summary = records[-1]
+        self.assertEqual(summary["unique"], len(events))
+        self.assertEqual(summary["occurrences"], streamed)
+        self.assertGreaterEqual(streamed, 400)
+
+    def test_server_timer_writes_deltas_without_new_lines(self) -> None:
+        out = io.StringIO()
+        stream = NdjsonStream(out)
+        server = SyslogServer(
+            StreamingAnalyzer(stream), str, lambda: stream.poll(force=True)
+        )
+        ready = threading.Event()
+        with mock.patch("logforge.serve.TICK_INTERVAL", 0.05):
+            thread = threading.Thread(
+                target=server.run, args=([("127.0.0.1", 0)],), kwargs={"ready": ready}
+            )
+            thread.start()
+            self.addCleanup(thread.join, 5)
+            self.addCleanup(server.stop)
+            self.assertTrue(ready.wait(5))
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                for _ in range(3):
+                    udp.sendto(b"<11>web app: ERROR: x", server.addresses["udp"][0])
+            # Nothing arrives after the burst: the delta comes from the timer.
+            deadline = time.monotonic() + 5
+            while '"delta"' not in out.getvalue():
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+        [event, delta] = _records(out.getvalue())
+        self.assertEqual(event["occurrences"] + delta["counts"][0][1], 3)
+
+    def test_cli(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("ERROR: a\nmain.c:1:2: warning: b\nERROR: a\n")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(main(["analyze", path, "--ndjson"]), 0)
+        kinds = [record["kind"] for record in _records(out.getvalue())]
+        self.assertEqual(kinds, ["event", "event", "delta", "summary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from logforge.analyzer import Analyzer
+from logforge.normalize import SAMPLE_LIMIT, normalize_message
+
+
+class NormalizeTests(unittest.TestCase):
+    def test_variable_tokens_are_masked(self) -> None:
+        self.assertEqual(
+            normalize_message(
+                "Jan 12 10:00:03 host app[42]: ERROR request 0a1b2c3d4e "
+                "timed out after 3.5s from 10.0.0.1:8080"
+            ),
+            "Jan <*> <*> host app[<*>]: ERROR request <*> timed out after <*> "
+            "from <*>",
+        )
+        self.assertEqual(
+            normalize_message(
+                "2024-01-12T10:00:00.123Z user 550e8400-e29b-41d4-a716-446655440000 "
+                "ptr 0x7ffd1234"
+            ),
+            "<*> user <*> ptr <*>",
+        )
+
+    def test_words_are_left_alone(self) -> None:
+        for message in ("ERROR: disk full", "WARNING sha256 deadbeef ipv6 at"):
+            self.assertEqual(normalize_message(message), message)
+
+    def test_analyzer_groups_by_template_and_keeps_samples(self) -> None:
+        analyzer = Analyzer(normalize=True)
+        for i in range(10):
+            analyzer.process_line(
+                f"Jan 12 10:{i:02d}:00 host app[{100 + i}]: ERROR job {i} failed\n"
+            )
+        analyzer.process_line("main.c:10:5: warning: unused variable 'x'\n")
+        events = analyzer.get_events()
+        self.assertEqual(len(events), 2)
+        error = next(e for e in events if e.level == "ERROR")
+        self.assertEqual(error.occurrences, 10)
+        self.assertIsNone(error.file)
+        self.assertEqual(error.message, "Jan <*> <*> host app[<*>]: ERROR job <*> failed")
+        samples = analyzer.get_samples()
+        self.assertEqual(len(samples[error.key()]), SAMPLE_LIMIT)
+        self.assertTrue(samples[error.key()][0].startswith("Jan 12 10:00:00"))
+
+    def test_location_is_not_taken_from_times_or_addresses(self) -> None:
+        analyzer = Analyzer(normalize=True)
+        analyzer.process_line(
+            "10:00:03 ERROR upstream 10.0.0.1:8080 reset at handler.py:40\n"
+        )
+        [event] = analyzer.get_events()
+        self.assertEqual((event.file, event.line), ("handler.py", 40))
+
+    def test_merge_combines_samples(self) -> None:
+        left, right = Analyzer(normalize=True), Analyzer(normalize=True)
+        left.process_line("ERROR: job 1 failed\n")
+        right.process_line("ERROR: job 2 failed\n")
+        left.merge(right.get_events(), samples=right.get_samples())
+        [event] = left.get_events()
+        self.assertEqual(event.occurrences, 2)
+        self.assertEqual(
+            left.get_samples()[event.key()],
+            ["ERROR: job 1 failed", "ERROR: job 2 failed"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.parallel import analyze_file, analyze_files, split_ranges
+
+SAMPLE = [
+    "noise before anything\n",
+    "Traceback (most recent call last):\n",
+    '  File "/srv/app.py", line 10, in handler\n',
+    "    ERROR handling happens here\n",
+    '  File "/srv/db.py", line 3, in query\n',
+    "KeyError: 'user'\n",
+    "Program received signal SIGSEGV, Segmentation fault.\n",
+    "src/a.c:3:1: warning: shadowed declaration\n",
+    "#0  compute () at calc.c:128\n",
+    "ERROR: failed to open config at config.yml:9\n",
+    "SIGABRT\n",
+    "WARNING: low disk in cleanup\n",
+    "src/a.c:3:1: warning: shadowed declaration\n",
+]
+
+
+def _snapshot(analyzer: Analyzer) -> list:
+    return [
+        (e.level, e.type, e.message, e.file, e.line, e.function, e.occurrences)
+        for e in analyzer.get_events()
+    ]
+
+
+class ParallelTests(unittest.TestCase):
+    def setUp(self) -> None:
+        handle = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+        with handle:
+            handle.writelines(SAMPLE * 5)
+        self.path = handle.name
+        self.addCleanup(os.unlink, self.path)
+
+        self.expected = Analyzer()
+        with open(self.path, encoding="utf-8") as source:
+            self.expected.process_lines(source)
+
+    def test_split_ranges_cover_file_at_line_boundaries(self) -> None:
+        ranges = split_ranges(self.path, 7, min_range_size=1)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[start - 1 : start], b"\n")
+
+    def test_matches_sequential_run(self) -> None:
+        for jobs in (2, 3, 7, 16):
+            for head_lines in (1, 4096):
+                analyzer = analyze_file(
+                    self.path, jobs, min_range_size=1, head_lines=head_lines
+                )
+                self.assertEqual(analyzer.get_state(), self.expected.get_state())
+                self.assertEqual(_snapshot(analyzer), _snapshot(self.expected))
+
+    def test_analyze_files_merges_and_counts_per_source(self) -> None:
+        compressed = self.path + ".gz"
+        with open(self.path, "rb") as source, gzip.open(compressed, "wb") as target:
+            target.write(source.read() * 2)
+        self.addCleanup(os.unlink, compressed)
+        paths = [self.path, compressed]
+
+        for jobs in (1, 2):
+            analyzer, sources = analyze_files(paths, jobs)
+            expected = {
+                (e.type, e.message): e.occurrences * 3
+                for e in self.expected.get_events()
+            }
+            counts = {
+                (e.type, e.message): e.occurrences for e in analyzer.get_events()
+            }
+            self.assertEqual(counts, expected)
+            warning = next(
+                e for e in analyzer.get_events() if e.type == "compiler_warning"
+            )
+            self.assertEqual(sources[warning.key()], {self.path: 10, compressed: 20})
+
+    def test_cli_reports_a_missing_source(self) -> None:
+        missing = self.path + ".missing"
+        for jobs in ("1", "2"):
+            errors = io.StringIO()
+            with redirect_stderr(errors), self.assertRaises(SystemExit):
+                main(["analyze", self.path, missing, "--jobs", jobs])
+            self.assertIn(f"cannot read {missing!r}", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
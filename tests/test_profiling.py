@@ -0,0 +1,59 @@
+import unittest
+
+from logforge.analyzer import Analyzer
+from logforge.profiling import ProfilingAnalyzer, combine_stats
+
+LINES = [
+    "boot ok\n",
+    "main.c:10:5: warning: unused variable 'x'\n",
+    "main.c:10:5: warning: unused variable 'x'\n",
+    "ERROR: disk full at store.py:12\n",
+    "ERROR: disk full at store.py:12 \n",
+    "Traceback (most recent call last):\n",
+    '  File "/srv/app.py", line 10, in handler\n',
+    "KeyError: 'user'\n",
+]
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_counts_rules_events_and_dedup(self) -> None:
+        analyzer = ProfilingAnalyzer()
+        analyzer.process_lines(LINES)
+        expected = Analyzer()
+        expected.process_lines(LINES)
+        self.assertEqual(analyzer.get_events(), expected.get_events())
+
+        stats = analyzer.stats()
+        self.assertEqual(stats["lines"], len(LINES))
+        self.assertEqual(stats["events_created"], 3)
+        self.assertEqual(stats["dedup_hits"], 1)
+        self.assertEqual(stats["line_cache_hits"], 1)
+        rules = stats["rules"]
+        self.assertEqual(rules["compiler"]["attempts"], 3)
+        self.assertEqual(rules["compiler"]["matches"], 1)
+        self.assertEqual(rules["generic_keyword"]["matches"], 2)
+        self.assertEqual(rules["traceback_file"]["matches"], 1)
+        self.assertEqual(rules["traceback_exception"]["matches"], 1)
+        self.assertGreater(rules["compiler"]["seconds"], 0)
+
+    def test_buffer_counts_lines_skipped_by_the_prefilter(self) -> None:
+        data = "".join(LINES).encode()
+        for tail in (b"", b"boot ok"):
+            analyzer = ProfilingAnalyzer()
+            analyzer.process_buffer(data + tail)
+            stats = analyzer.stats()
+            self.assertEqual(stats["lines"], len(LINES) + bool(tail))
+            self.assertEqual(stats["events_created"], 3)
+            self.assertGreater(stats["seconds"], 0)
+
+    def test_combine_stats_sums_counters(self) -> None:
+        first, second = ProfilingAnalyzer(), ProfilingAnalyzer()
+        first.process_lines(LINES)
+        second.process_lines(LINES[:4])
+        combined = combine_stats([first.stats(), second.stats()])
+        self.assertEqual(combined["lines"], len(LINES) + 4)
+        self.assertEqual(combined["rules"]["compiler"]["attempts"], 3 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
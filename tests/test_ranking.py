@@ -0,0 +1,87 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.ranking import LevelRanking, rank_events
+from logforge.report import iter_text
+
+
+def _summary(
+    ranking: Dict[str, LevelRanking]
+) -> Dict[str, Tuple[int, int, List[Tuple[str, int]]]]:
+    return {
+        level: (
+            ranked.unique,
+            ranked.occurrences,
+            [(event.message, event.occurrences) for event in ranked.events],
+        )
+        for level, ranked in ranking.items()
+    }
+
+
+class RankingTests(unittest.TestCase):
+    def test_incremental_matches_full_ranking(self) -> None:
+        rng = random.Random(7)
+        analyzer = Analyzer(ranked=True)
+        for _ in range(30):
+            analyzer.process_lines(
+                f"{rng.choice(('ERROR', 'WARNING'))}: job {rng.randint(0, 40)}\n"
+                for _ in range(rng.randint(0, 50))
+            )
+            top = rng.choice((3, 5, None))
+            expected = rank_events(analyzer.get_events(), top)
+            self.assertEqual(
+                _summary(analyzer.get_ranking(top)), _summary(expected)
+            )
+
+    def test_eviction_and_merge_rank_everything_again(self) -> None:
+        analyzer = Analyzer(max_events=8, ranked=True)
+        analyzer.process_lines(["ERROR: a\n"] * 5)
+        analyzer.get_ranking(2)
+        analyzer.process_lines(f"ERROR: job {i}\n" for i in range(20))
+        other = Analyzer()
+        other.process_lines(["WARNING: w\n"] * 9)
+        analyzer.merge(other.get_events())
+        self.assertEqual(
+            _summary(analyzer.get_ranking(2)),
+            _summary(rank_events(analyzer.get_events(), 2)),
+        )
+
+    def test_text_counts_events_left_out(self) -> None:
+        analyzer = Analyzer()
+        analyzer.process_lines(["ERROR: a\n", "ERROR: a\n", "ERROR: b\n", "ERROR: c\n"])
+        self.assertEqual(
+            list(iter_text(analyzer.get_ranking(1))),
+            [
+                "Errors: 3 unique, 4 occurrences",
+                "- [ERROR] unknown_error (2x): ERROR: a",
+                "- ... 2 more not shown",
+            ],
+        )
+
+    def test_cli_top(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("WARNING: w\nERROR: a\nERROR: a\nERROR: b\n")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main(["analyze", path, "--top", "1"])
+        self.assertEqual(
+            out.getvalue(),
+            "Errors: 2 unique, 3 occurrences\n"
+            "- [ERROR] unknown_error (2x): ERROR: a\n"
+            "- ... 1 more not shown\n"
+            "Warnings: 1 unique, 1 occurrences\n"
+            "- [WARNING] unknown_warning: WARNING: w\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import bz2
+import gzip
+import io
+import lzma
+import tempfile
+import unittest
+
+from logforge.reader import decompressed, iter_lines, map_file
+
+
+class ReaderTests(unittest.TestCase):
+    def _lines(self, data: bytes, chunk_size: int) -> list:
+        return list(iter_lines(io.BytesIO(data), chunk_size=chunk_size))
+
+    def test_matches_text_mode_readlines(self) -> None:
+        data = "one\r\ntwo\rthree\n\nfour".encode("utf-8")
+        expected = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").readlines()
+        for chunk_size in (1, 2, 3, 7, 1024):
+            self.assertEqual(self._lines(data, chunk_size), expected)
+
+    def test_multibyte_split_across_chunks(self) -> None:
+        data = "warning: unused variable ‘x’\n".encode("utf-8")
+        self.assertEqual(self._lines(data, 1), ["warning: unused variable ‘x’\n"])
+
+    def test_invalid_bytes_are_replaced(self) -> None:
+        self.assertEqual(self._lines(b"ERROR \xff\n", 4), ["ERROR �\n"])
+
+    def test_empty_input(self) -> None:
+        self.assertEqual(self._lines(b"", 4), [])
+
+    def test_map_file_empty(self) -> None:
+        with tempfile.NamedTemporaryFile() as handle:
+            with map_file(handle.name) as data:
+                self.assertEqual(len(data), 0)
+
+    def test_compressed_input_is_detected_by_magic_bytes(self) -> None:
+        data = "ERROR: disk full\r\nboot ok\nWARNING: tail".encode("utf-8")
+        expected = self._lines(data, 1024)
+        for compress in (gzip.compress, bz2.compress, lzma.compress, bytes):
+            with decompressed(io.BytesIO(compress(data))) as stream:
+                self.assertEqual(list(iter_lines(stream, chunk_size=3)), expected)
+
+    def test_concatenated_gzip_members(self) -> None:
+        data = gzip.compress(b"ERROR: one\n") + gzip.compress(b"ERROR: two\n")
+        with decompressed(io.BytesIO(data)) as stream:
+            self.assertEqual(list(iter_lines(stream)), ["ERROR: one\n", "ERROR: two\n"])
+
+    def test_corrupt_input_raises_in_reader(self) -> None:
+        data = gzip.compress(b"ERROR: one\n" * 1000)[:-20]
+        with decompressed(io.BytesIO(data)) as stream:
+            with self.assertRaises(EOFError):
+                list(iter_lines(stream))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
+import json
 import unittest
 
-from logforge.model import ErrorEvent, WarningEvent
+from logforge.model import ErrorEvent, Snippet, WarningEvent
 from logforge.report import generate_json, generate_text
 
 
@@ -31,6 +32,29 @@ class ReportTests(unittest.TestCase):
         self.assertIn('"type": "ValueError"', payload)
         self.assertIn('"file": "/tmp/app.py"', payload)
 
+    def test_generate_json_with_error_bound(self) -> None:
+        event = ErrorEvent(type="unknown_error", message="ERROR: disk full")
+        event.occurrences = 12
+        payload = json.loads(generate_json([event], 3, {event.key(): 3}))
+        self.assertEqual(payload["error_bound"], 3)
+        self.assertEqual(payload["events"][0]["overcount"], 3)
+        self.assertIn("up to 3", generate_text([event], 3))
+
+    def test_snippets(self) -> None:
+        event = ErrorEvent(type="unknown_error", message="ERROR: disk full")
+        snippets = {event.key(): Snippet(("boot", "ERROR: disk full", "retry"), 1)}
+        self.assertIn(
+            "  Context:\n    | boot\n    > ERROR: disk full\n    | retry",
+            generate_text([event], snippets=snippets),
+        )
+        [item] = json.loads(generate_json([event], snippets=snippets))
+        self.assertEqual(
+            item["context"],
+            {"before": ["boot"], "line": "ERROR: disk full", "after": ["retry"]},
+        )
+        [item] = json.loads(generate_json([event], snippets={}))
+        self.assertIsNone(item["context"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,211 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.rules import (
+    RuleError,
+    RuleSet,
+    _literal_prefix,
+    _normalize,
+    load_rules,
+)
+
+EXAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "examples",
+    "rules.toml",
+)
+
+JAVA_RULE = {
+    "name": "java_exception",
+    "type": "{exception}",
+    "message": "{exception}{detail}",
+    "file": "{file}",
+    "line": "{line}",
+    "function": "{function}",
+    "start": r'^Exception in thread "[^"]*" (?P<exception>[\w$.]+)(?P<detail>: .*)?$',
+    "continue": r"^\s+at (?P<function>[\w$.<>]+)\((?P<file>[^:()]+):(?P<line>\d+)\)",
+}
+
+
+def _rules(*specs: dict) -> RuleSet:
+    return RuleSet([_normalize(spec, index) for index, spec in enumerate(specs)])
+
+
+def _run(rules: RuleSet, text: str) -> Analyzer:
+    analyzer = Analyzer(rules=rules)
+    analyzer.process_lines(text.splitlines(True))
+    analyzer.finalize()
+    return analyzer
+
+
+class RuleTests(unittest.TestCase):
+    def test_literal_prefix(self) -> None:
+        self.assertEqual(_literal_prefix(r"^panic: (?P<d>.*)"), ("panic: ", True))
+        self.assertEqual(
+            _literal_prefix(r"Program\ received \d+"), ("Program received ", False)
+        )
+        self.assertEqual(_literal_prefix(r"^abc*"), ("ab", True))
+        self.assertEqual(_literal_prefix(r"(?:a|b)x"), ("", False))
+        self.assertEqual(_literal_prefix(r"^ab(?:c|d)e"), ("ab", True))
+        self.assertEqual(_literal_prefix(r"^disk full|out of memory"), ("", False))
+        self.assertEqual(_literal_prefix(r"^a[|]b\|c"), ("a", True))
+
+    def test_every_branch_of_a_rule_matches(self) -> None:
+        analyzer = _run(
+            _rules({"name": "oom", "start": "disk full|out of (?:memory|swap)"}),
+            "kernel: out of memory\nfs: disk full\nvm: out of swap\nall good\n",
+        )
+        self.assertEqual(
+            sorted(event.message for event in analyzer.get_events()),
+            ["fs: disk full", "kernel: out of memory", "vm: out of swap"],
+        )
+
+    def test_multiline_block_takes_first_frame(self) -> None:
+        analyzer = _run(
+            _rules(JAVA_RULE),
+            'Exception in thread "main" java.lang.IllegalStateException: boom\n'
+            "\tat com.acme.Service.run(Service.java:42)\n"
+            "\tat com.acme.Main.main(Main.java:7)\n"
+            "ERROR: shutting down\n",
+        )
+        events = {event.type: event for event in analyzer.get_events()}
+        java = events["java.lang.IllegalStateException"]
+        self.assertEqual(java.message, "java.lang.IllegalStateException: boom")
+        self.assertEqual(
+            (java.file, java.line, java.function),
+            ("Service.java", 42, "com.acme.Service.run"),
+        )
+        # The line that closed the block is still seen by the built-in rules.
+        self.assertIn("unknown_error", events)
+
+    def test_priority_decides_between_rules(self) -> None:
+        low = {"name": "low", "start": "^job ", "priority": 1}
+        high = {"name": "high", "start": r"^job \d+ died", "priority": 5}
+        analyzer = _run(_rules(low, high), "job 7 died\njob 8 finished\n")
+        self.assertEqual(
+            sorted(event.type for event in analyzer.get_events()), ["high", "low"]
+        )
+
+    def test_end_and_incomplete_blocks(self) -> None:
+        rule = {
+            "name": "txn",
+            "start": r"^BEGIN (?P<id>\d+)",
+            "continue": r"^  ",
+            "end": r"^ABORT (?P<reason>\w+)",
+            "message": "{id} {reason}",
+            "incomplete": "drop",
+        }
+        analyzer = _run(
+            _rules(rule),
+            "BEGIN 1\n  step\nABORT timeout\nBEGIN 2\n  step\nCOMMIT\nBEGIN 3\n",
+        )
+        [event] = analyzer.get_events()
+        self.assertEqual(event.message, "1 timeout")
+
+    def test_invalid_rules_are_rejected(self) -> None:
+        with self.assertRaises(RuleError):
+            _normalize({"name": "bad", "start": "(unclosed"}, 0)
+        with self.assertRaises(RuleError):
+            _normalize({"name": "bad", "start": "x", "level": "INFO"}, 0)
+        bad = ("{0}", "{}", "{missing}", "{id.real}", "{id", "{id!z}", "{id:d}")
+        for message in bad:
+            with self.assertRaises(RuleError):
+                _normalize({"start": r"(?P<id>\d+)", "message": message}, 0)
+        _normalize(
+            {"start": r"(?P<id>\d+)", "end": "(?P<why>.*)", "message": "{id}{why}"},
+            0,
+        )
+        fields = (
+            ("priority", "high"),
+            ("priority", True),
+            ("max_lines", "10"),
+            ("max_lines", 0),
+            ("ignorecase", "false"),
+            ("keywords", "panic"),
+            ("keywords", [1]),
+        )
+        for field, value in fields:
+            with self.assertRaisesRegex(RuleError, f"rule 'bad': {field} must"):
+                _normalize({"name": "bad", "start": "x", field: value}, 0)
+        for raw in ("panic", ["start", "x"]):
+            with self.assertRaisesRegex(RuleError, "rule 'rule3': must be"):
+                _normalize(raw, 3)
+
+    def test_compiled_rules_are_cached_by_content(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rules.json")
+            cache_dir = os.path.join(tmp, "cache")
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump({"rules": [{"name": "a", "start": "^a"}]}, handle)
+            load_rules([path], cache_dir)
+            [cached] = os.listdir(cache_dir)
+            cache_path = os.path.join(cache_dir, cached)
+            # Served from the cache while the file is unchanged...
+            with open(cache_path, encoding="utf-8") as handle:
+                specs = json.load(handle)
+            specs[0]["name"] = "from-cache"
+            with open(cache_path, "w", encoding="utf-8") as handle:
+                json.dump(specs, handle)
+            self.assertEqual(load_rules([path], cache_dir).rules[0].name, "from-cache")
+            # ...and compiled again once it changes.
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump({"rules": [{"name": "b", "start": "^b"}]}, handle)
+            self.assertEqual(load_rules([path], cache_dir).rules[0].name, "b")
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    @unittest.skipIf(sys.version_info < (3, 11), "TOML needs tomllib")
+    def test_example_rules(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            rules = load_rules([EXAMPLES], tmp)
+        analyzer = _run(
+            rules,
+            "panic: runtime error: index out of range [5] with length 3\n"
+            "\n"
+            "goroutine 1 [running]:\n"
+            "main.lookup(...)\n"
+            "\t/app/main.go:12\n"
+            "exit status 2\n"
+            "thread 'main' panicked at src/main.rs:5:13:\n"
+            "called `Option::unwrap()` on a `None` value\n"
+            "note: run with `RUST_BACKTRACE=1` environment variable\n"
+            "==42==ERROR: AddressSanitizer: heap-use-after-free on address 0x6020\n"
+            "    #0 0x4c3a2b in use_it src/use.c:14:5\n"
+            "SUMMARY: AddressSanitizer: heap-use-after-free src/use.c:14:5 in use_it\n",
+        )
+        events = {event.type: event for event in analyzer.get_events()}
+        self.assertEqual(
+            (events["go_panic"].file, events["go_panic"].line), ("/app/main.go", 12)
+        )
+        self.assertEqual(
+            events["rust_panic"].message, "called `Option::unwrap()` on a `None` value"
+        )
+        asan = events["heap-use-after-free"]
+        self.assertEqual((asan.file, asan.function), ("src/use.c", "use_it"))
+        self.assertEqual(len(events), 3)
+
+    def test_cli_loads_rule_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            rules_path = os.path.join(tmp, "rules.json")
+            log_path = os.path.join(tmp, "app.log")
+            with open(rules_path, "w", encoding="utf-8") as handle:
+                json.dump({"rules": [JAVA_RULE]}, handle)
+            with open(log_path, "w", encoding="utf-8") as handle:
+                handle.write('Exception in thread "main" java.io.IOException\n')
+            out = io.StringIO()
+            with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+                with redirect_stdout(out):
+                    main(["analyze", log_path, "--rules", rules_path, "--json"])
+        [event] = json.loads(out.getvalue())
+        self.assertEqual(event["type"], "java.io.IOException")
+
+
+if __name__ == "__main__":
+    unittest.main()
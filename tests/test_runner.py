@@ -0,0 +1,56 @@
+import io
+import sys
+import unittest
+
+from logforge.analyzer import Analyzer
+from logforge.runner import run_commands
+
+
+def _python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+class RunnerTests(unittest.TestCase):
+    def test_concurrent_commands_keep_separate_analyzers(self) -> None:
+        commands = [
+            _python("import sys; print('ERROR: first'); sys.exit(2)"),
+            _python(
+                "import sys\n"
+                "print('Traceback (most recent call last):', file=sys.stderr)\n"
+                "print('  File \"x.py\", line 1, in f', file=sys.stderr)\n"
+                "print('KeyError: k', file=sys.stderr)\n"
+                "sys.stdout.write('WARNING: no newline')"
+            ),
+        ]
+        analyzers = [Analyzer(), Analyzer()]
+        stdout, stderr = io.BytesIO(), io.BytesIO()
+        exit_codes = run_commands(
+            commands, analyzers, max_parallel=1, stdout=stdout, stderr=stderr
+        )
+        self.assertEqual(exit_codes, [2, 0])
+        self.assertEqual(stdout.getvalue(), b"ERROR: first\nWARNING: no newline")
+        self.assertTrue(stderr.getvalue().endswith(b"KeyError: k\n"))
+        self.assertEqual(
+            [e.message for e in analyzers[0].get_events()], ["ERROR: first"]
+        )
+        self.assertEqual(
+            sorted(e.type for e in analyzers[1].get_events()),
+            ["KeyError", "unknown_warning"],
+        )
+
+    def test_large_output_is_echoed_and_counted_in_full(self) -> None:
+        command = _python(
+            "import sys\n"
+            "for i in range(50000):\n"
+            "    sys.stdout.write('ERROR: disk full\\n' if i % 10 == 0 else 'ok %d\\n' % i)"
+        )
+        analyzer = Analyzer()
+        stdout = io.BytesIO()
+        run_commands([command], [analyzer], stdout=stdout, stderr=io.BytesIO())
+        self.assertEqual(stdout.getvalue().count(b"\n"), 50000)
+        [event] = analyzer.get_events()
+        self.assertEqual(event.occurrences, 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
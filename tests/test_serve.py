@@ -0,0 +1,153 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from contextlib import redirect_stderr
+from typing import Any, Callable
+
+from logforge.analyzer import Analyzer
+from logforge.cli import main
+from logforge.report import generate_json
+from logforge.serve import SyslogServer, parse_address, to_lines
+
+
+class HeaderTests(unittest.TestCase):
+    def test_rfc5424_and_rfc3164_headers(self) -> None:
+        data = (
+            b"<11>1 2024-01-12T10:00:01Z web app 42 ID7 - ERROR: disk full\n"
+            b'<11>1 2024-01-12T10:00:02Z web app - - [x@1 a="\\]"] ERROR: late\n'
+            b"<12>Jan 12 10:00:03 web app[7]: WARNING: slow\n"
+        )
+        self.assertEqual(
+            to_lines(data),
+            b"2024-01-12T10:00:01Z web app[42]: ERROR: disk full\n"
+            b"2024-01-12T10:00:02Z web app: ERROR: late\n"
+            b"Jan 12 10:00:03 web app[7]: WARNING: slow\n",
+        )
+
+    def test_parse_address(self) -> None:
+        self.assertEqual(parse_address("0.0.0.0:514"), ("0.0.0.0", 514))
+        self.assertEqual(parse_address(":514"), ("127.0.0.1", 514))
+        self.assertEqual(parse_address("[::1]:514"), ("::1", 514))
+        with self.assertRaises(ValueError):
+            parse_address("localhost")
+
+
+class ServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.analyzer = Analyzer(normalize=True)
+        analyzer = self.analyzer
+        self.server = SyslogServer(
+            analyzer,
+            lambda: generate_json(analyzer.get_events()),
+        )
+        ready = threading.Event()
+        local = [("127.0.0.1", 0)]
+        self.thread = threading.Thread(
+            target=self.server.run, args=(local, local, (), local[0], ready)
+        )
+        self.thread.start()
+        self.addCleanup(self.thread.join, 5)
+        self.addCleanup(self.server.stop)
+        self.assertTrue(ready.wait(5))
+
+    def _address(self, kind: str) -> Any:
+        return self.server.addresses[kind][0][:2]
+
+    def _get(self, path: str) -> Any:
+        host, port = self._address("http")
+        with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=5) as reply:
+            return json.loads(reply.read())
+
+    def _wait_for(self, condition: Callable[[], bool]) -> None:
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_udp_and_tcp_ingest(self) -> None:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            for pid in range(3):
+                message = f"<11>1 - web app {pid} - - ERROR: disk full"
+                udp.sendto(message.encode(), self._address("udp"))
+        with socket.create_connection(self._address("tcp")) as tcp:
+            tcp.sendall(b"<12>Jan 12 10:00:03 web app[7]: WARNING: slow\n")
+            # Newline framing continues across segments.
+            tcp.sendall(b"<11>Jan 12 10:00:04 web app[7]: ERROR: disk ")
+            time.sleep(0.05)
+            tcp.sendall(b"full\n")
+        self._wait_for(lambda: self._get("/stats")["messages"] == 5)
+
+        events = {item["message"]: item for item in self._get("/events")}
+        self.assertEqual(events["- web app[<*>]: ERROR: disk full"]["occurrences"], 3)
+        self.assertIn("Jan <*> <*> web app[<*>]: WARNING: slow", events)
+        self.assertIn("Jan <*> <*> web app[<*>]: ERROR: disk full", events)
+
+    def test_octet_counted_tcp(self) -> None:
+        messages = [b"<11>Jan 12 10:00:01 a b: ERROR: x\ny", b"<11>Jan 12 c: ERROR: z"]
+        framed = b"".join(b"%d %s" % (len(m), m) for m in messages)
+        with socket.create_connection(self._address("tcp")) as tcp:
+            tcp.sendall(framed[:10])
+            time.sleep(0.05)
+            tcp.sendall(framed[10:])
+        self._wait_for(lambda: self._get("/stats")["messages"] == 2)
+        self.server.stop()
+        self.thread.join(5)
+        self.assertEqual(
+            sorted(event.message for event in self.analyzer.get_events()),
+            ["Jan <*> <*> a b: ERROR: x", "Jan <*> c: ERROR: z"],
+        )
+
+
+class UnixSocketTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "log.sock")
+
+    def _serve(self) -> str:
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.assertEqual(main(["serve", "--unix", self.path]), 1)
+        return errors.getvalue()
+
+    def test_regular_file_is_left_alone(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as handle:
+            handle.write("keep me\n")
+        self.assertIn("is not a socket", self._serve())
+        with open(self.path, encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "keep me\n")
+
+    def test_socket_in_use_is_left_alone(self) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as other:
+            other.bind(self.path)
+            self.assertIn("in use", self._serve())
+            self.assertTrue(os.path.exists(self.path))
+
+    def test_stale_socket_is_replaced_and_removed_on_exit(self) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as stale:
+            stale.bind(self.path)
+        analyzer = Analyzer()
+        server = SyslogServer(analyzer, str)
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=server.run, kwargs={"unix": [self.path], "ready": ready}
+        )
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.assertTrue(ready.wait(5))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as client:
+            client.sendto(b"<11>web app: ERROR: x", self.path)
+        server.stop()
+        thread.join(5)
+        self.assertEqual(len(analyzer.get_events()), 1)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import unittest
+
+from logforge.analyzer import Analyzer
+from logforge.report import generate_json, generate_text
+from logforge.timeline import RING_MINUTES, Timeline, TimestampParser, format_time
+
+# 2024-01-12 10:00:00 UTC
+BASE = 1705053600
+DISK_FULL = "Jan <*> <*> host app[<*>]: error: disk full"
+
+
+class TimestampParserTests(unittest.TestCase):
+    def test_formats(self) -> None:
+        parser = TimestampParser(year=2024)
+        for line in (
+            "Jan 12 10:00:03 host app: started",
+            "<13>Jan 12 10:00:03 host app: started",
+            "2024-01-12T10:00:03.250Z error: failed",
+            "[2024-01-12 10:00:03] error: failed",
+        ):
+            self.assertEqual(parser.parse(line), BASE + 3, line)
+        self.assertEqual(parser.parse("Jan  2 00:00:00 host"), 1704153600)
+
+    def test_lines_without_a_timestamp(self) -> None:
+        parser = TimestampParser(year=2024)
+        for line in ("", "error: failed", "Foo 12 10:00:03 x", "Jan 12 25:00:03 x"):
+            self.assertIsNone(parser.parse(line), line)
+
+
+class TimelineTests(unittest.TestCase):
+    def test_peak_and_window(self) -> None:
+        timeline = Timeline(BASE)
+        for second in (BASE, BASE + 1, BASE + 61, BASE + 62, BASE + 63):
+            timeline.add(second)
+        self.assertEqual((timeline.first, timeline.last), (BASE, BASE + 63))
+        self.assertEqual((timeline.peak, timeline.peak_minute), (3, BASE // 60 + 1))
+        minute = BASE // 60
+        self.assertEqual(timeline.per_minute(), [(minute, 2), (minute + 1, 3)])
+        # Minutes that leave the ring are dropped; the peak is kept.
+        timeline.add(BASE + RING_MINUTES * 60 + 60)
+        self.assertEqual(timeline.per_minute(), [(minute + 1 + RING_MINUTES, 1)])
+        self.assertEqual(timeline.peak, 3)
+
+    def test_merge(self) -> None:
+        left, right = Timeline(BASE), Timeline(BASE + 60)
+        left.add(BASE)
+        for second in (BASE + 60, BASE + 70, BASE + 10):
+            right.add(second)
+        left.merge(right)
+        minute = BASE // 60
+        self.assertEqual((left.first, left.last), (BASE, BASE + 70))
+        self.assertEqual(left.per_minute(), [(minute, 2), (minute + 1, 2)])
+
+
+class AnalyzerTimelineTests(unittest.TestCase):
+    def _analyze(self) -> Analyzer:
+        analyzer = Analyzer(normalize=True, timeline=True)
+        analyzer._clock = TimestampParser(year=2024)
+        analyzer.process_lines(
+            [
+                "Jan 12 10:00:01 host app[1]: error: disk full\n",
+                "Jan 12 10:00:02 host app[1]: info: retrying\n",
+                "Jan 12 10:00:40 host app[1]: error: disk full\n",
+                "Jan 12 10:03:05 host app[1]: error: disk full\n",
+                "error: no timestamp here\n",
+            ]
+        )
+        analyzer.finalize()
+        return analyzer
+
+    def test_first_last_and_peak(self) -> None:
+        analyzer = self._analyze()
+        timelines = analyzer.get_timelines()
+        assert timelines is not None
+        by_message = {event.message: event.key() for event in analyzer.get_events()}
+        timeline = timelines[by_message[DISK_FULL]]
+        self.assertEqual((timeline.first, timeline.last), (BASE + 1, BASE + 185))
+        self.assertEqual((timeline.peak, timeline.peak_minute), (2, BASE // 60))
+        self.assertNotIn(by_message["error: no timestamp here"], timelines)
+        self.assertIsNone(Analyzer().get_timelines())
+
+    def test_reports(self) -> None:
+        analyzer = self._analyze()
+        events = analyzer.get_events()
+        timelines = analyzer.get_timelines()
+        text = generate_text(events, timelines=timelines)
+        self.assertIn(
+            f"  Seen: {format_time(BASE + 1)} to {format_time(BASE + 185)}, "
+            "peak 2/min at 2024-01-12 10:00",
+            text,
+        )
+        records = {
+            item["message"]: item
+            for item in json.loads(generate_json(events, timelines=timelines))
+        }
+        disk = records[DISK_FULL]
+        self.assertEqual(disk["first_seen"], "2024-01-12 10:00:01")
+        self.assertEqual(
+            disk["per_minute"], {"2024-01-12 10:00": 2, "2024-01-12 10:03": 1}
+        )
+        self.assertIsNone(records["error: no timestamp here"]["first_seen"])
+
+
+if __name__ == "__main__":
+    unittest.main()